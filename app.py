@@ -1,7 +1,30 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response, g, stream_with_context, stream_template
+import io
 import os
-from utils.yaml_manager import YamlManager
+import atexit
+import json
+import queue
+import time
+import shutil
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from markupsafe import escape
+from utils.yaml_manager import YamlManager, RevisionConflictError
 from utils.config_validator import ConfigValidator
+from utils.incremental_validator import IncrementalValidator
+from utils.json_patch import JsonPatchError, make_pointer, parse_pointer
+from utils.config_stats import ConfigStats, EMPTY_STATS
+from utils.config_diff import ConfigDiffer
+from utils.config_import import ConfigImporter, detect_archive_format
+from utils.config_integrity import ConfigIntegrityChecker
+from utils.reference_index import ReferenceIndex, REFERENCE_KINDS
+from utils.search_index import SearchIndex
+from utils.editor_validation import EditorValidator
+from utils.config_watcher import ConfigWatcher, EventBroker
+from utils.backup_retention import BackupPruner, RetentionPolicy
+from utils.archive_stream import ARCHIVE_FORMATS, stream_archive
+from utils import yaml_backend
 import logging
 
 # 配置日志
@@ -14,59 +37,231 @@ app.secret_key = 'homeman-secret-key-change-in-production'
 # 配置 Homepage 配置文件目录
 HOMEPAGE_CONFIG_PATH = os.getenv('HOMEPAGE_CONFIG_PATH', '/app/config')
 
+# 同一文件连续保存的合并窗口（毫秒），0 表示每次保存立即落盘
+WRITE_COALESCE_MS = int(os.getenv('HOMEMAN_WRITE_COALESCE_MS', '0'))
+
+# 写入配置时是否必须携带版本号（If-Match 请求头或表单字段 revision），0 表示不强制
+REQUIRE_IF_MATCH = os.getenv('HOMEMAN_REQUIRE_IF_MATCH', '1') != '0'
+
+# 增量备份的最大差异链长度（每隔多少个备份存一次完整内容），0 表示每个新内容都完整存储
+BACKUP_DELTA_CHAIN = int(os.getenv('HOMEMAN_BACKUP_DELTA_CHAIN', '0'))
+
 # 初始化 YAML 管理器
-yaml_manager = YamlManager(HOMEPAGE_CONFIG_PATH)
+yaml_manager = YamlManager(HOMEPAGE_CONFIG_PATH, write_coalesce_window=WRITE_COALESCE_MS / 1000,
+                           backup_delta_chain=BACKUP_DELTA_CHAIN)
+# 配置验证器（规则以声明式模式定义在 utils/config_schema.py 中）
 validator = ConfigValidator()
+incremental_validator = IncrementalValidator(validator)
+config_stats = ConfigStats(yaml_manager)
+config_differ = ConfigDiffer(yaml_manager)
+reference_index = ReferenceIndex(yaml_manager)
+search_index = SearchIndex(yaml_manager)
+editor_validator = EditorValidator()
+# 主页各部分数据的后台加载线程池（流式渲染时并发加载），进程退出时不再等待排队的任务
+page_loader = ThreadPoolExecutor(max_workers=4, thread_name_prefix='homeman-page')
+atexit.register(page_loader.shutdown, wait=False, cancel_futures=True)
 
-def safe_calculate_stats(settings_data, bookmarks_data, services_data, widgets_data, docker_data):
-    """安全地计算统计信息，避免空数据或格式错误导致的崩溃"""
-    stats = {
-        'bookmarks_count': 0,
-        'bookmarks_groups': 0,
-        'services_count': 0,
-        'services_groups': 0,
-        'widgets_count': 0,
-        'docker_instances': 0,
-        'configured_settings': 0
-    }
-    
+# SSE 心跳间隔（秒）与监听回退时的轮询间隔（秒）
+EVENT_KEEPALIVE_SECONDS = 15
+# 每个进程同时订阅 /api/events 的连接上限（默认为每个 worker 线程数的一半），
+# 超出时返回 503，客户端稍后重连，避免长连接占满 worker 线程
+MAX_EVENT_SUBSCRIBERS = int(os.getenv('HOMEMAN_MAX_EVENT_SUBSCRIBERS',
+                                      str(max(1, int(os.getenv('HOMEMAN_THREADS', '8')) // 2))))
+EVENT_RETRY_SECONDS = 30
+WATCH_POLL_INTERVAL = float(os.getenv('HOMEMAN_WATCH_POLL_INTERVAL', '2'))
+
+# 一次打包下载的备份数上限
+MAX_ARCHIVE_BACKUPS = 50
+
+# 搜索结果的默认条数与上限
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 200
+
+# 服务/书签条目总数超过该值时，页面只渲染首页分组，其余分组滚动到可见区域时再通过分组分页接口加载
+LAZY_RENDER_THRESHOLD = int(os.getenv('HOMEMAN_LAZY_RENDER_THRESHOLD', '500'))
+# 分组分页：每页默认分组数、渲染 HTML 时每页的条目数上限、单页分组数上限
+GROUP_PAGE_SIZE = 10
+GROUP_PAGE_MAX_ITEMS = 200
+GROUP_MAX_LIMIT = 500
+
+def publish_config_changes(changed_configs):
+    """配置文件变化时生成一次事件数据并广播给所有 SSE 订阅者"""
+    config_status = yaml_manager.get_config_status()
+    stats = config_stats.get_stats()
+    for config_name in changed_configs:
+        event_broker.publish({
+            'config': config_name,
+            'status': config_status.get(config_name, {}),
+            'config_status': config_status,
+            'stats': stats
+        })
+
+event_broker = EventBroker(max_subscribers=MAX_EVENT_SUBSCRIBERS)
+config_watcher = ConfigWatcher(yaml_manager, publish_config_changes, poll_interval=WATCH_POLL_INTERVAL)
+# 首个订阅者连接时才启动监听线程
+event_broker.on_first_subscriber(config_watcher.start)
+
+# 按保留策略在后台清理过期备份（HOMEMAN_BACKUP_KEEP_* / HOMEMAN_BACKUP_MAX_MB）
+# 导入模块时不启动线程，由 wsgi.py / 开发服务器入口调用 start_background_tasks 启动
+backup_pruner = BackupPruner(yaml_manager.backup_store, RetentionPolicy.from_env(),
+                             interval=float(os.getenv('HOMEMAN_BACKUP_PRUNE_INTERVAL', '3600')))
+
+def start_background_tasks():
+    """启动后台任务（备份清理）"""
+    backup_pruner.start()
+
+# 应用启动时间，用于计算运行时长
+APP_START_TIME = time.time()
+
+def summarize_validation_errors(errors):
+    """将增量验证的错误列表汇总为(验证结果, 错误信息)"""
+    if not errors:
+        return True, "验证通过"
+    messages = '；'.join(error['message'] for error in errors[:5])
+    if len(errors) > 5:
+        messages += f' 等 {len(errors)} 个错误'
+    return False, messages
+
+def validate_bookmarks_incremental(bookmarks_data, indices=None):
+    """增量验证书签配置，返回(验证结果, 错误信息)；indices 为局部配置中各分组在完整配置中的下标"""
+    return summarize_validation_errors(incremental_validator.validate_bookmarks(bookmarks_data, indices))
+
+def validate_services_incremental(services_data, indices=None, errors=None):
+    """增量验证服务配置，返回(验证结果, 错误信息)；errors 不为 None 时收集错误详情"""
+    found = incremental_validator.validate_services(services_data, indices)
+    if errors is not None:
+        errors.extend(found)
+    return summarize_validation_errors(found)
+
+def get_request_revision():
+    """获取请求携带的配置版本号：If-Match 请求头优先，其次为表单字段 revision"""
+    if request.if_match.star_tag:
+        return '*'
+    etags = request.if_match.as_set(include_weak=True)
+    if etags:
+        return next(iter(etags))
+    return request.form.get('revision') or None
+
+def get_request_revisions():
+    """
+    一次写入多个配置的接口（导入、恢复）的版本号，返回(已知版本号集合, 是否缺少版本号)
+
+    If-Match 可以包含多个版本号；If-Match: * 或未提供（且不强制要求）时集合为 None，不做检查。
+    """
+    if request.if_match.star_tag:
+        return None, False
+    revisions = request.if_match.as_set(include_weak=True)
+    if not revisions:
+        return None, REQUIRE_IF_MATCH
+    return revisions, False
+
+def config_write(config_name):
+    """配置写事务：持有文件锁并校验请求的版本号，If-Match: * 表示强制覆盖"""
+    revision = get_request_revision()
+    if revision == '*':
+        return yaml_manager.config_transaction(config_name)
+    return yaml_manager.config_transaction(config_name, revision, require_revision=REQUIRE_IF_MATCH)
+
+def with_revision(response, config_name):
+    """在响应头中返回配置的当前版本号（ETag）"""
+    response.set_etag(yaml_manager.get_revision(config_name))
+    response.headers['X-Config-Name'] = config_name
+    return response
+
+def revision_conflict_response(error):
+    """版本号冲突返回 409，缺少版本号返回 428"""
+    response = jsonify({
+        'success': False,
+        'status': 'error',
+        'error': str(error),
+        'message': str(error),
+        'revision': error.current_revision
+    })
+    response.status_code = 428 if error.missing else 409
+    return with_revision(response, error.config_name)
+
+@app.before_request
+def capture_config_revisions():
+    """页面请求开始时（加载配置之前）记录各配置文件的版本号，前端保存时通过 If-Match 回传"""
+    if request.method != 'GET' or request.path.startswith(('/api/', '/static/')):
+        return
     try:
-        # 计算书签统计
-        if isinstance(bookmarks_data, list):
-            stats['bookmarks_groups'] = len(bookmarks_data)
-            for group in bookmarks_data:
-                if isinstance(group, dict) and group:
-                    group_name = list(group.keys())[0]
-                    if group_name in group and isinstance(group[group_name], list):
-                        stats['bookmarks_count'] += len(group[group_name])
-        
-        # 计算服务统计
-        if isinstance(services_data, list):
-            stats['services_groups'] = len(services_data)
-            for group in services_data:
-                if isinstance(group, dict) and group:
-                    group_name = list(group.keys())[0]
-                    if group_name in group and isinstance(group[group_name], list):
-                        stats['services_count'] += len(group[group_name])
-        
-        # 计算小工具统计
-        if isinstance(widgets_data, dict):
-            stats['widgets_count'] = len(widgets_data)
-        
-        # 计算 Docker 实例统计
-        if isinstance(docker_data, dict):
-            stats['docker_instances'] = len(docker_data)
-        
-        # 计算已配置的设置项
-        if isinstance(settings_data, dict):
-            stats['configured_settings'] = len([k for k, v in settings_data.items() 
-                                              if v not in ['', None, False]])
-    
+        g.config_revisions = {name: yaml_manager.get_revision(name)
+                              for name in yaml_manager.get_supported_config_types()}
     except Exception as e:
-        logger.error(f"计算统计信息时发生错误: {e}")
-        # 如果计算出错，返回默认的零值统计
-    
-    return stats
+        logger.error(f"获取配置版本号失败: {e}")
+
+@app.context_processor
+def inject_config_revisions():
+    """页面中注入请求开始时的配置版本号"""
+    return {'config_revisions': g.get('config_revisions', {})}
+
+def use_lazy_render(config_name):
+    """是否分组懒加载：?lazy=1/0 强制开关，否则按条目总数（按文件指纹缓存的统计）决定"""
+    lazy = request.args.get('lazy')
+    if lazy is not None:
+        return lazy.lower() not in ('0', 'false', 'no')
+    return config_stats.get_stats().get(f'{config_name}_count', 0) > LAZY_RENDER_THRESHOLD
+
+def first_group_page(config_name):
+    """
+    懒加载页面的首页分组，返回(渲染的分组, 页面数据, 下一页游标, 分组总数)
+
+    格式无效的分组不渲染，但以原始内容保留在页面数据中：前端整体保存时原样带回，
+    由验证报错（与完整渲染时一致），而不是被静默删除。
+    """
+    groups, next_cursor, total_groups = yaml_manager.query_groups(
+        config_name, GROUP_PAGE_SIZE, max_items=GROUP_PAGE_MAX_ITEMS)
+    rendered = [{group['name']: group['items']} for group in groups if group['name'] is not None]
+    data = [{group['name']: group['items']} if group['name'] is not None else group['raw'] for group in groups]
+    return rendered, data, next_cursor, total_groups
+
+# 流式渲染中途出错时追加在已发送内容之后的错误提示（同时结束页面）
+STREAM_ERROR_BLOCK = (
+    '<div class="alert alert-danger mt-4" role="alert">'
+    '<i class="fas fa-exclamation-triangle"></i> {message}</div></main></body></html>'
+)
+
+def load_in_background(func, default, errors):
+    """在线程池中加载页面数据，失败时记录错误信息并返回默认值"""
+    def load():
+        try:
+            return func()
+        except Exception as e:
+            logger.error(f"页面错误: {e}")
+            errors.append(f"加载配置时发生错误: {e}")
+            return default
+    return page_loader.submit(load)
+
+def stream_page(template_name, **context):
+    """
+    流式渲染页面，context 中的 Future 由模板通过 resolved 过滤器在用到时等待
+
+    后台任务未全部完成时，模板每段输出立即发送（下一段可能要等待任务结果）；
+    全部完成后剩余输出合并为一次发送。响应开始发送后无法再改用 handle_page_error，
+    渲染中途出错时在已发送的内容后输出错误提示并结束页面。
+    """
+    pending = [value for value in context.values() if isinstance(value, Future)]
+
+    def generate(chunks):
+        buffer = []
+        try:
+            for chunk in chunks:
+                buffer.append(chunk)
+                if not all(future.done() for future in pending):
+                    yield ''.join(buffer)
+                    buffer = []
+        except Exception as e:
+            logger.error(f"页面错误: {e}")
+            buffer.append(STREAM_ERROR_BLOCK.format(message=escape(f"加载配置时发生错误: {e}")))
+        yield ''.join(buffer)
+
+    return Response(generate(stream_template(template_name, **context)))
+
+@app.template_filter('resolved')
+def resolved_filter(value):
+    """等待后台加载的页面数据；普通值原样返回"""
+    return value.result() if isinstance(value, Future) else value
 
 def handle_page_error(error_msg, template_name, **template_vars):
     """处理页面错误，显示错误信息并渲染模板"""
@@ -76,43 +271,26 @@ def handle_page_error(error_msg, template_name, **template_vars):
 
 @app.route('/')
 def index():
-    """主页 - 显示配置概览"""
+    """主页 - 显示配置概览（流式渲染：页面框架先发送，各部分数据并发加载，完成后依次输出）"""
     try:
-        # 获取配置状态
-        config_status = yaml_manager.get_config_status()
-        
-        # 获取配置数据
-        settings_data = yaml_manager.load_settings()
-        bookmarks_data = yaml_manager.load_bookmarks()
-        services_data = yaml_manager.load_services()
-        widgets_data = yaml_manager.load_widgets()
-        docker_data = yaml_manager.load_docker()
-        
-        # 安全地计算统计信息
-        stats = safe_calculate_stats(settings_data, bookmarks_data, services_data, widgets_data, docker_data)
-        
-        # 获取最近备份
-        recent_backups = yaml_manager.list_backups()[:3]  # 最近3个备份
-        
-        return render_template('index.html', 
-                             config_status=config_status, 
-                             stats=stats, 
-                             recent_backups=recent_backups,
-                             settings=settings_data)
+        load_errors = []
+        return stream_page('index.html',
+                           load_errors=load_errors,
+                           # 获取配置数据
+                           settings=load_in_background(yaml_manager.load_settings, {}, load_errors),
+                           # 统计信息（增量维护，只有被外部修改的文件才会重新统计）
+                           stats=load_in_background(config_stats.get_stats, dict(EMPTY_STATS), load_errors),
+                           # 获取配置状态
+                           config_status=load_in_background(yaml_manager.get_config_status, {}, load_errors),
+                           # 获取最近3个备份
+                           recent_backups=load_in_background(partial(yaml_manager.list_backups, limit=3), [],
+                                                             load_errors))
     
     except Exception as e:
         # 如果发生任何错误，返回带错误信息的空页面
         return handle_page_error(str(e), 'index.html', 
                                config_status={}, 
-                               stats={
-                                   'bookmarks_count': 0,
-                                   'bookmarks_groups': 0,
-                                   'services_count': 0,
-                                   'services_groups': 0,
-                                   'widgets_count': 0,
-                                   'docker_instances': 0,
-                                   'configured_settings': 0
-                               }, 
+                               stats=dict(EMPTY_STATS), 
                                recent_backups=[],
                                settings={})
 
@@ -172,10 +350,13 @@ def save_settings():
                 except ValueError:
                     settings_data[field] = 4 if field == 'maxGroupColumns' else 6
         
+        settings_data.pop('revision', None)
+        
         # 验证配置
         is_valid, validation_msg = validator.validate_settings(settings_data)
         if is_valid:
-            success, save_msg = yaml_manager.save_settings(settings_data)
+            with config_write('settings'):
+                success, save_msg = yaml_manager.save_settings(settings_data)
             if success:
                 flash('设置保存成功！', 'success')
             else:
@@ -183,6 +364,8 @@ def save_settings():
         else:
             flash(f'设置验证失败：{validation_msg}', 'error')
             
+    except RevisionConflictError as e:
+        flash(f'保存失败：{str(e)}', 'error')
     except Exception as e:
         flash(f'保存异常：{str(e)}', 'error')
     
@@ -192,6 +375,10 @@ def save_settings():
 def bookmarks():
     """书签管理页面"""
     try:
+        if use_lazy_render('bookmarks'):
+            bookmarks_data, page_data, next_cursor, total_groups = first_group_page('bookmarks')
+            return render_template('bookmarks.html', bookmarks=bookmarks_data, page_data=page_data,
+                                   next_cursor=next_cursor, total_groups=total_groups)
         bookmarks_data = yaml_manager.load_bookmarks()
         return render_template('bookmarks.html', bookmarks=bookmarks_data)
     except Exception as e:
@@ -201,19 +388,23 @@ def bookmarks():
 def save_bookmarks():
     """保存书签配置"""
     try:
-        bookmarks_data = request.get_json()
-        
-        # 验证配置
-        is_valid, validation_msg = validator.validate_bookmarks(bookmarks_data)
-        if is_valid:
-            success, save_msg = yaml_manager.save_bookmarks(bookmarks_data)
-            if success:
-                return jsonify({'status': 'success', 'message': '书签保存成功！'})
-            else:
-                return jsonify({'status': 'error', 'message': f'保存失败：{save_msg}'})
-        else:
-            return jsonify({'status': 'error', 'message': f'书签验证失败：{validation_msg}'})
+        with config_write('bookmarks'):
+            bookmarks_data = request.get_json()
             
+            # 验证配置（增量验证，未变化的分组直接复用缓存结果）
+            errors = incremental_validator.validate_bookmarks(bookmarks_data)
+            is_valid, validation_msg = summarize_validation_errors(errors)
+            if is_valid:
+                success, save_msg = yaml_manager.save_bookmarks(bookmarks_data)
+                if success:
+                    return with_revision(jsonify({'status': 'success', 'message': '书签保存成功！'}), 'bookmarks')
+                else:
+                    return jsonify({'status': 'error', 'message': f'保存失败：{save_msg}'})
+            else:
+                return jsonify({'status': 'error', 'message': f'书签验证失败：{validation_msg}', 'errors': errors})
+                
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'status': 'error', 'message': f'保存异常：{str(e)}'})
 
@@ -221,66 +412,100 @@ def save_bookmarks():
 def services():
     """服务管理页面"""
     try:
-        services_data = yaml_manager.load_services()
         docker_data = yaml_manager.load_docker()
+        if use_lazy_render('services'):
+            services_data, page_data, next_cursor, total_groups = first_group_page('services')
+            return render_template('services.html', services=services_data, page_data=page_data,
+                                   docker_config=docker_data, next_cursor=next_cursor, total_groups=total_groups)
+        services_data = yaml_manager.load_services()
         return render_template('services.html', services=services_data, docker_config=docker_data)
     except Exception as e:
         return handle_page_error(str(e), 'services.html', services=[], docker_config={})
 
+def find_group_indices(groups, group_name):
+    """列表型配置中包含指定分组名的分组下标"""
+    return [index for index, group in enumerate(groups) if isinstance(group, dict) and group_name in group]
+
+def service_write_operations(request_data):
+    """
+    根据服务接口的请求生成 JSON Patch 操作
+
+    返回以当前服务配置（只读）为参数的函数，由 patch_config 在持有文件锁时调用，
+    按名称定位分组和服务的下标，只有被修改的分组会被复制、验证。
+    """
+    action = request_data.get('action')
+    group_name = request_data.get('groupName')
+
+    def build(services):
+        group_indices = find_group_indices(services, group_name)
+        group_index = group_indices[0] if group_indices else None
+
+        if action == 'add_service':
+            # 添加到已有分组，分组不存在时新建
+            service = {request_data.get('serviceName'): request_data.get('serviceData')}
+            if group_index is None:
+                return [{'op': 'add', 'path': '/-', 'value': {group_name: [service]}}]
+            return [{'op': 'add', 'path': make_pointer(group_index, group_name, '-'), 'value': service}]
+
+        if action == 'update_service':
+            # 删除旧服务，在分组末尾添加新服务
+            if group_index is None:
+                return []
+            original_name = request_data.get('originalName')
+            for service_index, service in enumerate(services[group_index][group_name]):
+                if original_name in service:
+                    service = {request_data.get('serviceName'): request_data.get('serviceData')}
+                    return [{'op': 'remove', 'path': make_pointer(group_index, group_name, service_index)},
+                            {'op': 'add', 'path': make_pointer(group_index, group_name, '-'), 'value': service}]
+            return []
+
+        if action == 'delete_service':
+            if group_index is None:
+                return []
+            service_name = request_data.get('serviceName')
+            matches = [service_index for service_index, service in enumerate(services[group_index][group_name])
+                       if service_name in service]
+            return [{'op': 'remove', 'path': make_pointer(group_index, group_name, service_index)}
+                    for service_index in reversed(matches)]
+
+        if action == 'add_group':
+            return [{'op': 'add', 'path': '/-', 'value': {group_name: []}}]
+
+        if action == 'update_group':
+            # 重命名分组，分组位置不变
+            original_indices = find_group_indices(services, request_data.get('originalName'))
+            if not original_indices:
+                return []
+            return [{'op': 'move', 'path': make_pointer(original_indices[0], group_name),
+                     'from': make_pointer(original_indices[0], request_data.get('originalName'))}]
+
+        if action == 'delete_group':
+            return [{'op': 'remove', 'path': make_pointer(index)} for index in reversed(group_indices)]
+
+        return []
+
+    return build
+
+def patch_services(request_data, success_message, error_prefix):
+    """按请求修改服务配置，返回 JSON 响应"""
+    errors = []
+    with config_write('services'):
+        success, save_msg = yaml_manager.patch_config(
+            'services', service_write_operations(request_data),
+            partial(validate_services_incremental, errors=errors))
+    if success:
+        return with_revision(jsonify({'success': True, 'message': success_message}), 'services')
+    if errors:
+        return jsonify({'success': False, 'error': f'服务配置验证失败：{save_msg}', 'errors': errors})
+    return jsonify({'success': False, 'error': f'{error_prefix}：{save_msg}'})
+
 @app.route('/api/services', methods=['POST'])
 def save_services():
-    """保存服务配置"""
+    """保存服务配置（添加或更新服务）"""
     try:
-        request_data = request.get_json()
-        action = request_data.get('action')
-        
-        current_services = yaml_manager.load_services()
-        
-        if action == 'add_service':
-            # 添加新服务
-            group_name = request_data.get('groupName')
-            service_name = request_data.get('serviceName')
-            service_data = request_data.get('serviceData')
-            
-            # 查找或创建分组
-            group_found = False
-            for group in current_services:
-                if group_name in group:
-                    group[group_name].append({service_name: service_data})
-                    group_found = True
-                    break
-            
-            if not group_found:
-                current_services.append({group_name: [{service_name: service_data}]})
-                
-        elif action == 'update_service':
-            # 更新服务
-            group_name = request_data.get('groupName')
-            service_name = request_data.get('serviceName')
-            original_name = request_data.get('originalName')
-            service_data = request_data.get('serviceData')
-            
-            for group in current_services:
-                if group_name in group:
-                    for i, service in enumerate(group[group_name]):
-                        if original_name in service:
-                            # 删除旧服务，添加新服务
-                            del group[group_name][i]
-                            group[group_name].append({service_name: service_data})
-                            break
-                    break
-        
-        # 验证并保存
-        is_valid, validation_msg = validator.validate_services(current_services)
-        if is_valid:
-            success, save_msg = yaml_manager.save_services(current_services)
-            if success:
-                return jsonify({'success': True, 'message': '服务保存成功！'})
-            else:
-                return jsonify({'success': False, 'error': f'配置保存失败：{save_msg}'})
-        else:
-            return jsonify({'success': False, 'error': f'服务配置验证失败：{validation_msg}'})
-            
+        return patch_services(request.get_json(), '服务保存成功！', '配置保存失败')
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'保存失败：{str(e)}'})
 
@@ -288,56 +513,19 @@ def save_services():
 def delete_service():
     """删除服务"""
     try:
-        request_data = request.get_json()
-        group_name = request_data.get('groupName')
-        service_name = request_data.get('serviceName')
-        
-        current_services = yaml_manager.load_services()
-        
-        for group in current_services:
-            if group_name in group:
-                group[group_name] = [service for service in group[group_name] 
-                                   if service_name not in service]
-                break
-        
-        success, save_msg = yaml_manager.save_services(current_services)
-        if success:
-            return jsonify({'success': True, 'message': '服务删除成功！'})
-        else:
-            return jsonify({'success': False, 'error': f'删除失败：{save_msg}'})
-            
+        return patch_services(dict(request.get_json(), action='delete_service'), '服务删除成功！', '删除失败')
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'删除失败：{str(e)}'})
 
 @app.route('/api/services/group', methods=['POST'])
 def save_service_group():
-    """保存服务分组"""
+    """保存服务分组（添加或重命名分组）"""
     try:
-        request_data = request.get_json()
-        action = request_data.get('action')
-        group_name = request_data.get('groupName')
-        
-        current_services = yaml_manager.load_services()
-        
-        if action == 'add_group':
-            # 添加新分组
-            current_services.append({group_name: []})
-        elif action == 'update_group':
-            # 重命名分组
-            original_name = request_data.get('originalName')
-            for group in current_services:
-                if original_name in group:
-                    group_services = group[original_name]
-                    del group[original_name]
-                    group[group_name] = group_services
-                    break
-        
-        success, save_msg = yaml_manager.save_services(current_services)
-        if success:
-            return jsonify({'success': True, 'message': '分组保存成功！'})
-        else:
-            return jsonify({'success': False, 'error': f'保存失败：{save_msg}'})
-            
+        return patch_services(request.get_json(), '分组保存成功！', '保存失败')
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'保存失败：{str(e)}'})
 
@@ -345,21 +533,78 @@ def save_service_group():
 def delete_service_group():
     """删除服务分组"""
     try:
-        request_data = request.get_json()
-        group_name = request_data.get('groupName')
-        
-        current_services = yaml_manager.load_services()
-        current_services = [group for group in current_services if group_name not in group]
-        
-        success, save_msg = yaml_manager.save_services(current_services)
-        if success:
-            return jsonify({'success': True, 'message': '分组删除成功！'})
-        else:
-            return jsonify({'success': False, 'error': f'删除失败：{save_msg}'})
-            
+        return patch_services(dict(request.get_json(), action='delete_group'), '分组删除成功！', '删除失败')
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'删除失败：{str(e)}'})
 
+# 支持 JSON Patch 的配置及其验证函数
+PATCH_VALIDATORS = {
+    'bookmarks': validate_bookmarks_incremental,
+    'services': validate_services_incremental,
+    'widgets': lambda widgets, keys: validator.validate_widgets(widgets),
+    'docker': lambda docker_config, keys: validator.validate_docker(docker_config)
+}
+
+def removed_top_level_keys(operations):
+    """补丁中被删除或移走、且未重新添加的顶层键"""
+    removed, added = set(), set()
+    for operation in operations:
+        if not isinstance(operation, dict):
+            continue
+        op = operation.get('op')
+        try:
+            if op in ('remove', 'move'):
+                source = parse_pointer(operation.get('path' if op == 'remove' else 'from'))
+                if len(source) == 1:
+                    removed.add(source[0])
+            if op in ('add', 'move', 'copy'):
+                target = parse_pointer(operation.get('path'))
+                if len(target) == 1:
+                    added.add(target[0])
+        except JsonPatchError:
+            # 无效路径由 patch_config 报告
+            continue
+    return removed - added
+
+@app.route('/api/config/<config_name>', methods=['PATCH'])
+def patch_config(config_name):
+    """按 JSON Patch (RFC 6902) 批量修改配置，只验证被修改的分组/实例"""
+    try:
+        if config_name not in PATCH_VALIDATORS:
+            return jsonify({'success': False, 'error': f'不支持的配置类型: {config_name}'}), 400
+
+        # 同时接受 application/json-patch+json 和 {"operations": [...]} 两种请求体
+        request_data = request.get_json(force=True)
+        operations = request_data.get('operations') if isinstance(request_data, dict) else request_data
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'success': False, 'error': '补丁必须是非空的操作列表'}), 400
+
+        # 修改 Docker 实例时同时锁定服务配置，避免检查引用后又有服务引用被删除的实例
+        services_lock = yaml_manager.config_transaction('services') if config_name == 'docker' else nullcontext()
+        with config_write(config_name), services_lock:
+            if config_name == 'docker':
+                # 与 POST /api/docker 相同：删除仍被服务引用的实例返回 409 和引用列表
+                for instance_name in sorted(removed_top_level_keys(operations)):
+                    references = reference_index.find('docker', instance_name, configs=['services'])
+                    if references:
+                        return jsonify({
+                            'success': False,
+                            'error': f'实例 {instance_name} 仍被 {len(references)} 个服务引用',
+                            'references': references
+                        }), 409
+            success, patch_msg = yaml_manager.patch_config(config_name, operations, PATCH_VALIDATORS[config_name])
+            if success:
+                return with_revision(jsonify({'success': True, 'message': f'已应用 {len(operations)} 个修改'}), config_name)
+            else:
+                return jsonify({'success': False, 'error': patch_msg}), 400
+
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'保存失败：{str(e)}'}), 500
+
 @app.route('/docker')
 def docker():
     """Docker 管理页面"""
@@ -371,37 +616,122 @@ def docker():
 
 @app.route('/api/docker', methods=['POST'])
 def save_docker():
-    """保存 Docker 配置"""
+    """
+    保存 Docker 配置
+
+    _delete 指定要删除（或重命名前）的实例：重命名时同步修改引用它的服务的 server；
+    删除仍被服务引用的实例返回 409 和引用列表，_cascade 为 true 时同时移除这些服务的 server/container。
+    """
     try:
-        docker_data = request.get_json()
-        
-        # 处理删除操作
-        current_config = yaml_manager.load_docker()
-        if '_delete' in docker_data:
-            instance_to_delete = docker_data['_delete']
-            if instance_to_delete in current_config:
+        with config_write('docker'), yaml_manager.config_transaction('services'):
+            docker_data = request.get_json()
+            instance_to_delete = docker_data.pop('_delete', None)
+            cascade = docker_data.pop('_cascade', False)
+            
+            # 处理删除操作
+            current_config = yaml_manager.load_docker()
+            references = []
+            if instance_to_delete in current_config and instance_to_delete not in docker_data:
                 del current_config[instance_to_delete]
-                docker_data = {k: v for k, v in docker_data.items() if k != '_delete'}
-        
-        # 合并新配置
-        for instance_name, config in docker_data.items():
-            if instance_name != '_delete':
+                references = reference_index.find('docker', instance_to_delete, configs=['services'])
+            
+            # 重命名（删除旧名称的同时只保存一个新实例）时服务改为引用新名称
+            new_name = next(iter(docker_data)) if len(docker_data) == 1 else None
+            if references and new_name is None and not cascade:
+                return jsonify({
+                    'success': False,
+                    'error': f'实例 {instance_to_delete} 仍被 {len(references)} 个服务引用',
+                    'references': references
+                }), 409
+            
+            # 合并新配置
+            for instance_name, config in docker_data.items():
                 current_config[instance_name] = config
-        
-        # 验证配置
-        is_valid, validation_msg = validator.validate_docker(current_config)
-        if is_valid:
-            success, save_msg = yaml_manager.save_docker(current_config)
+            
+            # 验证配置
+            is_valid, validation_msg = validator.validate_docker(current_config)
+            if not is_valid:
+                return jsonify({'success': False, 'error': f'Docker 配置验证失败：{validation_msg}'})
+            
+            if references:
+                current_services = yaml_manager.load_services()
+                updated = reference_index.retarget_docker(current_services, instance_to_delete, new_name)
+                success, save_msg = yaml_manager.save_configs(
+                    {'docker': current_config, 'services': current_services}, 'pre_docker_cascade')
+                message = f'Docker 配置保存成功，已同步更新 {updated} 个服务'
+            else:
+                success, save_msg = yaml_manager.save_docker(current_config)
+                message = 'Docker 配置保存成功！'
             if success:
-                return jsonify({'success': True, 'message': 'Docker 配置保存成功！'})
+                return with_revision(jsonify({'success': True, 'message': message}), 'docker')
             else:
                 return jsonify({'success': False, 'error': f'配置保存失败：{save_msg}'})
-        else:
-            return jsonify({'success': False, 'error': f'Docker 配置验证失败：{validation_msg}'})
-            
+                
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'保存失败：{str(e)}'})
 
+@app.route('/api/references')
+def find_references():
+    """查询引用：?docker=<实例名>、?icon=<图标> 或 ?href=<链接>，返回使用它的服务和书签"""
+    for kind in REFERENCE_KINDS:
+        value = request.args.get(kind)
+        if value is not None:
+            return jsonify({'success': True, 'kind': kind, 'value': value,
+                            'references': reference_index.find(kind, value)})
+    return jsonify({'success': False, 'error': f'需要指定参数: {", ".join(REFERENCE_KINDS)}'}), 400
+
+@app.route('/api/search')
+def search_entries():
+    """全文搜索服务、书签和小工具：?q=<关键词>，可选 config=services,bookmarks、limit、fuzzy=0"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': '需要指定搜索关键词参数: q'}), 400
+    try:
+        configs = [name for name in request.args.get('config', '').split(',') if name] or None
+        limit = request.args.get('limit')
+        limit = int(limit) if limit else SEARCH_DEFAULT_LIMIT
+        if not 0 < limit <= SEARCH_MAX_LIMIT:
+            raise ValueError(f'limit 必须是 1-{SEARCH_MAX_LIMIT} 之间的整数')
+        fuzzy = request.args.get('fuzzy', '1').lower() not in ('0', 'false', 'no')
+        started = time.perf_counter()
+        result = search_index.search(query, configs=configs, limit=limit, fuzzy=fuzzy)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'搜索失败：{str(e)}'})
+    return jsonify({'success': True, 'query': query, **result,
+                    'time_ms': round((time.perf_counter() - started) * 1000, 2)})
+
+@app.route('/api/<any(services, bookmarks):config_name>/groups')
+def query_config_groups(config_name):
+    """
+    按分组分页获取服务/书签：cursor 取自上一页的 next_cursor，limit 为每页分组数，
+    render=1 时为每个分组附带渲染好的 HTML（此时每页条目数不超过 GROUP_PAGE_MAX_ITEMS）
+    """
+    render = request.args.get('render', '0').lower() in ('1', 'true', 'yes')
+    try:
+        limit = request.args.get('limit')
+        limit = int(limit) if limit else GROUP_PAGE_SIZE
+        if not 0 < limit <= GROUP_MAX_LIMIT:
+            raise ValueError(f'limit 必须是 1-{GROUP_MAX_LIMIT} 之间的整数')
+        groups, next_cursor, total_groups = yaml_manager.query_groups(
+            config_name, limit, request.args.get('cursor'),
+            max_items=GROUP_PAGE_MAX_ITEMS if render else None)
+        if render:
+            template_name = f'partials/{config_name[:-1]}_group.html'
+            groups = [dict(group, html=render_template(template_name, group={group['name']: group['items']})
+                           if group['name'] is not None else '') for group in groups]
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'获取分组失败：{str(e)}'})
+    return with_revision(jsonify({'success': True, 'groups': groups, 'next_cursor': next_cursor,
+                                  'total_groups': total_groups}), config_name)
+
 @app.route('/api/docker/test/<instance_name>', methods=['POST'])
 def test_docker_connection(instance_name):
     """测试 Docker 连接"""
@@ -454,41 +784,44 @@ def widgets():
 def save_widgets():
     """保存小工具配置"""
     try:
-        request_data = request.get_json()
-        action = request_data.get('action')
-        
-        current_widgets = yaml_manager.load_widgets()
-        
-        if action == 'add_widget':
-            # 添加新小工具
-            widget_name = request_data.get('widgetName')
-            widget_data = request_data.get('widgetData')
-            current_widgets[widget_name] = widget_data
-                
-        elif action == 'update_widget':
-            # 更新小工具
-            widget_name = request_data.get('widgetName')
-            original_name = request_data.get('originalName')
-            widget_data = request_data.get('widgetData')
+        with config_write('widgets'):
+            request_data = request.get_json()
+            action = request_data.get('action')
             
-            # 删除旧名称的小工具
-            if original_name and original_name != widget_name:
-                if original_name in current_widgets:
-                    del current_widgets[original_name]
+            current_widgets = yaml_manager.load_widgets()
             
-            current_widgets[widget_name] = widget_data
-        
-        # 验证并保存
-        is_valid, validation_msg = validator.validate_widgets(current_widgets)
-        if is_valid:
-            success, save_msg = yaml_manager.save_widgets(current_widgets)
-            if success:
-                return jsonify({'success': True, 'message': '小工具保存成功！'})
-            else:
-                return jsonify({'success': False, 'error': f'配置保存失败：{save_msg}'})
-        else:
-            return jsonify({'success': False, 'error': f'小工具配置验证失败：{validation_msg}'})
+            if action == 'add_widget':
+                # 添加新小工具
+                widget_name = request_data.get('widgetName')
+                widget_data = request_data.get('widgetData')
+                current_widgets[widget_name] = widget_data
+                    
+            elif action == 'update_widget':
+                # 更新小工具
+                widget_name = request_data.get('widgetName')
+                original_name = request_data.get('originalName')
+                widget_data = request_data.get('widgetData')
+                
+                # 删除旧名称的小工具
+                if original_name and original_name != widget_name:
+                    if original_name in current_widgets:
+                        del current_widgets[original_name]
+                
+                current_widgets[widget_name] = widget_data
             
+            # 验证并保存
+            is_valid, validation_msg = validator.validate_widgets(current_widgets)
+            if is_valid:
+                success, save_msg = yaml_manager.save_widgets(current_widgets)
+                if success:
+                    return with_revision(jsonify({'success': True, 'message': '小工具保存成功！'}), 'widgets')
+                else:
+                    return jsonify({'success': False, 'error': f'配置保存失败：{save_msg}'})
+            else:
+                return jsonify({'success': False, 'error': f'小工具配置验证失败：{validation_msg}'})
+                
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'保存失败：{str(e)}'})
 
@@ -496,20 +829,23 @@ def save_widgets():
 def delete_widget():
     """删除小工具"""
     try:
-        request_data = request.get_json()
-        widget_name = request_data.get('widgetName')
-        
-        current_widgets = yaml_manager.load_widgets()
-        
-        if widget_name in current_widgets:
-            del current_widgets[widget_name]
-        
-        success, save_msg = yaml_manager.save_widgets(current_widgets)
-        if success:
-            return jsonify({'success': True, 'message': '小工具删除成功！'})
-        else:
-            return jsonify({'success': False, 'error': f'删除失败：{save_msg}'})
+        with config_write('widgets'):
+            request_data = request.get_json()
+            widget_name = request_data.get('widgetName')
+            
+            current_widgets = yaml_manager.load_widgets()
+            
+            if widget_name in current_widgets:
+                del current_widgets[widget_name]
             
+            success, save_msg = yaml_manager.save_widgets(current_widgets)
+            if success:
+                return with_revision(jsonify({'success': True, 'message': '小工具删除成功！'}), 'widgets')
+            else:
+                return jsonify({'success': False, 'error': f'删除失败：{save_msg}'})
+                
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'删除失败：{str(e)}'})
 
@@ -570,6 +906,7 @@ def backup_config():
         try:
             backup_path, backup_msg = yaml_manager.backup_configs()
             if backup_path:
+                backup_pruner.wake()
                 return jsonify({'success': True, 'backup_path': backup_path, 'message': backup_msg})
             else:
                 return jsonify({'success': False, 'error': backup_msg})
@@ -580,6 +917,7 @@ def backup_config():
         try:
             backup_path, backup_msg = yaml_manager.backup_configs()
             if backup_path:
+                backup_pruner.wake()
                 return jsonify({'status': 'success', 'backup_path': backup_path, 'message': backup_msg})
             else:
                 return jsonify({'status': 'error', 'message': backup_msg})
@@ -602,35 +940,276 @@ def delete_backup():
 
 @app.route('/api/backups')
 def list_backups():
-    """获取备份列表"""
+    """获取备份列表，支持 limit / cursor 分页（游标取自上一页的 next_cursor）"""
     try:
-        backups = yaml_manager.list_backups()
-        return jsonify({'success': True, 'backups': backups})
+        try:
+            limit = request.args.get('limit')
+            limit = int(limit) if limit else None
+            if limit is not None and limit <= 0:
+                raise ValueError('limit 必须为正整数')
+            backups, next_cursor = yaml_manager.query_backups(limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        return jsonify({'success': True, 'backups': backups, 'next_cursor': next_cursor})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/backup/<backup_name>/preview')
+def preview_backup(backup_name):
+    """预览恢复备份会带来的变化：当前配置 → 备份内容"""
+    try:
+        result = config_differ.compare(None, backup_name)
+        if result is None:
+            return jsonify({'status': 'error', 'message': '备份不存在'}), 404
+        content = ''.join(item['text_diff'] for item in result['files']) or '当前配置与备份内容一致'
+        return jsonify({'status': 'success', 'backup': backup_name, 'content': content, **result})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/backups/diff')
+def diff_backups():
+    """比较两个备份（?from=<备份>&to=<备份>），省略任一侧表示当前配置"""
+    try:
+        old_backup = request.args.get('from') or None
+        new_backup = request.args.get('to') or None
+        if old_backup is None and new_backup is None:
+            return jsonify({'status': 'error', 'message': '请至少指定一个备份'}), 400
+        result = config_differ.compare(old_backup, new_backup)
+        if result is None:
+            return jsonify({'status': 'error', 'message': '备份不存在'}), 404
+        return jsonify({'status': 'success', 'from': old_backup, 'to': new_backup, **result})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/stats')
+def get_stats():
+    """获取配置统计，支持 ETag 条件请求（未变化时返回 304）"""
+    try:
+        stats = config_stats.get_stats()
+        response = jsonify({'status': 'success', 'stats': stats})
+        response.set_etag(config_stats.get_etag(stats))
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/api/config-status')
+def get_config_status():
+    """获取配置文件状态"""
+    try:
+        return jsonify({'status': 'success', 'config_status': yaml_manager.get_config_status()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/api/events')
+def config_events():
+    """配置变更事件流（Server-Sent Events）"""
+    subscriber = event_broker.subscribe()
+    if subscriber is None:
+        response = Response(f'retry: {EVENT_RETRY_SECONDS * 1000}\n\n', status=503, mimetype='text/event-stream')
+        response.headers['Retry-After'] = str(EVENT_RETRY_SECONDS)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: config-change\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            event_broker.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # 客户端在生成器开始执行前断开时 finally 不会执行，关闭响应时同样释放订阅名额
+    response.call_on_close(lambda: event_broker.unsubscribe(subscriber))
+    return response
+
+@app.route('/api/system-status')
+def system_status():
+    """获取系统状态（配置文件、磁盘、运行时间、YAML 后端与缓存）"""
+    try:
+        config_status = yaml_manager.get_config_status()
+        disk = shutil.disk_usage(HOMEPAGE_CONFIG_PATH)
+        uptime_minutes = int((time.time() - APP_START_TIME) // 60)
+        
+        return jsonify({
+            'status': 'success',
+            'system_status': {
+                'config_files': sum(1 for item in config_status.values() if item.get('exists')),
+                'disk_usage': f'{disk.used * 100 // disk.total}%' if disk.total else '0%',
+                'uptime': f'{uptime_minutes}分钟',
+                'yaml_backend': yaml_backend.get_backend_info(),
+                'cache': yaml_manager.get_cache_stats(),
+                'writes': yaml_manager.get_write_stats(),
+                'validator_cache': validator.get_cache_info(),
+                'backup_store': yaml_manager.backup_store.get_stats(),
+                'backup_retention': backup_pruner.get_status(),
+                'backup_diff_cache': config_differ.get_stats(),
+                'integrity_cache': integrity_checker.get_stats(),
+                'reference_index': reference_index.get_stats(),
+                'search_index': search_index.get_stats(),
+                'editor_validation': editor_validator.get_stats(),
+                'watcher': {'mode': config_watcher.mode, 'subscribers': event_broker.subscriber_count()}
+            }
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/api/backups/prune', methods=['POST'])
+def prune_backups():
+    """立即按保留策略清理备份"""
+    try:
+        report = backup_pruner.prune()
+        return jsonify({'success': True, 'message': f"已清理 {len(report['pruned'])} 个备份", 'report': report})
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'清理失败：{str(e)}'})
+
+@app.route('/api/clear-cache', methods=['POST'])
+def clear_cache():
+    """清理配置解析缓存"""
+    try:
+        cache_stats = yaml_manager.get_cache_stats()
+        yaml_manager.clear_cache()
+        return jsonify({'status': 'success', 'message': '配置缓存已清理', 'cache': cache_stats})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+# 恢复备份、导入配置时使用的验证函数
+CONFIG_VALIDATORS = {
+    'settings': validator.validate_settings,
+    'bookmarks': validator.validate_bookmarks,
+    'services': validator.validate_services,
+    'widgets': validator.validate_widgets,
+    'docker': validator.validate_docker
+}
+
+def validate_config_data(config_name, data):
+    """验证即将恢复或导入的配置，返回(验证结果, 错误信息)"""
+    validate = CONFIG_VALIDATORS.get(config_name)
+    return validate(data) if validate else (True, "验证通过")
+
+# 整体验证使用的验证函数：均报告全部错误，书签/服务使用增量验证
+integrity_checker = ConfigIntegrityChecker(yaml_manager, {
+    'settings': partial(validator.validate_all, 'settings'),
+    'bookmarks': incremental_validator.validate_bookmarks,
+    'services': incremental_validator.validate_services,
+    'widgets': partial(validator.validate_all, 'widgets'),
+    'docker': partial(validator.validate_all, 'docker')
+})
+
+@app.route('/api/validate-all-configs')
+def validate_all_configs():
+    """并行验证全部配置文件，返回每个文件的结果、耗时以及跨文件检查的问题"""
+    try:
+        report = integrity_checker.check()
+        return jsonify(dict(report, status='success'))
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/check-integrity')
+def check_integrity():
+    """配置完整性检查：汇总全部文件的错误和跨文件引用问题"""
+    try:
+        report = integrity_checker.check()
+        return jsonify({'status': 'success', 'issues': report['issues'], 'time_ms': report['time_ms']})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/api/restore', methods=['POST'])
 def restore_backup():
-    """恢复备份"""
+    """
+    恢复备份
+
+    可选参数: files 只恢复指定文件；items 为 {文件名: [[分组], [分组, 条目]]}，只恢复指定的分组/条目；
+    force 为 true 时跳过配置验证。与导入相同，If-Match 为客户端已知的各配置文件版本号，
+    被替换文件的当前版本不在其中时返回 409；If-Match: * 表示强制覆盖。
+    """
+    allowed_revisions, missing = get_request_revisions()
+    if missing:
+        return jsonify({'success': False, 'error': '恢复备份需要提供当前版本号（If-Match）'}), 428
     try:
         request_data = request.get_json()
         backup_name = request_data.get('backup_name')
         
         backup_path = yaml_manager.get_backup_path(backup_name)
-        success, restore_msg = yaml_manager.restore_configs(backup_path)
+        success, restore_msg = yaml_manager.restore_configs(
+            backup_path,
+            files=request_data.get('files'),
+            items=request_data.get('items'),
+            validate=None if request_data.get('force') else validate_config_data,
+            allowed_revisions=allowed_revisions
+        )
+        backup_pruner.wake()
         if success:
             return jsonify({'success': True, 'message': f'配置恢复成功：{restore_msg}'})
         else:
             return jsonify({'success': False, 'error': f'恢复失败：{restore_msg}'})
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'恢复异常：{str(e)}'})
 
+config_importer = ConfigImporter(yaml_manager, validate_config_data)
+
+@app.route('/api/import-configs', methods=['POST'])
+def import_configs():
+    """
+    导入配置归档（ZIP、tar 或 tar.gz），全部文件验证通过后整体替换
+
+    可以用 multipart 表单字段 config_file 上传，也可以直接以请求体上传（tar/tar.gz 边接收边解压）。
+    If-Match 为客户端已知的各配置文件版本号（可以有多个），归档中每个文件对应配置的当前版本都必须在其中，
+    否则返回 409；If-Match: * 表示强制覆盖。
+    """
+    allowed_revisions, missing = get_request_revisions()
+    if missing:
+        return jsonify({'status': 'error', 'message': '导入配置需要提供当前版本号（If-Match）'}), 428
+    try:
+        upload = request.files.get('config_file')
+        if upload is not None:
+            stream = upload.stream
+            head = stream.read(512)
+            stream.seek(0)
+        else:
+            stream = io.BufferedReader(request.stream)
+            head = stream.peek(512)[:512]
+        
+        archive_format = detect_archive_format(head)
+        if archive_format is None:
+            return jsonify({'status': 'error', 'message': '请上传 ZIP、tar 或 tar.gz 格式的配置归档'}), 400
+        
+        success, message, details = config_importer.import_archive(stream, archive_format, allowed_revisions)
+        backup_pruner.wake()
+        if success:
+            return jsonify({'status': 'success', 'message': message, **details})
+        return jsonify({'status': 'error', 'message': message, **details}), 400
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'导入异常：{str(e)}'}), 500
+
+def archive_response(entries, base_name: str):
+    """把文件列表以 ?format=zip|tar.gz 指定的格式作为分块流式响应返回，不生成临时文件"""
+    archive_format = request.args.get('format', 'zip')
+    if archive_format not in ARCHIVE_FORMATS:
+        return jsonify({'error': f'不支持的归档格式: {archive_format}'}), 400
+    mimetype, extension, _ = ARCHIVE_FORMATS[archive_format]
+    response = Response(stream_with_context(stream_archive(entries, archive_format)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{base_name}{extension}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/api/download/configs')
 def download_all_configs():
     """下载所有配置文件压缩包"""
     try:
-        zip_path = yaml_manager.create_config_zip()
-        return send_file(zip_path, as_attachment=True, download_name='homeman-configs.zip')
+        return archive_response(yaml_manager.get_config_archive_entries(), 'homeman-configs')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -638,6 +1217,7 @@ def download_all_configs():
 def download_single_config(config_name):
     """下载单个配置文件"""
     try:
+        yaml_manager.flush_writes()
         file_path = yaml_manager.get_config_file_path(config_name)
         if os.path.exists(file_path):
             return send_file(file_path, as_attachment=True, download_name=f'{config_name}.yaml')
@@ -650,12 +1230,26 @@ def download_single_config(config_name):
 def download_backup(backup_name):
     """下载备份文件"""
     try:
-        backup_path = yaml_manager.get_backup_path(backup_name)
-        if os.path.exists(backup_path):
-            zip_path = yaml_manager.create_backup_zip(backup_name)
-            return send_file(zip_path, as_attachment=True, download_name=f'{backup_name}.zip')
-        else:
+        entries = yaml_manager.get_backup_archive_entries([backup_name])
+        if entries is None:
             return jsonify({'error': '备份不存在'}), 404
+        return archive_response(entries, backup_name)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/download/backups')
+def download_backups():
+    """将多个备份打包下载：?name=a&name=b，每个备份位于归档中同名目录下"""
+    try:
+        backup_names = list(dict.fromkeys(request.args.getlist('name')))
+        if not backup_names:
+            return jsonify({'error': '请指定要下载的备份'}), 400
+        if len(backup_names) > MAX_ARCHIVE_BACKUPS:
+            return jsonify({'error': f'一次最多下载 {MAX_ARCHIVE_BACKUPS} 个备份'}), 400
+        entries = yaml_manager.get_backup_archive_entries(backup_names, nested=True)
+        if entries is None:
+            return jsonify({'error': '备份不存在'}), 404
+        return archive_response(entries, f'homeman-backups-{len(backup_names)}')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -680,15 +1274,21 @@ def load_yaml_content(config_name):
         if config_name not in yaml_manager.get_supported_config_types():
             return jsonify({'success': False, 'error': f'不支持的配置类型: {config_name}'}), 400
         
+        # 先取版本号再读内容：期间文件被修改时保存会返回冲突，而不是覆盖新内容
+        revision = yaml_manager.get_revision(config_name)
         content, error_msg = yaml_manager.load_raw_yaml_file(config_name)
         if error_msg:
             return jsonify({'success': False, 'error': error_msg}), 500
         
-        return jsonify({
+        response = jsonify({
             'success': True, 
             'content': content,
-            'config_name': config_name
+            'config_name': config_name,
+            'revision': revision
         })
+        response.set_etag(revision)
+        response.headers['X-Config-Name'] = config_name
+        return response
         
     except Exception as e:
         return jsonify({'success': False, 'error': f'加载失败: {str(e)}'}), 500
@@ -706,12 +1306,15 @@ def save_yaml_content(config_name):
         # 允许保存空文件，空文件在某些情况下是有意义的（如清空配置）
         
         # 保存文件
-        success, save_msg = yaml_manager.save_raw_yaml_file(config_name, content)
-        if success:
-            return jsonify({'success': True, 'message': save_msg})
-        else:
-            return jsonify({'success': False, 'error': save_msg}), 400
+        with config_write(config_name):
+            success, save_msg = yaml_manager.save_raw_yaml_file(config_name, content)
+            if success:
+                return with_revision(jsonify({'success': True, 'message': save_msg}), config_name)
+            else:
+                return jsonify({'success': False, 'error': save_msg}), 400
             
+    except RevisionConflictError as e:
+        return revision_conflict_response(e)
     except Exception as e:
         return jsonify({'success': False, 'error': f'保存失败: {str(e)}'}), 500
 
@@ -722,12 +1325,15 @@ def validate_yaml_content():
         request_data = request.get_json()
         content = request_data.get('content', '')
         
-        is_valid, error_msg = yaml_manager.validate_yaml_syntax(content)
+        # 按内容哈希缓存，只重新解析变化的顶层分组
+        result = editor_validator.check(content)
         
         return jsonify({
             'success': True,
-            'valid': is_valid,
-            'error': error_msg if not is_valid else None
+            'valid': result['valid'],
+            'error': result['error'],
+            'line': result['line'],
+            'column': result['column']
         })
         
     except Exception as e:
@@ -743,14 +1349,12 @@ def preview_yaml_config(config_name):
         request_data = request.get_json()
         content = request_data.get('content', '')
         
-        # 验证语法
-        is_valid, error_msg = yaml_manager.validate_yaml_syntax(content)
-        if not is_valid:
-            return jsonify({'success': False, 'error': error_msg}), 400
-        
-        # 解析配置
-        import yaml
-        parsed_data = yaml.safe_load(content)
+        # 验证语法与解析共用一次解析结果
+        result = editor_validator.check(content)
+        if not result['valid']:
+            return jsonify({'success': False, 'error': result['error'],
+                            'line': result['line'], 'column': result['column']}), 400
+        parsed_data = result['data']
         
         return jsonify({
             'success': True,
@@ -764,5 +1368,7 @@ def preview_yaml_config(config_name):
 if __name__ == '__main__':
     # 确保配置目录存在
     os.makedirs(HOMEPAGE_CONFIG_PATH, exist_ok=True)
+    start_background_tasks()
     
-    app.run(host='0.0.0.0', port=3100, debug=True) 
\ No newline at end of file
+    # 开发服务器，仅用于本地调试；生产环境请使用 gunicorn -c gunicorn.conf.py wsgi:app
+    app.run(host='0.0.0.0', port=3100, debug=os.getenv('FLASK_ENV', 'development') == 'development') 
\ No newline at end of file
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+HTTP 压测脚本
+
+分别启动 Werkzeug 开发服务器（python app.py）与 gunicorn（gunicorn.conf.py），
+用多个保持连接的客户端线程请求相同的接口，比较每秒请求数与延迟。
+两个服务器使用同一份临时生成的配置目录。
+
+用法:
+    python benchmarks/bench_http_load.py --clients 32 --duration 10 --workers 4
+    python benchmarks/bench_http_load.py --url http://127.0.0.1:3100   # 只压测已运行的服务
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT_DIR)
+
+from bench_yaml_backends import build_services
+from utils.yaml_manager import YamlManager
+
+DEFAULT_PATHS = '/api/stats,/api/config-status,/services'
+
+
+def prepare_config(entries):
+    """生成包含 entries 个服务的临时配置目录"""
+    config_dir = tempfile.mkdtemp(prefix='homeman-bench-')
+    manager = YamlManager(config_dir)
+    manager.save_services(build_services(entries))
+    manager.save_settings(manager.load_settings())
+    return config_dir
+
+
+def start_server(command, port, config_dir, extra_env=None):
+    """启动服务器进程并等待端口可用"""
+    env = dict(os.environ, HOMEPAGE_CONFIG_PATH=config_dir, **(extra_env or {}))
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/stats')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"服务器未能在 30 秒内启动: {' '.join(command)}")
+
+
+def stop_server(process):
+    """结束服务器进程组（开发服务器的 reloader 会启动子进程）"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def run_load(base_url, paths, clients, duration):
+    """并发压测，返回(请求数, 错误数, 耗时, 延迟列表)"""
+    parsed = urlparse(base_url)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        local_latencies = []
+        local_errors = 0
+        i = index
+        while time.perf_counter() < stop_at:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    local_errors += 1
+                # 服务端不支持 keep-alive 时重新建立连接
+                if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+            local_latencies.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], time.perf_counter() - start, sorted(latencies)
+
+
+def report(label, result):
+    count, errors, elapsed, latencies = result
+    if not latencies:
+        print(f"{label:<28} 无完成的请求")
+        return
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<28} {count / elapsed:10.1f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+          f"请求 {count}  错误 {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较开发服务器与 gunicorn 的吞吐量')
+    parser.add_argument('--url', help='只压测该地址上已运行的服务')
+    parser.add_argument('--paths', default=DEFAULT_PATHS, help='逗号分隔的请求路径')
+    parser.add_argument('--clients', type=int, default=32, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=10, help='每轮压测时长（秒）')
+    parser.add_argument('--warmup', type=float, default=2, help='正式压测前的预热时长（秒），让每个 worker 建好缓存')
+    parser.add_argument('--entries', type=int, default=500, help='生成的服务条目数')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker 数')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn 每个 worker 的线程数')
+    parser.add_argument('--dev-port', type=int, default=3101)
+    parser.add_argument('--prod-port', type=int, default=3102)
+    args = parser.parse_args()
+
+    paths = [path.strip() for path in args.paths.split(',') if path.strip()]
+
+    if args.url:
+        run_load(args.url, paths, args.clients, args.warmup)
+        report(args.url, run_load(args.url, paths, args.clients, args.duration))
+        return
+
+    config_dir = prepare_config(args.entries)
+    print(f"配置目录: {config_dir}  并发: {args.clients}  时长: {args.duration}s  路径: {', '.join(paths)}")
+
+    servers = [
+        ('开发服务器 (python app.py)', args.dev_port,
+         [sys.executable, '-c', f"import app; app.app.run(host='127.0.0.1', port={args.dev_port}, debug=True)"],
+         {}),
+        (f'gunicorn ({args.workers}x{args.threads})', args.prod_port,
+         [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+         {'HOMEMAN_BIND': f'127.0.0.1:{args.prod_port}', 'HOMEMAN_WORKERS': str(args.workers),
+          'HOMEMAN_THREADS': str(args.threads), 'HOMEMAN_ACCESS_LOG': '/dev/null'}),
+    ]
+    for label, port, command, extra_env in servers:
+        process = start_server(command, port, config_dir, extra_env)
+        try:
+            run_load(f'http://127.0.0.1:{port}', paths, args.clients, args.warmup)
+            report(label, run_load(f'http://127.0.0.1:{port}', paths, args.clients, args.duration))
+        finally:
+            stop_server(process)
+
+
+if __name__ == '__main__':
+    main()
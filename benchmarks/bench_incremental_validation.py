@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+增量验证性能对比脚本
+
+比较 ConfigValidator 全量验证与 IncrementalValidator 在修改单个服务后的验证耗时。
+
+用法:
+    python benchmarks/bench_incremental_validation.py --entries 10000
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_yaml_backends import build_services
+from utils.config_validator import ConfigValidator
+from utils.incremental_validator import IncrementalValidator
+
+
+def timed(func):
+    """执行一次并返回(结果, 耗时毫秒)"""
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较全量验证与增量验证的耗时')
+    parser.add_argument('--entries', type=int, default=10000, help='服务条目数')
+    args = parser.parse_args()
+
+    # 屏蔽验证过程中的日志输出
+    logging.disable(logging.WARNING)
+
+    validator = ConfigValidator()
+    incremental = IncrementalValidator(validator)
+    services = build_services(args.entries)
+
+    _, full_ms = timed(lambda: validator.validate_services(services))
+    _, cold_ms = timed(lambda: incremental.validate_services(services))
+    _, warm_ms = timed(lambda: incremental.validate_services(services))
+
+    # 保存请求中的配置是新解析的对象：复制一份并修改一个服务，分别验证整个文件与仅验证被修改的分组
+    services = pickle.loads(pickle.dumps(services))
+    group = services[len(services) // 2]
+    group_name = next(iter(group))
+    item = group[group_name][0]
+    item[next(iter(item))]['description'] = '已修改'
+    _, changed_full_ms = timed(lambda: incremental.validate_services(services))
+    group = pickle.loads(pickle.dumps(group))
+    item = group[group_name][0]
+    item[next(iter(item))]['description'] = '再次修改'
+    _, changed_group_ms = timed(lambda: incremental.validate_services([group], [len(services) // 2]))
+
+    print(f"服务条目数: {args.entries}")
+    print(f"ConfigValidator 全量验证:        {full_ms:10.3f} ms")
+    print(f"增量验证（冷缓存）:              {cold_ms:10.3f} ms")
+    print(f"增量验证（无变化）:              {warm_ms:10.3f} ms")
+    print(f"增量验证（修改一项，整个文件）:  {changed_full_ms:10.3f} ms")
+    print(f"增量验证（修改一项，仅所在分组）:{changed_group_ms:10.3f} ms")
+    print(f"缓存统计: {incremental.get_stats()}")
+
+
+if __name__ == '__main__':
+    main()
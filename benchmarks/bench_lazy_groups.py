@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+分组懒加载首屏耗时测试脚本
+
+在包含大量服务的临时配置目录上，比较服务管理页面完整渲染（?lazy=0）与分组懒加载（?lazy=1）
+的响应耗时和页面大小，以及通过分组分页接口加载下一页的耗时。
+
+用法:
+    python benchmarks/bench_lazy_groups.py --entries 2000 5000 20000
+"""
+
+import argparse
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_yaml_backends import build_services, best_of
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较服务页面完整渲染与分组懒加载的首屏耗时')
+    parser.add_argument('--entries', type=int, nargs='+', default=[2000, 5000, 20000], help='服务条目数')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数（取最短耗时）')
+    args = parser.parse_args()
+
+    config_dir = tempfile.mkdtemp(prefix='homeman-bench-')
+    os.environ['HOMEPAGE_CONFIG_PATH'] = config_dir
+    try:
+        import app as homeman
+        # 屏蔽应用导入时配置的日志输出
+        logging.disable(logging.WARNING)
+        client = homeman.app.test_client()
+
+        print(f"{'条目数':>8}{'完整渲染':>14}{'页面大小':>12}{'懒加载首屏':>14}{'页面大小':>12}{'下一页':>12}")
+        for entries in args.entries:
+            homeman.yaml_manager.save_services(build_services(entries))
+            full = client.get('/services?lazy=0')
+            lazy = client.get('/services?lazy=1')
+            cursor = re.search(rb'data-next-cursor="([^"]+)"', lazy.data).group(1).decode()
+
+            full_ms = best_of(lambda: client.get('/services?lazy=0'), args.repeat) * 1000
+            lazy_ms = best_of(lambda: client.get('/services?lazy=1'), args.repeat) * 1000
+            page_ms = best_of(lambda: client.get(f'/api/services/groups?cursor={cursor}&render=1'),
+                              args.repeat) * 1000
+            print(f"{entries:>8}{full_ms:>11.1f} ms{len(full.data) / 1024:>9.0f} KB"
+                  f"{lazy_ms:>11.1f} ms{len(lazy.data) / 1024:>9.0f} KB{page_ms:>9.1f} ms")
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+模式编译验证器耗时测试脚本
+
+测量 ConfigValidator（规则由 utils/config_schema.py 中的声明式模式编译为检查函数）
+对各类配置的全量验证耗时，以及平均每个条目的耗时。
+
+用法:
+    python benchmarks/bench_schema_validation.py --entries 10000
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_yaml_backends import build_services, best_of
+from utils.config_schema import WIDGET_TYPES
+from utils.config_validator import ConfigValidator
+
+
+SETTINGS = {
+    'title': 'Homepage', 'theme': 'dark', 'color': 'slate', 'headerStyle': 'boxed', 'language': 'zh-CN',
+    'target': '_blank', 'maxGroupColumns': 4, 'quicklaunch': {'provider': 'google'},
+    'hideVersion': True, 'background': {'image': 'https://example.com/bg.jpg'}
+}
+
+
+def build_bookmarks(entries: int, group_size: int = 50) -> list:
+    """生成包含 entries 个书签的合成 bookmarks 配置"""
+    groups = []
+    for group_index in range((entries + group_size - 1) // group_size):
+        items = []
+        for item_index in range(min(group_size, entries - group_index * group_size)):
+            number = group_index * group_size + item_index
+            items.append({f'书签 {number}': [{
+                'abbr': f'B{number % 10}',
+                'href': f'https://site-{number}.example.com/',
+                'description': f'合成书签 #{number}',
+                'target': '_blank'
+            }]})
+        groups.append({f'分组 {group_index}': items})
+    return groups
+
+
+def build_widgets(entries: int) -> dict:
+    """生成 entries 个小工具"""
+    return {f'widget-{number}': {
+        'type': WIDGET_TYPES[number % len(WIDGET_TYPES)],
+        'url': f'http://widget-{number}.example.com:8080/',
+        'refreshInterval': 10000,
+        'fields': ['status', 'uptime']
+    } for number in range(entries)}
+
+
+def build_docker(entries: int) -> dict:
+    """生成 entries 个 Docker 实例"""
+    return {f'docker-{number}': {
+        'host': f'10.0.{number // 256 % 256}.{number % 256}',
+        'port': 2375,
+        'showStats': True,
+        'tls': {'cert': 'cert.pem', 'key': 'key.pem', 'skipVerify': False}
+    } for number in range(entries)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量模式编译验证器的全量验证耗时')
+    parser.add_argument('--entries', type=int, default=10000, help='每种配置的条目数')
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数（取最短耗时）')
+    args = parser.parse_args()
+
+    # 屏蔽验证过程中的日志输出
+    logging.disable(logging.WARNING)
+
+    validator = ConfigValidator()
+    configs = [
+        ('settings', 'validate_settings', SETTINGS, 1),
+        ('services', 'validate_services', build_services(args.entries), args.entries),
+        ('bookmarks', 'validate_bookmarks', build_bookmarks(args.entries), args.entries),
+        ('widgets', 'validate_widgets', build_widgets(args.entries), args.entries),
+        ('docker', 'validate_docker', build_docker(args.entries), args.entries),
+    ]
+
+    print(f"条目数: {args.entries}（取 {args.repeat} 次中的最短耗时）")
+    print(f"{'配置':<10}{'验证结论':>10}{'全量验证':>14}{'每个条目':>14}")
+    for config_name, method, data, count in configs:
+        is_valid, message = getattr(validator, method)(data)
+        elapsed_ms = best_of(lambda: getattr(validator, method)(data), args.repeat) * 1000
+        print(f"{config_name:<10}{'通过' if is_valid else '失败':>10}{elapsed_ms:>11.3f} ms{elapsed_ms * 1000 / count:>11.2f} us")
+        if not is_valid:
+            print(f"  {message}")
+
+if __name__ == '__main__':
+    main()
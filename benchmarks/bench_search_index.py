@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+全文搜索索引性能测试脚本
+
+在包含大量服务的临时配置目录上建立搜索索引，测量各类查询（完全匹配、前缀、模糊、中文）的耗时，
+以及保存修改了一个服务的配置后增量更新索引的耗时。
+
+用法:
+    python benchmarks/bench_search_index.py --entries 50000
+"""
+
+import argparse
+import copy
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_yaml_backends import build_services, best_of
+from utils.search_index import SearchIndex
+from utils.yaml_manager import YamlManager
+
+QUERIES = ['服务 123', 'host-4999', '4999', 'mdi-serv', 'exmaple', '分组 3 服务', '1']
+
+
+def timed(func):
+    """执行一次并返回(结果, 耗时毫秒)"""
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量全文搜索索引的建立、查询与增量更新耗时')
+    parser.add_argument('--entries', type=int, default=50000, help='服务条目数')
+    parser.add_argument('--repeat', type=int, default=20, help='每个查询的重复次数（取最短耗时）')
+    args = parser.parse_args()
+
+    # 屏蔽保存和加载过程中的日志输出
+    logging.disable(logging.WARNING)
+
+    config_dir = tempfile.mkdtemp(prefix='homeman-bench-')
+    try:
+        manager = YamlManager(config_dir)
+        services = build_services(args.entries)
+        manager.save_services(services)
+        index = SearchIndex(manager)
+
+        # 首次查询时建立索引
+        _, build_ms = timed(lambda: index.search('warmup'))
+        print(f"服务条目数: {args.entries}")
+        print(f"建立索引: {build_ms:10.3f} ms  {index.get_stats()}")
+
+        for query in QUERIES:
+            result = index.search(query, limit=20)
+            query_ms = best_of(lambda: index.search(query, limit=20), args.repeat) * 1000
+            print(f"查询 {query!r:14} {query_ms:8.3f} ms  匹配 {result['total']}")
+
+        # 修改一个服务后保存，监听器只为变化的分组重新建立索引
+        changed = copy.deepcopy(services)
+        group = changed[len(changed) // 2]
+        item = group[next(iter(group))][0]
+        item[next(iter(item))]['description'] = 'Plex 媒体服务器'
+        indexed_before = index.get_stats()['indexed']
+        _, update_ms = timed(lambda: index._on_change('services', changed))
+        print(f"增量更新（修改一个服务）: {update_ms:10.3f} ms  "
+              f"重新索引 {index.get_stats()['indexed'] - indexed_before} 个条目")
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+URL/图标验证微基准
+
+比较旧实现（每次调用编译 URL 正则、图标依次匹配四个正则）与
+ConfigValidator 当前实现（类级别预编译 + 合并正则 + LRU 缓存）的耗时，
+并确认两者判定结果一致。
+
+用法:
+    python benchmarks/bench_url_validation.py --count 100000 --unique 20000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.config_validator import ConfigValidator
+
+
+def legacy_validate_url(url):
+    """旧实现：每次调用重新编译正则"""
+    if not url:
+        return True
+    url_pattern = re.compile(
+        r'^https?://'
+        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
+        r'localhost|'
+        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+        r'(?::\d+)?'
+        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+    if url.startswith('/'):
+        return True
+    return bool(url_pattern.match(url))
+
+
+def legacy_validate_icon(icon):
+    """旧实现：四个未预编译的正则依次匹配"""
+    if not icon:
+        return True
+    if re.match(r'^[a-zA-Z0-9_-]+\.(png|jpg|jpeg|gif|svg|webp)$', icon):
+        return True
+    if re.match(r'^mdi-[a-zA-Z0-9_-]+(\-#[a-fA-F0-9]{6})?$', icon):
+        return True
+    if re.match(r'^si-[a-zA-Z0-9_-]+(\-#[a-fA-F0-9]{6})?$', icon):
+        return True
+    if re.match(r'^sh-[a-zA-Z0-9_-]+(\.(svg|png|webp))?$', icon):
+        return True
+    if legacy_validate_url(icon):
+        return True
+    if icon.startswith('/icons/'):
+        return True
+    return False
+
+
+def build_samples(count, unique):
+    """生成 count 个样本，其中约 unique 个互不相同（模拟备份/导入中重复出现的链接）"""
+    urls = []
+    icons = []
+    for i in range(unique):
+        urls.append(random.choice([
+            f'https://service-{i}.example.com/path/{i}',
+            f'http://192.168.{i % 256}.{i % 200}:{8000 + i % 1000}/',
+            f'/local/path/{i}',
+            f'not a url {i}',
+        ]))
+        icons.append(random.choice([
+            f'icon-{i}.png', f'mdi-server-{i}', f'si-github-#{i % 0xffffff:06x}',
+            f'sh-app-{i}.svg', f'https://cdn.example.com/{i}.png', f'/icons/{i}.svg', f'bad icon {i}',
+        ]))
+    return [random.choice(urls) for _ in range(count)], [random.choice(icons) for _ in range(count)]
+
+
+def bench(label, func, samples):
+    start = time.perf_counter()
+    results = [func(value) for value in samples]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms  ({elapsed / len(samples) * 1e6:.2f} us/次)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='URL/图标验证微基准')
+    parser.add_argument('--count', type=int, default=100000, help='验证次数')
+    parser.add_argument('--unique', type=int, default=20000, help='不同取值的数量')
+    args = parser.parse_args()
+
+    random.seed(42)
+    urls, icons = build_samples(args.count, args.unique)
+    validator = ConfigValidator()
+
+    legacy_urls = bench('URL 旧实现', legacy_validate_url, urls)
+    current_urls = bench('URL 当前实现', validator._validate_url, urls)
+    legacy_icons = bench('图标 旧实现', legacy_validate_icon, icons)
+    current_icons = bench('图标 当前实现', validator._validate_icon, icons)
+
+    assert legacy_urls == current_urls, 'URL 判定结果不一致'
+    assert legacy_icons == current_icons, '图标判定结果不一致'
+    print(f"判定结果一致，缓存统计: {validator.get_cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
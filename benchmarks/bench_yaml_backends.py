@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+YAML 后端性能对比脚本
+
+在合成的 services 配置上比较 libyaml C 加速后端与纯 Python 后端的解析/序列化耗时。
+
+用法:
+    python benchmarks/bench_yaml_backends.py
+    python benchmarks/bench_yaml_backends.py --sizes 1000,10000 --repeat 5
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.yaml_backend import available_backends
+
+DUMP_OPTIONS = dict(default_flow_style=False, allow_unicode=True, indent=2, sort_keys=False)
+
+
+def build_services(entries: int, group_size: int = 50) -> list:
+    """生成包含 entries 个服务的合成 services 配置"""
+    groups = []
+    for group_index in range((entries + group_size - 1) // group_size):
+        items = []
+        for item_index in range(min(group_size, entries - group_index * group_size)):
+            number = group_index * group_size + item_index
+            items.append({
+                f'服务 {number}': {
+                    'href': f'http://host-{number}.example.com:8080/',
+                    'description': f'合成服务 #{number}',
+                    'icon': f'mdi-server-{number % 7}',
+                    'siteMonitor': f'http://host-{number}.example.com:8080/health',
+                    'server': 'my-docker',
+                    'container': f'container-{number}',
+                    'showStats': number % 2 == 0
+                }
+            })
+        groups.append({f'分组 {group_index}': items})
+    return groups
+
+
+def best_of(func, repeat: int) -> float:
+    """多次运行取最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较 YAML 后端的解析与序列化性能')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='逗号分隔的服务条目数')
+    parser.add_argument('--repeat', type=int, default=3, help='每项测试重复次数')
+    args = parser.parse_args()
+
+    backends = available_backends()
+    # 统一使用纯 Python 后端生成输入，保证各后端解析同一份文本
+    reference = backends['python']
+
+    print(f"可用后端: {', '.join(backends)}")
+    print(f"{'条目数':>8} {'大小':>10} {'后端':>8} {'解析(s)':>10} {'序列化(s)':>10}")
+
+    for size in [int(value) for value in args.sizes.split(',') if value.strip()]:
+        data = build_services(size)
+        text = reference.dump(data, **DUMP_OPTIONS)
+        size_label = f'{len(text.encode("utf-8")) / 1024 / 1024:.1f}MB'
+
+        results = {}
+        for name, backend in backends.items():
+            load_time = best_of(lambda: backend.safe_load(text), args.repeat)
+            dump_time = best_of(lambda: backend.dump(data, io.StringIO(), **DUMP_OPTIONS), args.repeat)
+            results[name] = (load_time, dump_time)
+            print(f"{size:>8} {size_label:>10} {name:>8} {load_time:>10.3f} {dump_time:>10.3f}")
+
+        if 'libyaml' in results:
+            python_load, python_dump = results['python']
+            c_load, c_dump = results['libyaml']
+            print(f"{'':>8} {'':>10} {'加速比':>8} {python_load / c_load:>9.1f}x {python_dump / c_dump:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Gunicorn 生产环境配置
+
+所有参数均可通过环境变量覆盖，平滑重载: kill -HUP <master pid>
+（master 先启动新 worker，旧 worker 处理完当前请求后退出）。
+"""
+
+import os
+import multiprocessing
+
+# 监听地址
+bind = os.getenv('HOMEMAN_BIND', '0.0.0.0:3100')
+
+# worker 进程数与每个进程的线程数；/api/events 长连接各占用一个线程，
+# 每个进程最多 HOMEMAN_MAX_EVENT_SUBSCRIBERS 个（默认线程数的一半）
+workers = int(os.getenv('HOMEMAN_WORKERS', str(min(multiprocessing.cpu_count() * 2 + 1, 4))))
+threads = int(os.getenv('HOMEMAN_THREADS', '8'))
+worker_class = 'gthread'
+
+# HTTP keep-alive 保持时间（秒）
+keepalive = int(os.getenv('HOMEMAN_KEEPALIVE', '5'))
+
+# 请求超时与平滑重载/退出时等待 worker 完成请求的时间（秒）
+timeout = int(os.getenv('HOMEMAN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('HOMEMAN_GRACEFUL_TIMEOUT', '30'))
+
+# 不预加载应用：每个 worker 各自初始化 YamlManager，避免 fork 后共享锁和线程
+preload_app = False
+
+# 日志输出到标准输出/错误，便于容器收集
+accesslog = os.getenv('HOMEMAN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('HOMEMAN_LOG_LEVEL', 'info')
+
+# 写入合并队列保存在各 worker 进程内存中，其他 worker 读不到尚未落盘的数据，
+# 因此多 worker 时通过 raw_env 为 worker 关闭写入合并，保证所有 worker 看到一致的配置。
+# 默认 worker 数 min(2×CPU+1, 4) 至少为 3，即默认的生产配置下写入合并总是关闭的；
+# 需要写入合并时设置 HOMEMAN_WORKERS=1（可以增大 HOMEMAN_THREADS）。
+coalesce_disabled = workers > 1 and os.getenv('HOMEMAN_WRITE_COALESCE_MS', '0') != '0'
+raw_env = ['HOMEMAN_WRITE_COALESCE_MS=0'] if coalesce_disabled else []
+
+
+def on_starting(server):
+    if coalesce_disabled:
+        server.log.warning("HOMEMAN_WRITE_COALESCE_MS is ignored with %d workers; "
+                           "set HOMEMAN_WORKERS=1 to enable write coalescing", workers)
+
+
+def on_reload(server):
+    server.log.info("Reloading Homeman workers gracefully")
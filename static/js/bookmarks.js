@@ -8,6 +8,8 @@ let bookmarksData = [];
 let currentEditingGroup = null;
 let currentEditingBookmark = null;
 let isMultiSelectMode = false;
+// 分组懒加载器（页面完整渲染时为 null）
+let lazyGroups = null;
 
 // 等待所有脚本加载完成后再初始化
 function initBookmarksPage() {
@@ -31,6 +33,17 @@ function initBookmarksPage() {
     // 设置全局变量
     window.bookmarksData = bookmarksData;
     
+    // 条目较多时页面只渲染了首页分组，其余分组滚动到可见区域时加载
+    lazyGroups = lazyGroups || LazyGroups.create({
+        container: document.getElementById('bookmarks-container'),
+        getData: () => bookmarksData,
+        onGroupRendered: group => {
+            if (window.Sortable) {
+                group.querySelectorAll('.bookmark-items').forEach(initializeBookmarkSortable);
+            }
+        }
+    });
+    
     // 延迟初始化拖拽功能，确保DOM完全渲染
     setTimeout(() => {
         if (window.Sortable) {
@@ -65,30 +78,33 @@ function initializeDragAndDrop() {
     }
 
     // 书签拖拽排序和移动
-    document.querySelectorAll('.bookmark-items').forEach(container => {
-        Sortable.create(container, {
-            group: 'bookmarks',
-            handle: '.bookmark-title-area',
-            animation: 150,
-            onEnd: function(evt) {
-                const oldGroupName = evt.from.dataset.group;
-                const newGroupName = evt.to.dataset.group;
-                
-                const oldGroupIndex = bookmarksData.findIndex(g => Object.keys(g)[0] === oldGroupName);
-                const newGroupIndex = bookmarksData.findIndex(g => Object.keys(g)[0] === newGroupName);
-                
-                if (oldGroupIndex !== -1 && newGroupIndex !== -1) {
-                    const bookmark = bookmarksData[oldGroupIndex][oldGroupName].splice(evt.oldIndex, 1)[0];
-                    bookmarksData[newGroupIndex][newGroupName].splice(evt.newIndex, 0, bookmark);
-                    saveBookmarksWithoutReload();
-                }
-            }
-        });
-    });
+    document.querySelectorAll('.bookmark-items').forEach(initializeBookmarkSortable);
     
     console.log('Drag and drop initialized successfully');
 }
 
+// 单个分组内的书签拖拽排序和移动（懒加载的分组插入页面后单独初始化）
+function initializeBookmarkSortable(container) {
+    Sortable.create(container, {
+        group: 'bookmarks',
+        handle: '.bookmark-title-area',
+        animation: 150,
+        onEnd: function(evt) {
+            const oldGroupName = evt.from.dataset.group;
+            const newGroupName = evt.to.dataset.group;
+            
+            const oldGroupIndex = bookmarksData.findIndex(g => Object.keys(g)[0] === oldGroupName);
+            const newGroupIndex = bookmarksData.findIndex(g => Object.keys(g)[0] === newGroupName);
+            
+            if (oldGroupIndex !== -1 && newGroupIndex !== -1) {
+                const bookmark = bookmarksData[oldGroupIndex][oldGroupName].splice(evt.oldIndex, 1)[0];
+                bookmarksData[newGroupIndex][newGroupName].splice(evt.newIndex, 0, bookmark);
+                saveBookmarksWithoutReload();
+            }
+        }
+    });
+}
+
 // 显示提示消息的简化版本
 function showMessage(message, type = 'info') {
     // 优先使用全局函数
@@ -652,15 +668,16 @@ function deleteSelected() {
     }
 }
 
-// 保存功能
+// 保存功能（懒加载模式下先加载剩余分组，避免保存时丢失）
 function saveBookmarks() {
-    fetch('/bookmarks', {
+    LazyGroups.ensureAllLoaded(lazyGroups)
+    .then(() => fetch('/bookmarks', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
         body: JSON.stringify(bookmarksData)
-    })
+    }))
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
@@ -677,13 +694,14 @@ function saveBookmarks() {
 
 // 保存但不刷新页面
 function saveBookmarksWithoutReload() {
-    return fetch('/bookmarks', {
+    return LazyGroups.ensureAllLoaded(lazyGroups)
+    .then(() => fetch('/bookmarks', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
         body: JSON.stringify(bookmarksData)
-    })
+    }))
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
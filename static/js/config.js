@@ -28,8 +28,15 @@ document.addEventListener('DOMContentLoaded', function() {
     // 加载备份列表
     loadBackupList();
     
-    // 设置定时刷新状态
-    setInterval(refreshConfigStatus, 30000);
+    // 配置变化时由服务端推送状态，不支持 EventSource 时回退为定时刷新
+    const subscribed = subscribeConfigEvents(function(event) {
+        configStatus = event.config_status || {};
+        window.configStatus = configStatus;
+        updateConfigStatusDisplay();
+    });
+    if (!subscribed) {
+        setInterval(refreshConfigStatus, 30000);
+    }
 });
 
 // 加载备份列表
@@ -354,8 +361,8 @@ function exportAllConfigs() {
 
 // 导入配置
 function importConfigs(file) {
-    if (!file || !file.name.endsWith('.tar.gz')) {
-        showError('请选择有效的配置文件（.tar.gz格式）');
+    if (!file || !/\.(zip|tar|tar\.gz|tgz)$/.test(file.name)) {
+        showError('请选择有效的配置文件（.zip、.tar 或 .tar.gz 格式）');
         return;
     }
     
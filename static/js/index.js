@@ -29,8 +29,18 @@ document.addEventListener('DOMContentLoaded', function() {
     // 初始化图表
     initializeCharts();
     
-    // 设置定时刷新
-    setInterval(refreshStats, 60000);
+    // 配置变化时由服务端推送统计，不支持 EventSource 时回退为定时刷新
+    const subscribed = subscribeConfigEvents(function(event) {
+        statsData = event.stats || {};
+        window.statsData = statsData;
+        updateStatsDisplay();
+        updateCharts();
+        updateConfigFileStatus(event.config_status || {});
+    });
+    if (!subscribed) {
+        setInterval(refreshStats, 60000);
+        setInterval(checkSystemStatus, 300000); // 5分钟检查一次系统状态
+    }
     
     // 初始化快捷操作
     initializeQuickActions();
@@ -371,13 +381,16 @@ function restoreQuickBackup(backupName) {
 }
 
 // 检查系统状态
+// 最近一次获取的系统状态，配置变更事件只更新其中的配置文件数
+let systemStatus = null;
+
 function checkSystemStatus() {
     fetch('/api/system-status')
         .then(response => response.json())
         .then(data => {
             if (data.status === 'success') {
-                const status = data.system_status || {};
-                updateSystemStatusDisplay(status);
+                systemStatus = data.system_status || {};
+                updateSystemStatusDisplay(systemStatus);
             }
         })
         .catch(error => {
@@ -385,6 +398,15 @@ function checkSystemStatus() {
         });
 }
 
+// 根据事件携带的配置文件状态更新系统状态显示，无需再请求 /api/system-status
+function updateConfigFileStatus(configStatus) {
+    if (!systemStatus) {
+        return;
+    }
+    systemStatus.config_files = Object.values(configStatus).filter(item => item.exists).length;
+    updateSystemStatusDisplay(systemStatus);
+}
+
 // 更新系统状态显示
 function updateSystemStatusDisplay(status) {
     const statusElement = document.getElementById('system-status');
@@ -455,9 +477,6 @@ window.addEventListener('load', function() {
     
     // 初始化帮助内容
     initializeHelp();
-    
-    // 设置定时任务
-    setInterval(checkSystemStatus, 300000); // 5分钟检查一次系统状态
 });
 
 // 页面可见性变化处理
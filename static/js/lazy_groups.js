@@ -0,0 +1,195 @@
+/**
+ * 分组懒加载
+ * 服务/书签条目较多时页面只渲染首页分组，其余分组在滚动到可见区域时通过
+ * /api/<config>/groups 分页加载；保存前先加载剩余分组，避免整体保存时丢失未加载的分组
+ */
+
+// 保存前一次性加载剩余分组时每页的分组数（不渲染 HTML）
+const LAZY_GROUPS_FETCH_ALL_LIMIT = 500;
+
+// 分组在数据中的标识：正常分组为条目数组，格式无效的分组为原始内容本身
+function groupKey(group) {
+    return group !== null && typeof group === 'object' && !Array.isArray(group) && Object.keys(group).length === 1
+        ? Object.values(group)[0]
+        : group;
+}
+
+class LazyGroupLoader {
+    /**
+     * @param {Object} options
+     * @param {HTMLElement} options.sentinel 页面上的 #lazy-groups-sentinel 元素
+     * @param {HTMLElement} options.container 分组容器
+     * @param {Function} options.getData 返回页面当前的分组数据数组（会被原地插入新分组）
+     * @param {Function} [options.onGroupRendered] 新分组插入页面后的回调，参数为分组元素
+     */
+    constructor(options) {
+        this.sentinel = options.sentinel;
+        this.container = options.container;
+        this.getData = options.getData;
+        this.onGroupRendered = options.onGroupRendered || function() {};
+        this.configName = this.sentinel.dataset.config;
+        this.cursor = this.sentinel.dataset.nextCursor || null;
+        this.busy = null;
+        this.error = null;
+        this.observer = null;
+
+        // 已加载分组的条目数组：分组改名时条目数组不变，用于定位后续分组的插入位置；
+        // 格式无效的分组以原始内容保留在数据中，记录其本身
+        this.loadedItems = new Set(this.getData().map(group => groupKey(group)));
+    }
+
+    start() {
+        if (!this.cursor) {
+            this.finish();
+            return this;
+        }
+        if (window.IntersectionObserver) {
+            this.observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    this.loadNext();
+                }
+            }, { rootMargin: '400px 0px' });
+            this.observer.observe(this.sentinel);
+        } else {
+            this.ensureAllLoaded().catch(() => {});
+        }
+        return this;
+    }
+
+    fetchPage(render) {
+        const params = new URLSearchParams({ cursor: this.cursor, render: render ? '1' : '0' });
+        if (!render) {
+            params.set('limit', String(LAZY_GROUPS_FETCH_ALL_LIMIT));
+        }
+        return fetch(`/api/${this.configName}/groups?${params}`)
+            .then(response => response.json().then(data => {
+                if (!response.ok || !data.success) {
+                    throw new Error(data.error || data.message || `HTTP ${response.status}`);
+                }
+                return data;
+            }));
+    }
+
+    // 把分组插入到最后一个已加载分组之后（其后可能是本地新建、尚未保存的分组）
+    appendGroups(groups) {
+        const data = this.getData();
+        let position = 0;
+        for (let i = data.length - 1; i >= 0; i--) {
+            if (this.loadedItems.has(groupKey(data[i]))) {
+                position = i + 1;
+                break;
+            }
+        }
+
+        // 格式无效的分组（name 为 null）不渲染，但原样保留在数据中，整体保存时由服务端验证报错，
+        // 而不是从配置中被静默删除
+        const loaded = groups.map(group => group.name !== null ? { [group.name]: group.items } : group.raw);
+        data.splice(position, 0, ...loaded);
+        loaded.forEach(group => this.loadedItems.add(groupKey(group)));
+        groups.forEach(group => {
+            if (group.name !== null && group.html) {
+                this.container.insertAdjacentHTML('beforeend', group.html);
+                this.onGroupRendered(this.container.lastElementChild);
+            }
+        });
+    }
+
+    // 加载下一页（带 HTML）；加载完成后哨兵仍可见时继续加载
+    loadNext() {
+        if (this.busy || this.error || !this.cursor) {
+            return this.busy || Promise.resolve();
+        }
+        const busy = this.fetchPage(true)
+            .then(data => {
+                this.appendGroups(data.groups);
+                this.cursor = data.next_cursor;
+            })
+            .catch(error => this.fail(error))
+            .finally(() => {
+                if (this.busy === busy) {
+                    this.busy = null;
+                }
+                if (!this.cursor) {
+                    this.finish();
+                } else if (this.observer && !this.error) {
+                    // 重新观察会立即回调一次，哨兵仍在可见区域内时继续加载
+                    this.observer.unobserve(this.sentinel);
+                    this.observer.observe(this.sentinel);
+                }
+            });
+        this.busy = busy;
+        return busy;
+    }
+
+    /**
+     * 加载全部剩余分组的数据（不渲染 HTML），保存整个列表前调用
+     * 分组加载失败（如配置已在其他地方被修改）时拒绝，调用方应中止保存
+     */
+    ensureAllLoaded() {
+        const loadRest = () => {
+            if (this.error) {
+                throw new Error('部分分组加载失败，请刷新页面后再保存');
+            }
+            if (!this.cursor) {
+                this.finish();
+                return;
+            }
+            return this.fetchPage(false).then(data => {
+                this.appendGroups(data.groups);
+                this.cursor = data.next_cursor;
+                return loadRest();
+            });
+        };
+
+        const busy = (this.busy || Promise.resolve())
+            .then(loadRest)
+            .catch(error => {
+                this.fail(error);
+                throw error;
+            })
+            .finally(() => {
+                if (this.busy === busy) {
+                    this.busy = null;
+                }
+            });
+        this.busy = busy;
+        return busy;
+    }
+
+    fail(error) {
+        console.error('Failed to load groups:', error);
+        if (!this.error) {
+            this.error = error;
+            if (this.observer) {
+                this.observer.disconnect();
+            }
+            this.sentinel.innerHTML = '<i class="fas fa-exclamation-triangle"></i> 分组加载失败，请刷新页面';
+        }
+    }
+
+    finish() {
+        if (this.observer) {
+            this.observer.disconnect();
+            this.observer = null;
+        }
+        this.sentinel.remove();
+    }
+}
+
+window.LazyGroups = {
+    /**
+     * 页面存在 #lazy-groups-sentinel 时创建并启动加载器，否则返回 null（页面已完整渲染）
+     */
+    create: function(options) {
+        const sentinel = document.getElementById('lazy-groups-sentinel');
+        if (!sentinel) {
+            return null;
+        }
+        return new LazyGroupLoader(Object.assign({ sentinel: sentinel }, options)).start();
+    },
+
+    // 保存前加载剩余分组；loader 为 null 时直接继续
+    ensureAllLoaded: function(loader) {
+        return loader ? loader.ensureAllLoaded() : Promise.resolve();
+    }
+};
@@ -6,6 +6,8 @@
 // ===== 全局配置 =====
 window.HomemanApp = {
     initialized: false,
+    // 各配置文件的当前版本号，由页面模板注入
+    revisions: {},
     
     // 初始化应用
     init: function() {
@@ -227,6 +229,124 @@ function clearInputError(input) {
     }
 }
 
+// ===== 配置版本号 =====
+// 写入配置的接口及其对应的配置名，保存时自动附带 If-Match，避免覆盖他人的修改
+const CONFIG_WRITE_ROUTES = [
+    [/^\/bookmarks$/, 'bookmarks'],
+    [/^\/api\/services(\/group)?$/, 'services'],
+    [/^\/api\/widgets$/, 'widgets'],
+    [/^\/api\/docker$/, 'docker'],
+    [/^\/api\/config\/(\w+)$/, 1],
+    [/^\/api\/yaml\/save\/(\w+)$/, 1]
+];
+
+// 一次写入多个配置的接口（导入归档、恢复备份），If-Match 附带全部已知配置的版本号
+const MULTI_CONFIG_WRITE_ROUTES = [/^\/api\/import-configs$/, /^\/api\/restore$/];
+
+function isMultiConfigWrite(url, method) {
+    if (!method || method.toUpperCase() === 'GET') return false;
+    const path = new URL(url, window.location.origin).pathname;
+    return MULTI_CONFIG_WRITE_ROUTES.some(pattern => pattern.test(path));
+}
+
+function getWriteConfigName(url, method) {
+    if (!method || method.toUpperCase() === 'GET') return null;
+    const path = new URL(url, window.location.origin).pathname;
+    for (const [pattern, name] of CONFIG_WRITE_ROUTES) {
+        const match = path.match(pattern);
+        if (match) {
+            return typeof name === 'number' ? match[name] : name;
+        }
+    }
+    return null;
+}
+
+const originalFetch = window.fetch.bind(window);
+window.fetch = function(input, init) {
+    init = init || {};
+    const url = typeof input === 'string' ? input : input.url;
+    const method = init.method || (typeof input === 'string' ? 'GET' : input.method);
+    const configName = getWriteConfigName(url, method);
+    const revisions = window.HomemanApp.revisions || {};
+
+    let ifMatch = null;
+    if (configName && revisions[configName]) {
+        ifMatch = `"${revisions[configName]}"`;
+    } else if (isMultiConfigWrite(url, method) && Object.keys(revisions).length) {
+        ifMatch = Object.values(revisions).map(revision => `"${revision}"`).join(', ');
+    }
+    if (ifMatch) {
+        const headers = new Headers(init.headers || {});
+        if (!headers.has('If-Match')) {
+            headers.set('If-Match', ifMatch);
+        }
+        init = Object.assign({}, init, { headers: headers });
+    }
+
+    return originalFetch(input, init).then(response => {
+        // 加载或保存配置后，服务端通过 ETag 返回最新版本号
+        const responseConfig = response.headers.get('X-Config-Name');
+        const etag = response.headers.get('ETag');
+        if (responseConfig && etag && response.ok) {
+            window.HomemanApp.revisions = Object.assign({}, window.HomemanApp.revisions, {
+                [responseConfig]: etag.replace(/^W\//, '').replace(/"/g, '')
+            });
+        }
+        if (response.status === 409) {
+            showWarning('配置已在其他地方被修改，请刷新页面后重试');
+        }
+        return response;
+    });
+};
+
+// 配置变更事件订阅（Server-Sent Events），同一页面共用一个连接
+let configEventSource = null;
+const configEventHandlers = [];
+// 服务端订阅数已满（503）时浏览器不会自动重连，按该间隔重新连接
+const CONFIG_EVENTS_RECONNECT_MS = 30000;
+
+function connectConfigEvents() {
+    configEventSource = new EventSource('/api/events');
+    configEventSource.addEventListener('config-change', function(event) {
+        let data;
+        try {
+            data = JSON.parse(event.data);
+        } catch (e) {
+            console.error('Failed to parse config event:', e);
+            return;
+        }
+        configEventHandlers.forEach(handler => {
+            try {
+                handler(data);
+            } catch (e) {
+                console.error('Failed to handle config event:', e);
+            }
+        });
+    });
+    configEventSource.onerror = function() {
+        if (configEventSource.readyState === EventSource.CLOSED) {
+            console.warn('Config event stream rejected, retrying later...');
+            configEventSource.close();
+            setTimeout(connectConfigEvents, CONFIG_EVENTS_RECONNECT_MS);
+        } else {
+            // 连接断开后浏览器会按服务端的 retry 间隔自动重连
+            console.warn('Config event stream disconnected, reconnecting...');
+        }
+    };
+}
+
+function subscribeConfigEvents(handler) {
+    if (!window.EventSource) {
+        return false;
+    }
+
+    configEventHandlers.push(handler);
+    if (!configEventSource) {
+        connectConfigEvents();
+    }
+    return true;
+}
+
 // ===== 自动初始化 =====
 // 当脚本加载完成后自动初始化
 if (document.readyState === 'loading') {
@@ -7,6 +7,8 @@
 let servicesData = [];
 let currentEditingGroup = null;
 let currentEditingService = null;
+// 分组懒加载器（页面完整渲染时为 null）
+let lazyGroups = null;
 
 // 页面初始化
 document.addEventListener('DOMContentLoaded', function() {
@@ -26,6 +28,17 @@ document.addEventListener('DOMContentLoaded', function() {
     // 设置全局变量
     window.servicesData = servicesData;
     
+    // 条目较多时页面只渲染了首页分组，其余分组滚动到可见区域时加载
+    lazyGroups = LazyGroups.create({
+        container: document.getElementById('services-container'),
+        getData: () => servicesData,
+        onGroupRendered: group => {
+            if (window.Sortable) {
+                group.querySelectorAll('.service-items').forEach(initializeServiceSortable);
+            }
+        }
+    });
+    
     // 初始化拖拽功能
     setTimeout(() => {
         if (window.Sortable) {
@@ -56,24 +69,27 @@ function initializeDragAndDrop() {
     }
 
     // 服务拖拽排序
-    document.querySelectorAll('.service-items').forEach(container => {
-        Sortable.create(container, {
-            group: 'services',
-            animation: 150,
-            onEnd: function(evt) {
-                const oldGroupName = evt.from.dataset.group;
-                const newGroupName = evt.to.dataset.group;
-                
-                const oldGroupIndex = servicesData.findIndex(g => Object.keys(g)[0] === oldGroupName);
-                const newGroupIndex = servicesData.findIndex(g => Object.keys(g)[0] === newGroupName);
-                
-                if (oldGroupIndex !== -1 && newGroupIndex !== -1) {
-                    const service = servicesData[oldGroupIndex][oldGroupName].splice(evt.oldIndex, 1)[0];
-                    servicesData[newGroupIndex][newGroupName].splice(evt.newIndex, 0, service);
-                    saveServicesWithoutReload();
-                }
+    document.querySelectorAll('.service-items').forEach(initializeServiceSortable);
+}
+
+// 单个分组内的服务拖拽排序（懒加载的分组插入页面后单独初始化）
+function initializeServiceSortable(container) {
+    Sortable.create(container, {
+        group: 'services',
+        animation: 150,
+        onEnd: function(evt) {
+            const oldGroupName = evt.from.dataset.group;
+            const newGroupName = evt.to.dataset.group;
+            
+            const oldGroupIndex = servicesData.findIndex(g => Object.keys(g)[0] === oldGroupName);
+            const newGroupIndex = servicesData.findIndex(g => Object.keys(g)[0] === newGroupName);
+            
+            if (oldGroupIndex !== -1 && newGroupIndex !== -1) {
+                const service = servicesData[oldGroupIndex][oldGroupName].splice(evt.oldIndex, 1)[0];
+                servicesData[newGroupIndex][newGroupName].splice(evt.newIndex, 0, service);
+                saveServicesWithoutReload();
             }
-        });
+        }
     });
 }
 
@@ -296,15 +312,16 @@ function onWidgetTypeChange(type) {
     }
 }
 
-// 保存服务
+// 保存服务（懒加载模式下先加载剩余分组，避免保存时丢失）
 function saveServices() {
-    fetch('/services', {
+    LazyGroups.ensureAllLoaded(lazyGroups)
+    .then(() => fetch('/services', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
         body: JSON.stringify(servicesData)
-    })
+    }))
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
@@ -321,13 +338,14 @@ function saveServices() {
 
 // 保存但不刷新页面
 function saveServicesWithoutReload() {
-    return fetch('/services', {
+    return LazyGroups.ensureAllLoaded(lazyGroups)
+    .then(() => fetch('/services', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
         body: JSON.stringify(servicesData)
-    })
+    }))
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
@@ -24,7 +24,9 @@ def test_application():
         ("Docker 管理", "/docker"),
         ("服务管理", "/services"),
         ("配置管理", "/config"),
-        ("备份API", "/api/backup")
+        ("备份API", "/api/backup"),
+        ("统计API", "/api/stats"),
+        ("系统状态API", "/api/system-status")
     ]
     
     results = []
@@ -51,7 +53,9 @@ def test_application():
             'language': 'zh-CN'
         }
         
-        response = requests.post(f"{base_url}/settings", data=settings_data, timeout=5)
+        # If-Match: * 表示不校验版本号，直接覆盖
+        response = requests.post(f"{base_url}/settings", data=settings_data,
+                                 headers={'If-Match': '*'}, timeout=5)
         if response.status_code in [200, 302]:  # 302 是重定向
             print("✅ 设置保存 - 正常")
             results.append(True)
@@ -82,7 +86,7 @@ def test_application():
         response = requests.post(
             f"{base_url}/bookmarks",
             json=bookmarks_data,
-            headers={'Content-Type': 'application/json'},
+            headers={'Content-Type': 'application/json', 'If-Match': '*'},
             timeout=5
         )
         
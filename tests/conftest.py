@@ -0,0 +1,48 @@
+"""
+测试公共夹具
+
+app 在导入时按 HOMEPAGE_CONFIG_PATH 初始化 YamlManager，因此在导入前指向一个临时配置目录；
+每个用例开始前清空其中的配置文件。需要独立目录或特殊参数（如写入合并）的用例直接创建 YamlManager。
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+CONFIG_DIR = tempfile.mkdtemp(prefix='homeman-test-')
+os.environ['HOMEPAGE_CONFIG_PATH'] = CONFIG_DIR
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(CONFIG_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def homeman():
+    """已清空配置文件的 app 模块"""
+    import app as homeman_app
+    manager = homeman_app.yaml_manager
+    manager.flush_writes()
+    for config_name in manager.get_supported_config_types():
+        file_path = manager.get_config_file_path(config_name)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    return homeman_app
+
+
+@pytest.fixture
+def client(homeman):
+    return homeman.app.test_client()
+
+
+@pytest.fixture
+def if_match(homeman):
+    """返回携带配置当前版本号的 If-Match 请求头"""
+    def headers(config_name):
+        return {'If-Match': f'"{homeman.yaml_manager.get_revision(config_name)}"'}
+    return headers
@@ -0,0 +1,66 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+
+def read_archive(data, archive_format):
+    """归档中的 {成员名: 内容}"""
+    if archive_format == 'zip':
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+        return {member.name: archive.extractfile(member).read() for member in archive.getmembers()}
+
+
+def save_configs(manager, suffix):
+    manager.save_bookmarks([{f'书签{suffix}': []}])
+    manager.save_services([{f'服务{suffix}': []}])
+    with open(manager.bookmarks_file, 'rb') as f:
+        bookmarks = f.read()
+    with open(manager.services_file, 'rb') as f:
+        services = f.read()
+    return {'bookmarks.yaml': bookmarks, 'services.yaml': services}
+
+
+@pytest.mark.parametrize('archive_format', ['zip', 'tar.gz'])
+def test_download_configs_archive(client, homeman, archive_format):
+    files = save_configs(homeman.yaml_manager, 'A')
+
+    response = client.get('/api/download/configs', query_string={'format': archive_format})
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert read_archive(response.get_data(), archive_format) == files
+
+
+@pytest.mark.parametrize('archive_format', ['zip', 'tar.gz'])
+def test_download_multiple_backups(client, homeman, archive_format):
+    manager = homeman.yaml_manager
+    expected = {}
+    names = []
+    for suffix in ('A', 'B'):
+        files = save_configs(manager, suffix)
+        manifest = manager.backup_store.create(files)
+        names.append(manifest['name'])
+        expected.update({f"{manifest['name']}/{filename}": content for filename, content in files.items()})
+
+    response = client.get('/api/download/backups', query_string={'name': names, 'format': archive_format})
+
+    assert response.status_code == 200
+    assert read_archive(response.get_data(), archive_format) == expected
+
+
+def test_download_backups_over_limit(client, homeman, monkeypatch):
+    monkeypatch.setattr(homeman, 'MAX_ARCHIVE_BACKUPS', 2)
+
+    response = client.get('/api/download/backups', query_string={'name': ['a', 'b', 'c']})
+
+    assert response.status_code == 400
+
+
+def test_download_unknown_backup_or_format(client, homeman):
+    assert client.get('/api/download/backups', query_string={'name': ['missing']}).status_code == 404
+    assert client.get('/api/download/configs', query_string={'format': 'rar'}).status_code == 400
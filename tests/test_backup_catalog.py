@@ -0,0 +1,67 @@
+import os
+
+
+def create_backups(manager, prefix):
+    """创建 5 个备份（部分时间相同，按名称倒序排列），返回按时间倒序的名称"""
+    names = [manager.backup_store.create({'bookmarks.yaml': f'- 分组{index}: []\n'.encode('utf-8')},
+                                         name=f'{prefix}_{index}', timestamp=1600000000 + index // 2)['name']
+             for index in range(5)]
+    return names[::-1]
+
+
+def page_all(client, limit):
+    names, cursor = [], None
+    while True:
+        params = {'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get('/api/backups', query_string=params)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['backups']) <= limit
+        names.extend(backup['name'] for backup in data['backups'])
+        cursor = data['next_cursor']
+        if cursor is None:
+            return names
+
+
+def all_names(client):
+    return [backup['name'] for backup in client.get('/api/backups').get_json()['backups']]
+
+
+def test_cursor_pages_cover_all_backups(client, homeman):
+    created = create_backups(homeman.yaml_manager, 'backup_page')
+
+    names = page_all(client, 2)
+
+    assert names == all_names(client)
+    assert len(names) == len(set(names))
+    assert [name for name in names if name in created] == created
+
+
+def test_invalid_cursor_returns_400(client, homeman):
+    assert client.get('/api/backups', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+
+
+def test_deleted_catalog_is_rebuilt(client, homeman):
+    create_backups(homeman.yaml_manager, 'backup_rebuild')
+    catalog = homeman.yaml_manager.backup_store.catalog
+    before = page_all(client, 2)
+    rebuilds = catalog.rebuilds
+
+    os.remove(catalog.db_path)
+
+    assert page_all(client, 2) == before
+    assert catalog.rebuilds == rebuilds + 1
+    assert os.path.exists(catalog.db_path)
+
+
+def test_stale_catalog_is_rebuilt(client, homeman):
+    removed = create_backups(homeman.yaml_manager, 'backup_stale')[2]
+    store = homeman.yaml_manager.backup_store
+    before = page_all(client, 2)
+
+    # 清单在应用外被删除（如手动清理备份目录）
+    os.remove(store.get_manifest_path(removed))
+
+    assert page_all(client, 2) == [name for name in before if name != removed]
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime
+
+from utils.backup_retention import BackupPruner, RetentionPolicy
+from utils.yaml_manager import YamlManager
+
+HOUR = 3600
+
+
+def make_manifests(names_and_ages):
+    now = time.time()
+    return [{'name': name, 'timestamp': now - age, 'files': {}} for name, age in names_and_ages]
+
+
+def names(manifests):
+    return [manifest['name'] for manifest in manifests]
+
+
+def test_default_policy_keeps_everything(monkeypatch):
+    for key in ('KEEP_LAST', 'KEEP_HOURLY', 'KEEP_DAILY', 'KEEP_WEEKLY', 'MAX_MB', 'KEEP_SNAPSHOTS'):
+        monkeypatch.delenv(f'HOMEMAN_BACKUP_{key}', raising=False)
+    policy = RetentionPolicy.from_env()
+    manifests = make_manifests((f'backup_{i}', i * HOUR) for i in range(100))
+
+    kept, expired = policy.select(manifests)
+
+    assert not policy.enabled
+    assert len(kept) == 100
+    assert expired == []
+
+
+def test_keep_last_applies_to_snapshots():
+    policy = RetentionPolicy(keep_last=2)
+    manifests = make_manifests([
+        ('pre_import_1', 0), ('backup_1', 1), ('pre_restore_1', 2), ('backup_2', 3)
+    ])
+
+    kept, expired = policy.select(manifests)
+
+    assert names(kept) == ['pre_import_1', 'backup_1']
+    assert names(expired) == ['pre_restore_1', 'backup_2']
+
+
+def test_keep_snapshots_limits_snapshots_separately():
+    policy = RetentionPolicy(keep_last=2, keep_snapshots=1)
+    manifests = make_manifests([
+        ('pre_import_1', 0), ('backup_1', 1), ('pre_restore_1', 2),
+        ('backup_2', 3), ('backup_3', 4)
+    ])
+
+    kept, expired = policy.select(manifests)
+
+    assert names(kept) == ['pre_import_1', 'backup_1', 'backup_2']
+    assert names(expired) == ['pre_restore_1', 'backup_3']
+
+
+def test_keep_snapshots_alone_keeps_other_backups(monkeypatch):
+    monkeypatch.setenv('HOMEMAN_BACKUP_KEEP_SNAPSHOTS', '1')
+    policy = RetentionPolicy.from_env()
+    manifests = make_manifests([('pre_import_1', 0), ('pre_restore_1', 1), ('backup_1', 2)])
+
+    kept, expired = policy.select(manifests)
+
+    assert policy.enabled
+    assert names(kept) == ['pre_import_1', 'backup_1']
+    assert names(expired) == ['pre_restore_1']
+
+
+def test_daily_buckets_keep_newest_per_day():
+    policy = RetentionPolicy(keep_daily=2)
+    noon = datetime(2024, 5, 10, 12).timestamp()
+    manifests = [
+        {'name': 'today_new', 'timestamp': noon, 'files': {}},
+        {'name': 'today_old', 'timestamp': noon - HOUR, 'files': {}},
+        {'name': 'yesterday', 'timestamp': noon - 24 * HOUR, 'files': {}},
+        {'name': 'two_days_ago', 'timestamp': noon - 48 * HOUR, 'files': {}}
+    ]
+
+    kept, expired = policy.select(manifests)
+
+    assert names(kept) == ['today_new', 'yesterday']
+    assert names(expired) == ['today_old', 'two_days_ago']
+
+
+def test_pruner_is_not_started_on_import(homeman):
+    assert homeman.backup_pruner.get_status()['running'] is False
+
+
+def test_pruner_deletes_expired_backups_only(tmp_path):
+    store = YamlManager(str(tmp_path)).backup_store
+    store.create({'bookmarks.yaml': b'- a: []\n'}, name='pre_restore_test', timestamp=time.time() - 3 * HOUR)
+    store.create({'bookmarks.yaml': b'- b: []\n'}, name='backup_old', timestamp=time.time() - 2 * HOUR)
+    store.create({'bookmarks.yaml': b'- c: []\n'}, name='backup_new', timestamp=time.time() - HOUR)
+
+    report = BackupPruner(store, RetentionPolicy(keep_last=1, keep_snapshots=1)).prune()
+
+    assert report['pruned'] == ['backup_old']
+    assert store.exists('pre_restore_test')
+    assert store.exists('backup_new')
@@ -0,0 +1,101 @@
+import os
+
+from utils.backup_store import BackupStore
+from utils.file_lock import FileLockManager
+from utils.yaml_manager import YamlManager
+
+
+def test_stats_cached_until_backups_change(tmp_path, monkeypatch):
+    store = YamlManager(str(tmp_path)).backup_store
+    store.create({'bookmarks.yaml': b'- a: []\n'}, name='backup_a')
+
+    loads = []
+    load_refs = store._load_refs
+    monkeypatch.setattr(store, '_load_refs', lambda: loads.append(1) or load_refs())
+
+    first = store.get_stats()
+    assert first['backups'] == 1
+    assert store.get_stats() == first
+    assert len(loads) == 1
+
+    store.create({'bookmarks.yaml': b'- b: []\n', 'services.yaml': b'- s: []\n'}, name='backup_b')
+    stats = store.get_stats()
+    assert stats['backups'] == 2
+    assert stats['objects'] == 3
+    assert stats['logical_bytes'] == first['logical_bytes'] + 16
+
+    store.delete('backup_a')
+    assert store.get_stats()['backups'] == 1
+    assert store.get_stats()['objects'] == 2
+
+
+def test_stats_see_backups_created_by_other_processes(tmp_path):
+    store = YamlManager(str(tmp_path)).backup_store
+    assert store.get_stats()['backups'] == 0
+
+    # 另一个进程中的存储实例
+    YamlManager(str(tmp_path)).backup_store.create({'bookmarks.yaml': b'- a: []\n'}, name='backup_other')
+
+    assert store.get_stats()['backups'] == 1
+
+
+def make_delta_store(tmp_path, chain):
+    # 不缓存还原内容，每次读取都沿差异链还原
+    return BackupStore(str(tmp_path / 'backups'), FileLockManager(str(tmp_path / 'locks')),
+                       delta_chain=chain, cache_bytes=0)
+
+
+def services_version(version):
+    lines = [f'- 分组{index}:\n  - 服务{index}:\n      href: http://service-{index}.local\n' for index in range(40)]
+    lines[version % 40] = f'- 分组{version}:\n  - 第 {version} 版:\n      href: http://changed-{version}.local\n'
+    return ''.join(lines).encode('utf-8')
+
+
+def chain_depths(store, manifests):
+    depths = []
+    for manifest in manifests:
+        delta = store._load_delta(manifest['files']['services.yaml']['hash'])
+        depths.append(delta['depth'] if delta else 0)
+    return depths
+
+
+def test_delta_chain_keyframes_and_exact_reads(tmp_path):
+    store = make_delta_store(tmp_path, chain=3)
+    manifests = [store.create({'services.yaml': services_version(version)}, name=f'backup_{version:02d}',
+                              timestamp=1700000000 + version) for version in range(10)]
+
+    assert chain_depths(store, manifests) == [0, 1, 2, 3, 0, 1, 2, 3, 0, 1]
+    for version, manifest in enumerate(manifests):
+        assert store.read_object(manifest['files']['services.yaml']['hash']) == services_version(version)
+    assert store.get_stats()['delta_objects'] == 7
+
+
+def test_deleting_chain_base_keeps_deltas_readable(tmp_path):
+    store = make_delta_store(tmp_path, chain=3)
+    manifests = [store.create({'services.yaml': services_version(version)}, name=f'backup_{version:02d}',
+                              timestamp=1700000000 + version) for version in range(4)]
+
+    # 关键帧和中间的差异被其后的差异引用，删除备份后仍然保留
+    store.delete_many(['backup_00', 'backup_01'])
+
+    for version, manifest in enumerate(manifests[2:], start=2):
+        assert store.read_object(manifest['files']['services.yaml']['hash']) == services_version(version)
+
+    store.delete_many(['backup_02', 'backup_03'])
+    assert store.get_stats()['objects'] == 0
+
+
+def test_garbage_collection_removes_deltas_and_empty_prefixes(tmp_path):
+    store = make_delta_store(tmp_path, chain=3)
+    for version in range(4):
+        store.create({'services.yaml': services_version(version)}, name=f'backup_{version:02d}',
+                     timestamp=1700000000 + version)
+    # 模拟中断的删除：清单已删除，对象仍在
+    for version in range(4):
+        os.remove(store.get_manifest_path(f'backup_{version:02d}'))
+
+    report = store.collect_garbage()
+
+    assert report['removed'] == 4
+    assert report['objects'] == 0
+    assert os.listdir(store.objects_dir) == []
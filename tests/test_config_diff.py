@@ -0,0 +1,83 @@
+def bookmark(name, href):
+    return {name: [{'href': href}]}
+
+
+def backup_bookmarks(manager, bookmarks):
+    """保存书签并创建只包含书签的备份，返回备份名"""
+    manager.save_bookmarks(bookmarks)
+    with open(manager.bookmarks_file, 'rb') as f:
+        return manager.backup_store.create({'bookmarks.yaml': f.read()})['name']
+
+
+def test_preview_compares_live_config_with_backup(client, homeman):
+    manager = homeman.yaml_manager
+    name = backup_bookmarks(manager, [{'开发': [bookmark('GitHub', 'https://github.com')]}])
+    manager.save_bookmarks([{'开发': [bookmark('GitHub', 'https://github.com')]},
+                            {'媒体': [bookmark('Jellyfin', 'http://jellyfin.local')]}])
+
+    response = client.get(f'/api/backup/{name}/preview')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['status'] == 'success'
+    assert data['changed_files'] == 1
+    [result] = data['files']
+    assert result['file'] == 'bookmarks.yaml'
+    # 预览的方向为 当前配置 → 备份内容：恢复会删除新增的分组
+    assert [(change['path'], change['type']) for change in result['changes']] == [(['媒体'], 'removed')]
+    assert result['text_diff'].startswith(f'--- 当前配置/bookmarks.yaml\n+++ {name}/bookmarks.yaml\n')
+    assert '--- 当前配置/bookmarks.yaml' in data['content']
+
+
+def test_preview_of_unchanged_backup(client, homeman):
+    name = backup_bookmarks(homeman.yaml_manager, [{'开发': [bookmark('GitHub', 'https://github.com')]}])
+
+    data = client.get(f'/api/backup/{name}/preview').get_json()
+
+    assert data['changed_files'] == 0
+    assert data['content'] == '当前配置与备份内容一致'
+
+
+def test_diff_between_backups(client, homeman):
+    manager = homeman.yaml_manager
+    old = backup_bookmarks(manager, [{'开发': [bookmark('GitHub', 'https://github.com')]}])
+    new = backup_bookmarks(manager, [{'开发': [bookmark('GitHub', 'https://github.example')]},
+                                     {'媒体': [bookmark('Jellyfin', 'http://jellyfin.local')]}])
+
+    response = client.get('/api/backups/diff', query_string={'from': old, 'to': new})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data['from'], data['to'], data['changed_files']) == (old, new, 1)
+    changes = data['files'][0]['changes']
+    assert [(change['path'], change['type']) for change in changes] == [
+        (['开发', 'GitHub'], 'modified'), (['媒体'], 'added')]
+    assert data['files'][0]['added_lines'] > 0
+
+
+def test_repeated_diff_uses_cache(client, homeman):
+    manager = homeman.yaml_manager
+    old = backup_bookmarks(manager, [{'开发': [bookmark('GitHub', 'https://github.com')]}])
+    new = backup_bookmarks(manager, [{'开发': [bookmark('GitLab', 'https://gitlab.com')]}])
+    query = {'from': old, 'to': new}
+    first = client.get('/api/backups/diff', query_string=query).get_json()
+    stats = homeman.config_differ.get_stats()
+
+    second = client.get('/api/backups/diff', query_string=query).get_json()
+
+    assert second == first
+    after = homeman.config_differ.get_stats()
+    assert after['hits'] == stats['hits'] + 1
+    assert after['misses'] == stats['misses']
+
+    # 反向比较是另一对内容，需要重新计算
+    client.get('/api/backups/diff', query_string={'from': new, 'to': old})
+    assert homeman.config_differ.get_stats()['misses'] == stats['misses'] + 1
+
+
+def test_unknown_backup_returns_404(client, homeman):
+    name = backup_bookmarks(homeman.yaml_manager, [{'开发': []}])
+
+    assert client.get('/api/backup/missing/preview').status_code == 404
+    assert client.get('/api/backups/diff', query_string={'from': name, 'to': 'missing'}).status_code == 404
+    assert client.get('/api/backups/diff').status_code == 400
@@ -0,0 +1,32 @@
+from utils.config_watcher import EventBroker
+
+
+def test_broker_rejects_subscribers_over_limit():
+    broker = EventBroker(max_subscribers=2)
+    first = broker.subscribe()
+    assert broker.subscribe() is not None
+    assert broker.subscribe() is None
+
+    broker.unsubscribe(first)
+    assert broker.subscribe() is not None
+
+
+def test_events_rejected_with_retry_when_full(client, homeman, monkeypatch):
+    monkeypatch.setattr(homeman.event_broker, 'max_subscribers', 1)
+    held = homeman.event_broker.subscribe()
+    try:
+        response = client.get('/api/events')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(homeman.EVENT_RETRY_SECONDS)
+        assert response.get_data(as_text=True).startswith('retry: ')
+    finally:
+        homeman.event_broker.unsubscribe(held)
+
+
+def test_closed_stream_releases_subscription(client, homeman):
+    before = homeman.event_broker.subscriber_count()
+    response = client.get('/api/events', buffered=False)
+    assert homeman.event_broker.subscriber_count() == before + 1
+
+    response.close()
+    assert homeman.event_broker.subscriber_count() == before
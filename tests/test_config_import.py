@@ -0,0 +1,74 @@
+import io
+import zipfile
+
+from utils.config_import import ConfigImporter
+from utils.yaml_manager import YamlManager
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for filename, content in files.items():
+            archive.writestr(filename, content)
+    return buffer.getvalue()
+
+
+def test_import_supersedes_pending_coalesced_write(tmp_path):
+    manager = YamlManager(str(tmp_path), write_coalesce_window=30)
+    importer = ConfigImporter(manager, lambda config_name, data: (True, ''))
+    manager.save_bookmarks([{'旧分组': []}])
+
+    archive = make_zip({'bookmarks.yaml': '- 新分组: []\n'})
+    success, message, details = importer.import_archive(io.BytesIO(archive), 'zip')
+
+    assert success, message
+    assert details['imported'] == ['bookmarks.yaml']
+    assert manager.load_bookmarks() == [{'新分组': []}]
+    # 合并队列之后落盘也不会用旧数据覆盖导入的文件
+    manager.flush_writes()
+    manager.clear_cache()
+    assert manager.load_bookmarks() == [{'新分组': []}]
+    assert manager.get_write_stats()['pending'] == 0
+
+
+def test_import_snapshot_contains_pending_write(tmp_path):
+    manager = YamlManager(str(tmp_path), write_coalesce_window=30)
+    importer = ConfigImporter(manager, lambda config_name, data: (True, ''))
+    manager.save_bookmarks([{'旧分组': []}])
+
+    archive = make_zip({'bookmarks.yaml': '- 新分组: []\n'})
+    success, _, details = importer.import_archive(io.BytesIO(archive), 'zip')
+
+    assert success
+    snapshot = manager.backup_store.get_manifest(details['snapshot'])
+    digest = snapshot['files']['bookmarks.yaml']['hash']
+    assert '旧分组' in manager.backup_store.read_object(digest).decode('utf-8')
+
+
+def test_import_requires_revision(client):
+    archive = make_zip({'bookmarks.yaml': '- 导入: []\n'})
+    response = client.post('/api/import-configs', data=archive)
+    assert response.status_code == 428
+
+
+def test_import_rejects_stale_revision(client, homeman, if_match):
+    homeman.yaml_manager.save_bookmarks([{'原分组': []}])
+    stale = if_match('bookmarks')
+    homeman.yaml_manager.save_bookmarks([{'其他页面修改': []}])
+
+    response = client.post('/api/import-configs', data=make_zip({'bookmarks.yaml': '- 导入: []\n'}), headers=stale)
+
+    assert response.status_code == 409
+    assert homeman.yaml_manager.load_bookmarks() == [{'其他页面修改': []}]
+
+
+def test_import_with_current_revisions(client, homeman):
+    manager = homeman.yaml_manager
+    manager.save_bookmarks([{'原分组': []}])
+    revisions = ', '.join(f'"{manager.get_revision(name)}"' for name in manager.get_supported_config_types())
+
+    response = client.post('/api/import-configs', data=make_zip({'bookmarks.yaml': '- 导入: []\n'}),
+                           headers={'If-Match': revisions})
+
+    assert response.status_code == 200, response.get_json()
+    assert manager.load_bookmarks() == [{'导入': []}]
@@ -0,0 +1,49 @@
+from utils.config_schema import compile_schema
+from utils.config_validator import ConfigValidator
+
+validator = ConfigValidator()
+
+
+def test_settings_enum_and_unhashable_values():
+    assert validator.validate_settings({'theme': 'dark', 'color': 'slate'}) == (True, '验证通过')
+    is_valid, message = validator.validate_settings({'theme': ['dark']})
+    assert not is_valid and message.startswith('无效的主题设置')
+
+
+def test_service_errors_with_paths():
+    errors = validator._check_service('Plex', {'href': 'not a url', 'target': '_new', 'showStats': 'yes'})
+    assert [(path, code) for path, code, _ in errors] == [
+        ('href', 'invalid_url'), ('target', 'invalid_value'), ('showStats', 'invalid_type')]
+    assert validator._check_service('Plex', {'siteMonitor': ''})[0][1] == 'missing_field'
+
+
+def test_bookmark_item_paths_use_list_positions():
+    errors = validator._check_bookmark('Docs', [{'href': 'http://a.com'}, {'abbr': 'ABC', 'href': 'http://b.com'}])
+    assert errors == [('1/abbr', 'invalid_value', "书签 'Docs' 的配置项 #2 缩写长度不能超过2个字符，当前: ABC")]
+
+
+def test_widget_mappings_only_for_customapi():
+    widgets = {'status': {'type': 'ping', 'url': 'http://a.com', 'mappings': []}}
+    is_valid, message = validator.validate_widgets(widgets)
+    assert not is_valid and 'customapi' in message
+
+    widgets['status']['type'] = 'customapi'
+    widgets['status']['mappings'] = [{'label': 'A', 'field': 'a'}, {'label': 'B'}]
+    assert validator.validate_all('widgets', widgets) == [{
+        'path': '/status/mappings/1', 'code': 'missing_field',
+        'message': "小工具 'status' 的 mapping #2 缺少必需的 'label' 或 'field' 字段"}]
+
+
+def test_docker_port_checked_only_with_host():
+    assert validator.validate_docker({'local': {'socket': '/var/run/docker.sock', 'port': 'x'}})[0]
+    is_valid, message = validator.validate_docker({'remote': {'host': '10.0.0.2', 'port': 70000}})
+    assert not is_valid and '端口' in message
+    is_valid, message = validator.validate_docker({'empty': {'tls': {}}})
+    assert not is_valid and "必须配置 'socket' 或 'host'" in message
+
+
+def test_compile_schema_without_rules_accepts_anything():
+    check = compile_schema({'properties': {'name': {}}}, lambda url: True)
+    errors = []
+    check({'name': 1}, None, None, None, errors)
+    assert errors == []
@@ -0,0 +1,141 @@
+import pytest
+import yaml
+
+from utils.editor_validation import EditorValidator, split_sections
+
+SECTIONED_DOCUMENTS = {
+    'duplicate keys': (
+        'title: 首页\n'
+        'theme: dark\n'
+        'title: 覆盖后的标题\n'
+    ),
+    'list value at column 0': (
+        'title: 首页\n'
+        'layout:\n'
+        '- Media:\n'
+        '    style: row\n'
+        '- Tools:\n'
+        '    columns: 3\n'
+        'theme: dark\n'
+    ),
+    'block scalars': (
+        '- Media:\n'
+        '  - Jellyfin:\n'
+        '      description: |\n'
+        '        第一行\n'
+        '\n'
+        '        - 不是列表项\n'
+        '      note: >-\n'
+        '        折叠\n'
+        '        文本\n'
+        '- Tools:\n'
+        '  - Git:\n'
+        '      href: http://git.local\n'
+    ),
+    'quoted multi-line scalars': (
+        'title: "跨行的\n'
+        '  标题"\n'
+        "subtitle: 'single\n"
+        "  quoted'\n"
+        'theme: dark\n'
+    ),
+    'comments and blank lines': (
+        '# 顶层注释\n'
+        '- Media: []\n'
+        '\n'
+        '# 分组之间的注释\n'
+        '- Tools:\n'
+        '  # 缩进的注释\n'
+        '  - Git:\n'
+        '      href: http://git.local  # 行尾注释\n'
+    ),
+}
+
+FULL_PARSE_DOCUMENTS = {
+    'anchors and aliases': (
+        'defaults: &defaults\n'
+        '  style: row\n'
+        'layout:\n'
+        '  Media: *defaults\n'
+    ),
+    'multiple documents marker': (
+        '---\n'
+        '- Media: []\n'
+        '- Tools: []\n'
+    ),
+    'flow collection at top level': (
+        '[{Media: []}, {Tools: []}]\n'
+    ),
+}
+
+
+@pytest.mark.parametrize('content', SECTIONED_DOCUMENTS.values(), ids=SECTIONED_DOCUMENTS.keys())
+def test_sectioned_parse_matches_full_parse(content):
+    result = EditorValidator().check(content)
+
+    assert result['valid']
+    assert result['sections'] > 1
+    assert result['data'] == yaml.safe_load(content)
+    assert list(result['data']) == list(yaml.safe_load(content))
+
+
+@pytest.mark.parametrize('content', FULL_PARSE_DOCUMENTS.values(), ids=FULL_PARSE_DOCUMENTS.keys())
+def test_unsafe_documents_fall_back_to_full_parse(content):
+    assert split_sections(content) is None
+
+    result = EditorValidator().check(content)
+
+    assert result['valid']
+    assert result['sections'] == 0
+    assert result['data'] == yaml.safe_load(content)
+
+
+@pytest.mark.parametrize('content', [
+    'title: "跨行\nsubtitle: 不是键"\ntheme: dark\n',
+    '- "跨行\n- 不是列表项"\n- Tools: []\n',
+])
+def test_unindented_quoted_continuation_matches_full_parse(content):
+    # 按行切分会把引号内的续行当成新段落，段落解析失败后改为整篇解析
+    result = EditorValidator().check(content)
+
+    assert result['valid']
+    assert result['data'] == yaml.safe_load(content)
+
+
+def test_editing_one_group_reparses_only_that_group():
+    validator = EditorValidator()
+    groups = [f'- 分组{index}:\n  - 服务{index}:\n      href: http://service-{index}\n' for index in range(5)]
+    validator.check(''.join(groups))
+
+    groups[2] = '- 分组2:\n  - 改名的服务:\n      href: http://changed\n'
+    content = ''.join(groups)
+    result = validator.check(content)
+
+    assert result['sections'] == 5
+    assert result['reparsed'] == 1
+    assert result['data'] == yaml.safe_load(content)
+    # 未修改的内容再次检查直接命中缓存
+    assert validator.check(content) is result
+    assert validator.get_stats()['hits'] == 1
+
+
+def test_syntax_error_reports_position_in_full_document():
+    content = (
+        '- Media:\n'
+        '  - Jellyfin:\n'
+        '      href: http://jellyfin\n'
+        '- Tools:\n'
+        '  - Git:\n'
+        '      href: [unclosed\n'
+        '- Other: []\n'
+    )
+    with pytest.raises(yaml.YAMLError) as excinfo:
+        yaml.safe_load(content)
+    mark = excinfo.value.problem_mark
+
+    result = EditorValidator().check(content)
+
+    assert not result['valid']
+    assert (result['line'], result['column']) == (mark.line + 1, mark.column + 1)
+    assert result['line'] > 5
+    assert f"第 {result['line']} 行" in result['error']
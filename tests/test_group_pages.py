@@ -0,0 +1,76 @@
+import json
+import re
+
+
+def build_services(groups):
+    return [{f'分组{index}': [{f'服务{index}': {'href': f'http://service-{index}'}}]} for index in range(groups)]
+
+
+def get_page(client, cursor=None, **params):
+    if cursor:
+        params['cursor'] = cursor
+    return client.get('/api/services/groups', query_string=params)
+
+
+def test_pages_cover_all_groups(client, homeman):
+    homeman.yaml_manager.save_services(build_services(5))
+
+    names, cursor = [], None
+    while True:
+        response = get_page(client, cursor, limit=2)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['total_groups'] == 5
+        names.extend(group['name'] for group in data['groups'])
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+
+    assert names == [f'分组{index}' for index in range(5)]
+
+
+def test_cursor_rejected_after_concurrent_change(client, homeman, if_match):
+    homeman.yaml_manager.save_services(build_services(5))
+    first = get_page(client, limit=2)
+    cursor = first.get_json()['next_cursor']
+
+    # 翻页期间另一个页面删除了一个分组
+    response = client.delete('/api/services/group', json={'groupName': '分组0'}, headers=if_match('services'))
+    assert response.status_code == 200, response.get_json()
+
+    response = get_page(client, cursor, limit=2)
+    assert response.status_code == 409
+    assert response.headers['ETag'] == if_match('services')['If-Match']
+    assert response.headers['ETag'] != first.headers['ETag']
+
+
+def test_invalid_cursor_returns_400(client, homeman):
+    homeman.yaml_manager.save_services(build_services(3))
+
+    assert get_page(client, 'not-a-cursor').status_code == 400
+
+
+def test_malformed_groups_kept_in_lazy_page_data(client, homeman):
+    services = build_services(3)
+    services.insert(1, '不是分组')
+    homeman.yaml_manager.save_services(services)
+
+    page = client.get('/services?lazy=1').get_data(as_text=True)
+    data = json.loads(re.search(r'<script type="application/json" id="services-data">(.*?)</script>', page).group(1))
+    assert data == services
+
+    groups = get_page(client, limit=10).get_json()['groups']
+    assert [group['name'] for group in groups] == ['分组0', None, '分组1', '分组2']
+    assert groups[1]['raw'] == '不是分组'
+
+
+def test_saving_lazy_page_data_does_not_drop_malformed_groups(client, homeman, if_match):
+    bookmarks = [{'分组': []}, {'多个键': [], '另一个键': []}]
+    homeman.yaml_manager.save_bookmarks(bookmarks)
+    data = [{group['name']: group['items']} if group['name'] is not None else group['raw']
+            for group in client.get('/api/bookmarks/groups').get_json()['groups']]
+
+    response = client.post('/bookmarks', json=data, headers=if_match('bookmarks'))
+
+    assert response.get_json()['status'] == 'error'
+    assert homeman.yaml_manager.load_bookmarks() == bookmarks
@@ -0,0 +1,44 @@
+import copy
+
+from utils.config_validator import ConfigValidator
+from utils.incremental_validator import IncrementalValidator
+
+SERVICES = [
+    {'媒体': [{'Plex': {'href': 'http://plex.local'}}]},
+    {'工具': [{'Git': {'href': 'http://git.local'}}]}
+]
+
+
+def test_equal_groups_reuse_previous_result():
+    validator = IncrementalValidator(ConfigValidator())
+    assert validator.validate_services(copy.deepcopy(SERVICES)) == []
+
+    # 保存请求中的配置是新解析的对象，内容未变的分组不再计算摘要
+    misses = validator.get_stats()['misses']
+    assert validator.validate_services(copy.deepcopy(SERVICES)) == []
+    stats = validator.get_stats()
+    assert stats['unchanged_groups'] == 2
+    assert stats['misses'] == misses
+
+
+def test_changed_group_is_revalidated():
+    validator = IncrementalValidator(ConfigValidator())
+    validator.validate_services(copy.deepcopy(SERVICES))
+
+    services = copy.deepcopy(SERVICES)
+    services[1]['工具'][0]['Git']['href'] = 'not a url'
+    errors = validator.validate_services(services)
+
+    assert [error['path'] for error in errors] == ['/1/工具/0/Git/href']
+    assert validator.get_stats()['unchanged_groups'] == 1
+
+
+def test_in_place_modification_is_not_masked():
+    validator = IncrementalValidator(ConfigValidator())
+    services = copy.deepcopy(SERVICES)
+    validator.validate_services(services)
+
+    services[0]['媒体'][0]['Plex']['target'] = '_new'
+    errors = validator.validate_services(services)
+
+    assert [error['code'] for error in errors] == ['invalid_value']
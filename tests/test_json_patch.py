@@ -0,0 +1,111 @@
+import pytest
+
+from utils.json_patch import JsonPatchError, apply_patch, make_pointer
+
+SERVICES = [
+    {'媒体': [{'Plex': {'href': 'http://plex.local'}}]},
+    {'工具': [{'Git': {'href': 'http://git.local'}}, {'Wiki': {'href': 'http://wiki.local'}}]},
+    {'网络': [{'Router': {'href': 'http://router.local', 'server': 'local', 'container': 'router'}}]}
+]
+
+
+def test_apply_patch_copies_only_touched_groups():
+    document = [dict(group) for group in SERVICES]
+    new_document, touched = apply_patch(document, [
+        {'op': 'add', 'path': '/1/工具/-', 'value': {'CI': {'href': 'http://ci.local'}}}
+    ])
+
+    assert touched == [1]
+    assert new_document[0] is document[0]
+    assert len(new_document[1]['工具']) == 3
+    assert len(document[1]['工具']) == 2
+
+
+def test_failed_operation_leaves_document_unchanged():
+    document = [dict(group) for group in SERVICES]
+    with pytest.raises(JsonPatchError):
+        apply_patch(document, [
+            {'op': 'remove', 'path': '/1/工具/0'},
+            {'op': 'remove', 'path': '/9'}
+        ])
+    assert document == SERVICES
+
+
+def test_make_pointer_escapes_tokens():
+    assert make_pointer(0, 'a/b', 'c~d', '-') == '/0/a~1b/c~0d/-'
+
+
+def test_patch_route_applies_and_returns_revision(client, homeman, if_match):
+    homeman.yaml_manager.save_services(SERVICES)
+    response = client.patch('/api/config/services', headers=if_match('services'),
+                            json=[{'op': 'remove', 'path': '/1/工具/1'}])
+
+    assert response.status_code == 200, response.get_json()
+    assert response.headers['ETag'].strip('"') == homeman.yaml_manager.get_revision('services')
+    assert homeman.yaml_manager.load_services()[1] == {'工具': [{'Git': {'href': 'http://git.local'}}]}
+
+
+def test_patch_route_rejects_invalid_operation(client, homeman, if_match):
+    homeman.yaml_manager.save_services(SERVICES)
+    response = client.patch('/api/config/services', headers=if_match('services'),
+                            json=[{'op': 'remove', 'path': '/0'}, {'op': 'replace', 'path': '/7/x', 'value': 1}])
+
+    assert response.status_code == 400
+    assert '补丁无效' in response.get_json()['error']
+    assert homeman.yaml_manager.load_services() == SERVICES
+
+
+def test_patch_validation_reports_document_index(client, homeman, if_match):
+    homeman.yaml_manager.save_services(SERVICES)
+    response = client.patch('/api/config/services', headers=if_match('services'),
+                            json=[{'op': 'replace', 'path': '/2', 'value': ['不是分组']}])
+
+    assert response.status_code == 400
+    assert '#3' in response.get_json()['error']
+    assert homeman.yaml_manager.load_services() == SERVICES
+
+
+def test_docker_patch_rejects_removing_referenced_instance(client, homeman, if_match):
+    homeman.yaml_manager.save_docker({'local': {'socket': '/var/run/docker.sock'}})
+    homeman.yaml_manager.save_services(SERVICES)
+
+    response = client.patch('/api/config/docker', headers=if_match('docker'),
+                            json=[{'op': 'remove', 'path': '/local'}])
+
+    assert response.status_code == 409
+    assert len(response.get_json()['references']) == 1
+    assert 'local' in homeman.yaml_manager.load_docker()
+
+
+def test_service_routes_patch_groups(client, homeman, if_match):
+    manager = homeman.yaml_manager
+    manager.save_services(SERVICES)
+
+    response = client.post('/api/services', headers=if_match('services'), json={
+        'action': 'add_service', 'groupName': '工具', 'serviceName': 'CI', 'serviceData': {'href': 'http://ci.local'}})
+    assert response.get_json()['success'], response.get_json()
+
+    response = client.post('/api/services/group', headers=if_match('services'), json={
+        'action': 'update_group', 'groupName': '开发', 'originalName': '工具'})
+    assert response.get_json()['success'], response.get_json()
+
+    response = client.delete('/api/services', headers=if_match('services'), json={'groupName': '开发', 'serviceName': 'Git'})
+    assert response.get_json()['success'], response.get_json()
+
+    response = client.delete('/api/services/group', headers=if_match('services'), json={'groupName': '媒体'})
+    assert response.get_json()['success'], response.get_json()
+
+    assert manager.load_services() == [
+        {'开发': [{'Wiki': {'href': 'http://wiki.local'}}, {'CI': {'href': 'http://ci.local'}}]},
+        SERVICES[2]
+    ]
+
+
+def test_service_route_validation_errors_use_document_paths(client, homeman, if_match):
+    homeman.yaml_manager.save_services(SERVICES)
+    response = client.post('/api/services', headers=if_match('services'), json={
+        'action': 'add_service', 'groupName': '网络', 'serviceName': 'Bad', 'serviceData': ['不是字典']})
+
+    data = response.get_json()
+    assert not data['success']
+    assert data['errors'] and all(error['path'].startswith('/2/') for error in data['errors'])
@@ -0,0 +1,76 @@
+from utils.reference_index import ReferenceIndex
+from utils.yaml_manager import YamlManager
+
+
+def build_services():
+    return [
+        {'基础设施': [
+            {'路由器': {'href': 'http://router', 'server': 'local'}},
+            {'存储': [
+                {'NAS': {'href': 'http://nas', 'server': 'local', 'container': 'nas'}},
+            ]},
+        ]},
+        {'媒体': [
+            {'Jellyfin': {'href': 'http://jellyfin', 'server': 'remote'}},
+        ]},
+    ]
+
+
+def test_find_services_in_nested_groups(tmp_path):
+    manager = YamlManager(str(tmp_path))
+    index = ReferenceIndex(manager)
+    manager.save_services(build_services())
+
+    refs = index.find('docker', 'local')
+
+    assert [ref['name'] for ref in refs] == ['路由器', 'NAS']
+    assert refs[1]['group'] == '存储'
+    assert refs[1]['path'] == '/0/基础设施/1/存储/0/NAS'
+
+
+def test_save_rescans_only_changed_groups(tmp_path):
+    manager = YamlManager(str(tmp_path))
+    index = ReferenceIndex(manager)
+    manager.save_services(build_services())
+    assert index.get_stats()['rescanned_groups'] == 2
+
+    services = build_services()
+    services[1]['媒体'].append({'Plex': {'href': 'http://plex', 'server': 'local'}})
+    manager.save_services(services)
+
+    assert index.get_stats()['rescanned_groups'] == 3
+    assert [ref['name'] for ref in index.find('docker', 'local')] == ['路由器', 'NAS', 'Plex']
+    assert [ref['name'] for ref in index.find('docker', 'remote')] == ['Jellyfin']
+
+    del services[0]
+    manager.save_services(services)
+    refs = index.find('docker', 'local')
+    assert [(ref['name'], ref['path']) for ref in refs] == [('Plex', '/0/媒体/1/Plex')]
+    assert index.find('href', 'http://nas') == []
+
+
+def test_external_edit_updates_index(tmp_path):
+    manager = YamlManager(str(tmp_path))
+    index = ReferenceIndex(manager)
+    manager.save_services(build_services())
+    assert len(index.find('docker', 'remote', configs=['services'])) == 1
+
+    with open(manager.services_file, 'w', encoding='utf-8') as f:
+        f.write('- 媒体:\n  - Jellyfin:\n      href: http://jellyfin\n')
+
+    assert index.find('docker', 'remote', configs=['services']) == []
+    assert index.find('docker', 'local', configs=['services']) == []
+    assert index.get_stats()['rebuilds'] == 1
+
+
+def test_retarget_docker_in_nested_groups(tmp_path):
+    manager = YamlManager(str(tmp_path))
+    index = ReferenceIndex(manager)
+    manager.save_services(build_services())
+
+    services = manager.load_services()
+    assert index.retarget_docker(services, 'local', None) == 2
+
+    nas = services[0]['基础设施'][1]['存储'][0]['NAS']
+    assert 'server' not in nas and 'container' not in nas
+    assert services[1]['媒体'][0]['Jellyfin']['server'] == 'remote'
@@ -0,0 +1,101 @@
+import json
+import os
+
+from utils.yaml_manager import YamlManager
+
+
+def test_failed_replace_rolls_back_restored_files(tmp_path, monkeypatch):
+    manager = YamlManager(str(tmp_path))
+    manager.save_bookmarks([{'备份时': []}])
+    manager.save_services([{'备份时': []}])
+    backup_path, _ = manager.backup_configs()
+    manager.save_bookmarks([{'当前': []}])
+    manager.save_services([{'当前': []}])
+
+    targets = {manager.bookmarks_file, manager.services_file}
+    replaced = []
+    real_replace = os.replace
+
+    def failing_replace(src, dst):
+        # 第二个配置文件替换时失败（回滚时从 .backup 恢复不受影响）
+        if dst in targets and not str(src).endswith('.backup'):
+            if replaced:
+                raise OSError('磁盘已满')
+            replaced.append(dst)
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(os, 'replace', failing_replace)
+    success, message = manager.restore_configs(backup_path)
+    monkeypatch.setattr(os, 'replace', real_replace)
+
+    assert not success
+    assert '磁盘已满' in message
+    manager.clear_cache()
+    assert manager.load_bookmarks() == [{'当前': []}]
+    assert manager.load_services() == [{'当前': []}]
+    assert not os.path.exists(manager.restore_journal)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.restore')]
+
+
+def test_interrupted_restore_completed_on_startup(tmp_path):
+    manager = YamlManager(str(tmp_path))
+    manager.save_bookmarks([{'当前': []}])
+
+    # 模拟恢复在记录日志之后、替换文件之前中断：临时文件已完整写入
+    temp_path = os.path.join(str(tmp_path), '.restore-staged.bookmarks.yaml')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('- 恢复: []\n')
+    with open(manager.restore_journal, 'w', encoding='utf-8') as f:
+        json.dump({'snapshot': 'pre_restore_test', 'files': [[temp_path, manager.bookmarks_file]]}, f)
+
+    restarted = YamlManager(str(tmp_path))
+
+    assert restarted.load_bookmarks() == [{'恢复': []}]
+    assert not os.path.exists(manager.restore_journal)
+    assert not os.path.exists(temp_path)
+
+
+def backup_then_edit(homeman):
+    manager = homeman.yaml_manager
+    manager.save_bookmarks([{'备份时': []}])
+    manager.backup_configs()
+    manager.save_bookmarks([{'当前': []}])
+    return manager.list_backups(limit=1)[0]['name']
+
+
+def all_revisions(manager):
+    return ', '.join(f'"{manager.get_revision(name)}"' for name in manager.get_supported_config_types())
+
+
+def test_restore_requires_revision(client, homeman):
+    backup_name = backup_then_edit(homeman)
+
+    response = client.post('/api/restore', json={'backup_name': backup_name})
+
+    assert response.status_code == 428
+    assert homeman.yaml_manager.load_bookmarks() == [{'当前': []}]
+
+
+def test_restore_rejects_stale_revision(client, homeman):
+    backup_name = backup_then_edit(homeman)
+    stale = all_revisions(homeman.yaml_manager)
+    homeman.yaml_manager.save_bookmarks([{'其他页面修改': []}])
+    backups = homeman.yaml_manager.backup_store.get_stats()['backups']
+
+    response = client.post('/api/restore', json={'backup_name': backup_name}, headers={'If-Match': stale})
+
+    assert response.status_code == 409
+    assert homeman.yaml_manager.load_bookmarks() == [{'其他页面修改': []}]
+    # 冲突在保存 pre_restore 备份之前检出
+    assert homeman.yaml_manager.backup_store.get_stats()['backups'] == backups
+
+
+def test_restore_with_current_revisions(client, homeman):
+    backup_name = backup_then_edit(homeman)
+
+    response = client.post('/api/restore', json={'backup_name': backup_name},
+                           headers={'If-Match': all_revisions(homeman.yaml_manager)})
+
+    assert response.status_code == 200
+    assert response.get_json()['success'], response.get_json()
+    assert homeman.yaml_manager.load_bookmarks() == [{'备份时': []}]
@@ -0,0 +1,53 @@
+def test_write_without_revision_returns_428(client, homeman):
+    homeman.yaml_manager.save_bookmarks([{'原分组': []}])
+
+    response = client.post('/bookmarks', json=[{'新分组': []}])
+
+    assert response.status_code == 428
+    assert response.get_json()['revision'] == homeman.yaml_manager.get_revision('bookmarks')
+    assert homeman.yaml_manager.load_bookmarks() == [{'原分组': []}]
+
+
+def test_stale_revision_returns_409(client, homeman, if_match):
+    homeman.yaml_manager.save_bookmarks([{'原分组': []}])
+    stale = if_match('bookmarks')
+    homeman.yaml_manager.save_bookmarks([{'其他页面修改': []}])
+
+    response = client.post('/bookmarks', json=[{'新分组': []}], headers=stale)
+
+    assert response.status_code == 409
+    assert response.headers['ETag'] == if_match('bookmarks')['If-Match']
+    assert homeman.yaml_manager.load_bookmarks() == [{'其他页面修改': []}]
+
+
+def test_current_revision_saves_and_returns_new_etag(client, homeman, if_match):
+    homeman.yaml_manager.save_bookmarks([{'原分组': []}])
+    current = if_match('bookmarks')
+
+    response = client.post('/bookmarks', json=[{'新分组': []}], headers=current)
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'success'
+    assert response.headers['ETag'] != current['If-Match']
+    assert response.headers['ETag'] == if_match('bookmarks')['If-Match']
+    # 同一个版本号不能再次使用
+    assert client.post('/bookmarks', json=[{'再次修改': []}], headers=current).status_code == 409
+
+
+def test_star_overwrites_any_revision(client, homeman):
+    homeman.yaml_manager.save_bookmarks([{'原分组': []}])
+
+    response = client.post('/bookmarks', json=[{'强制覆盖': []}], headers={'If-Match': '*'})
+
+    assert response.status_code == 200
+    assert homeman.yaml_manager.load_bookmarks() == [{'强制覆盖': []}]
+
+
+def test_external_edit_changes_revision(client, homeman, if_match):
+    homeman.yaml_manager.save_bookmarks([{'原分组': []}])
+    before = if_match('bookmarks')
+
+    with open(homeman.yaml_manager.bookmarks_file, 'w', encoding='utf-8') as f:
+        f.write('- 外部修改: []\n')
+
+    assert client.post('/bookmarks', json=[{'新分组': []}], headers=before).status_code == 409
@@ -0,0 +1,69 @@
+def search(client, query, **params):
+    response = client.get('/api/search', query_string=dict(params, q=query))
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def bookmark(name, href):
+    return {name: [{'href': href}]}
+
+
+def test_search_sees_bookmarks_saved_through_api(client, homeman, if_match):
+    homeman.yaml_manager.save_bookmarks([{'开发': [bookmark('GitHub', 'https://github.com')]}])
+    assert search(client, 'gitlab')['total'] == 0
+
+    bookmarks = [{'开发': [bookmark('GitHub', 'https://github.com'), bookmark('GitLab', 'https://gitlab.com')]}]
+    response = client.post('/bookmarks', json=bookmarks, headers=if_match('bookmarks'))
+    assert response.status_code == 200
+
+    results = search(client, 'gitlab', config='bookmarks')['results']
+    assert [(result['name'], result['path']) for result in results] == [('GitLab', '/0/开发/1/GitLab')]
+
+
+def test_save_reindexes_only_changed_groups(client, homeman, if_match):
+    manager = homeman.yaml_manager
+    groups = [{'开发': [bookmark('GitHub', 'https://github.com')]},
+              {'媒体': [bookmark('Jellyfin', 'http://jellyfin.local')]}]
+    manager.save_bookmarks(groups)
+    search(client, 'github', config='bookmarks')
+    indexed = homeman.search_index.get_stats()['indexed']
+
+    # 调换分组顺序并修改其中一个分组：只有被修改的分组重新建立索引，另一个只更新序号
+    groups = [{'媒体': [bookmark('Plex', 'http://plex.local')]}, groups[0]]
+    response = client.post('/bookmarks', json=groups, headers=if_match('bookmarks'))
+    assert response.status_code == 200
+
+    assert homeman.search_index.get_stats()['indexed'] == indexed + 1
+    assert search(client, 'jellyfin', config='bookmarks')['total'] == 0
+    assert search(client, 'plex', config='bookmarks')['results'][0]['path'] == '/0/媒体/0/Plex'
+    assert search(client, 'github', config='bookmarks')['results'][0]['path'] == '/1/开发/0/GitHub'
+
+
+def test_search_sees_external_edits(client, homeman):
+    homeman.yaml_manager.save_bookmarks([{'开发': [bookmark('GitHub', 'https://github.com')]}])
+    assert search(client, 'github', config='bookmarks')['total'] == 1
+
+    with open(homeman.yaml_manager.bookmarks_file, 'w', encoding='utf-8') as f:
+        f.write('- 开发:\n  - Gitea:\n    - href: https://gitea.local\n')
+
+    assert search(client, 'github', config='bookmarks')['total'] == 0
+    assert search(client, 'gitea', config='bookmarks')['total'] == 1
+
+
+def test_tied_results_follow_config_order_after_incremental_update(client, homeman, if_match):
+    manager = homeman.yaml_manager
+    groups = [{'开发': [bookmark('Git 仓库', 'https://github.com')]},
+              {'运维': [bookmark('Git 镜像', 'https://mirror.local')]}]
+    manager.save_bookmarks(groups)
+    search(client, 'git', config='bookmarks')
+
+    # 新增的分组放在最前：它的条目编号最大，但在配置中排第一
+    groups = [{'工具': [bookmark('Git 客户端', 'https://git.local')]}, *groups]
+    response = client.post('/bookmarks', json=groups, headers=if_match('bookmarks'))
+    assert response.status_code == 200
+
+    results = search(client, 'git', config='bookmarks')['results']
+    assert len({result['score'] for result in results}) == 1
+    assert [result['path'] for result in results] == ['/0/工具/0/Git 客户端', '/1/开发/0/Git 仓库', '/2/运维/0/Git 镜像']
+    assert [result['path'] for result in search(client, 'git', config='bookmarks', limit=1)['results']] == \
+        ['/0/工具/0/Git 客户端']
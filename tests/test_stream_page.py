@@ -0,0 +1,27 @@
+class BrokenBackups:
+    """渲染到最近备份列表时才出错（此时页面开头已经发送）"""
+
+    def __bool__(self):
+        return True
+
+    def __iter__(self):
+        raise RuntimeError('备份目录不可读')
+
+
+def test_index_streams_page(client):
+    response = client.get('/')
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).rstrip().endswith('</html>')
+
+
+def test_render_error_after_streaming_closes_page(client, homeman, monkeypatch):
+    monkeypatch.setattr(homeman.yaml_manager, 'list_backups', lambda limit=None: BrokenBackups())
+
+    response = client.get('/')
+    body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert '最近备份' in body
+    assert '加载配置时发生错误: 备份目录不可读' in body
+    assert body.endswith('</main></body></html>')
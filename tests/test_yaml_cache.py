@@ -0,0 +1,46 @@
+import os
+
+from utils.yaml_manager import YamlManager
+
+
+def group_names(client, config_name):
+    response = client.get(f'/api/{config_name}/groups')
+    assert response.status_code == 200
+    return [group['name'] for group in response.get_json()['groups']]
+
+
+def test_external_edit_invalidates_parse_cache(client, homeman):
+    homeman.yaml_manager.save_bookmarks([{'应用内保存': []}])
+    assert group_names(client, 'bookmarks') == ['应用内保存']
+
+    with open(homeman.yaml_manager.bookmarks_file, 'w', encoding='utf-8') as f:
+        f.write('- 外部修改: []\n- 新分组: []\n')
+
+    assert group_names(client, 'bookmarks') == ['外部修改', '新分组']
+
+
+def test_replaced_file_with_same_size_and_mtime_is_reloaded(tmp_path):
+    manager = YamlManager(str(tmp_path))
+    manager.save_bookmarks([{'原分组A': []}])
+    assert manager.load_bookmarks() == [{'原分组A': []}]
+    stat = os.stat(manager.bookmarks_file)
+
+    # 编辑器/同步工具常见的写法：写入新文件后改名替换，并保留原修改时间
+    replacement = os.path.join(str(tmp_path), 'bookmarks.yaml.new')
+    with open(replacement, 'w', encoding='utf-8') as f:
+        f.write('- 新分组B: []\n')
+    assert os.path.getsize(replacement) == stat.st_size
+    os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(replacement, manager.bookmarks_file)
+
+    assert manager.load_bookmarks() == [{'新分组B': []}]
+
+
+def test_returned_data_does_not_leak_into_cache(tmp_path):
+    manager = YamlManager(str(tmp_path))
+    manager.save_bookmarks([{'分组': []}])
+
+    manager.load_bookmarks()[0]['分组'].append({'调用方修改': []})
+
+    assert manager.load_bookmarks() == [{'分组': []}]
+    assert manager.get_cache_stats()['hits'] >= 2
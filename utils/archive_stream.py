@@ -0,0 +1,140 @@
+import os
+import io
+import time
+import zlib
+import tarfile
+import zipfile
+import logging
+from collections import namedtuple
+from typing import BinaryIO, Iterable, Iterator
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 每次读取/输出的块大小，内存占用与归档总大小无关
+CHUNK_SIZE = 64 * 1024
+
+# 归档中的一个文件：name 为归档内路径，open() 返回二进制文件对象，
+# mtime 省略时取打开文件的修改时间
+ArchiveEntry = namedtuple('ArchiveEntry', ['name', 'open', 'mtime'], defaults=[None])
+
+
+class _ChunkBuffer:
+    """只追加、不可定位的输出缓冲，生成器每写完一块就取出已产生的数据"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _file_stat(f: BinaryIO):
+    """返回(大小, 修改时间)；配置文件通过原子替换写入，已打开的文件内容不会再变化"""
+    try:
+        st = os.fstat(f.fileno())
+        return st.st_size, st.st_mtime
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        size = f.seek(0, io.SEEK_END)
+        f.seek(0)
+        return size, time.time()
+
+
+def _read_chunks(f: BinaryIO, size: int, chunk_size: int) -> Iterator[bytes]:
+    """读取恰好 size 字节"""
+    remaining = size
+    while remaining > 0:
+        chunk = f.read(min(chunk_size, remaining))
+        if not chunk:
+            raise OSError(f"文件在读取过程中被截断，还差 {remaining} 字节")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def iter_zip(entries: Iterable[ArchiveEntry], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    流式生成 ZIP 归档
+
+    输出不可定位，zipfile 会为每个文件写入数据描述符（大小与 CRC 写在数据之后），
+    因此无需临时文件即可边读边发送。
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for entry in entries:
+            with entry.open() as f:
+                size, mtime = _file_stat(f)
+                info = zipfile.ZipInfo(entry.name, time.localtime(entry.mtime or mtime)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                info.file_size = size
+                with zipf.open(info, 'w') as dest:
+                    for chunk in _read_chunks(f, size, chunk_size):
+                        dest.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def iter_tar_gz(entries: Iterable[ArchiveEntry], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """流式生成 tar.gz 归档：逐块写入 tar 头和文件数据，经 zlib 压缩为 gzip 格式输出"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    written = 0
+
+    def emit(data: bytes) -> bytes:
+        nonlocal written
+        written += len(data)
+        return compressor.compress(data)
+
+    for entry in entries:
+        with entry.open() as f:
+            size, mtime = _file_stat(f)
+            info = tarfile.TarInfo(entry.name)
+            info.size = size
+            info.mtime = int(entry.mtime or mtime)
+            info.mode = 0o644
+            yield emit(info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape'))
+            for chunk in _read_chunks(f, size, chunk_size):
+                yield emit(chunk)
+            yield emit(b'\0' * (-size % tarfile.BLOCKSIZE))
+
+    # 结尾两个空块，并补齐到整条记录
+    end = b'\0' * (2 * tarfile.BLOCKSIZE)
+    end += b'\0' * (-(written + len(end)) % tarfile.RECORDSIZE)
+    yield emit(end)
+    yield compressor.flush()
+
+
+# 格式: (MIME 类型, 扩展名, 生成函数)
+ARCHIVE_FORMATS = {
+    'zip': ('application/zip', '.zip', iter_zip),
+    'tar.gz': ('application/gzip', '.tar.gz', iter_tar_gz),
+}
+
+
+def stream_archive(entries: Iterable[ArchiveEntry], archive_format: str = 'zip') -> Iterator[bytes]:
+    """按格式流式生成归档；不支持的格式立即抛出 ValueError（而不是在开始输出后）"""
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"不支持的归档格式: {archive_format}")
+    return _stream(ARCHIVE_FORMATS[archive_format][2], entries, archive_format)
+
+
+def _stream(generate, entries: Iterable[ArchiveEntry], archive_format: str) -> Iterator[bytes]:
+    try:
+        for chunk in generate(entries):
+            if chunk:
+                yield chunk
+    except Exception as e:
+        # 响应头已发送，只能中断连接
+        logger.error(f"Error streaming {archive_format} archive: {e}")
+        raise
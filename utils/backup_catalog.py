@@ -0,0 +1,180 @@
+import os
+import json
+import base64
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class BackupCatalog:
+    """
+    备份目录索引（SQLite）
+
+    记录每个备份的名称、时间、大小及完整清单（文件名、大小、内容哈希），
+    按 (timestamp, name) 建立索引，分页查询只读取 limit 行。
+    清单目录的修改时间与索引中记录的不一致（或索引缺失、损坏）时自动从清单重建。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS backups (
+            name TEXT PRIMARY KEY,
+            timestamp REAL NOT NULL,
+            manifest TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS backups_by_time ON backups (timestamp DESC, name DESC);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str, manifests_dir: str, load_manifests):
+        # load_manifests() 返回所有清单，用于重建索引
+        self.db_path = db_path
+        self.manifests_dir = manifests_dir
+        self._load_manifests = load_manifests
+        self._local = threading.local()
+        self.rebuilds = 0
+
+    # ===== 连接与同步 =====
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程使用独立连接；索引文件被删除后重新连接（新建的索引随后按清单重建）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and not os.path.exists(self.db_path):
+            self._close()
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def manifests_version(self) -> str:
+        """清单目录的修改时间，增删清单时会变化"""
+        try:
+            return str(os.stat(self.manifests_dir).st_mtime_ns)
+        except OSError:
+            return ''
+
+    def _synced_version(self, conn: sqlite3.Connection) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'manifests_version'").fetchone()
+        return row[0] if row else None
+
+    def _mark_synced(self, conn: sqlite3.Connection) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('manifests_version', ?)",
+                     (self.manifests_version(),))
+
+    def rebuild(self) -> int:
+        """从清单文件重建索引，返回备份数"""
+        manifests = list(self._load_manifests())
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM backups")
+            conn.executemany("INSERT OR REPLACE INTO backups (name, timestamp, manifest) VALUES (?, ?, ?)",
+                             [(m['name'], m['timestamp'], json.dumps(m, ensure_ascii=False)) for m in manifests])
+            self._mark_synced(conn)
+        self.rebuilds += 1
+        logger.info(f"Rebuilt backup catalog with {len(manifests)} backups")
+        return len(manifests)
+
+    def _with_connection(self, func):
+        """执行数据库操作，索引损坏时删除后重建再重试一次"""
+        try:
+            return func(self._connect())
+        except sqlite3.DatabaseError as e:
+            logger.error(f"Backup catalog is corrupt, rebuilding: {e}")
+            self._close()
+            if os.path.exists(self.db_path):
+                os.remove(self.db_path)
+            self.rebuild()
+            return func(self._connect())
+
+    def _ensure_fresh(self) -> sqlite3.Connection:
+        """查询前检查索引是否与清单目录一致，不一致时重建"""
+        def check(conn):
+            if self._synced_version(conn) != self.manifests_version():
+                self.rebuild()
+            return conn
+        return self._with_connection(check)
+
+    # ===== 写入（由 BackupStore 在持有存储锁时调用） =====
+
+    def _update(self, previous_version: str, apply) -> None:
+        """
+        增量更新索引：previous_version 为修改清单目录之前的版本，
+        与索引记录一致说明索引此前是最新的，只需应用本次变更，否则整体重建
+        """
+        def update(conn):
+            if self._synced_version(conn) != previous_version:
+                self.rebuild()
+                return
+            with conn:
+                apply(conn)
+                self._mark_synced(conn)
+        self._with_connection(update)
+
+    def add(self, manifest: Dict[str, Any], previous_version: str) -> None:
+        self._update(previous_version, lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO backups (name, timestamp, manifest) VALUES (?, ?, ?)",
+            (manifest['name'], manifest['timestamp'], json.dumps(manifest, ensure_ascii=False))))
+
+    def remove(self, names: Iterable[str], previous_version: str) -> None:
+        names = list(names)
+        self._update(previous_version, lambda conn: conn.executemany(
+            "DELETE FROM backups WHERE name = ?", [(name,) for name in names]))
+
+    # ===== 查询 =====
+
+    @staticmethod
+    def encode_cursor(manifest: Dict[str, Any]) -> str:
+        raw = json.dumps([manifest['timestamp'], manifest['name']]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[float, str]:
+        """解析分页游标，格式错误时抛出 ValueError"""
+        try:
+            timestamp, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return float(timestamp), str(name)
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+
+    def query(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        按时间倒序分页查询，返回(清单列表, 下一页游标)
+
+        cursor 为上一页返回的游标；limit 为 None 时返回剩余全部，下一页游标为 None。
+        """
+        conn = self._ensure_fresh()
+        sql = "SELECT manifest FROM backups"
+        params: list = []
+        if cursor:
+            timestamp, name = self.decode_cursor(cursor)
+            sql += " WHERE timestamp < ? OR (timestamp = ? AND name < ?)"
+            params += [timestamp, timestamp, name]
+        sql += " ORDER BY timestamp DESC, name DESC"
+        if limit is not None:
+            # 多取一行判断是否还有下一页
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        manifests = [json.loads(row[0]) for row in conn.execute(sql, params)]
+        next_cursor = None
+        if limit is not None and len(manifests) > limit:
+            manifests = manifests[:limit]
+            next_cursor = self.encode_cursor(manifests[-1])
+        return manifests, next_cursor
+
+    def count(self) -> int:
+        return self._ensure_fresh().execute("SELECT COUNT(*) FROM backups").fetchone()[0]
@@ -0,0 +1,197 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 恢复/导入/级联删除前自动创建的回滚快照（pre_restore_*、pre_import_* 等）的名称前缀
+SNAPSHOT_PREFIX = 'pre_'
+
+
+class RetentionPolicy:
+    """
+    备份保留策略
+
+    满足任一规则的备份被保留：最近 keep_last 个；最近 keep_hourly 个小时、
+    keep_daily 天、keep_weekly 周中每个时间段最新的一个。之后若对象库实际占用
+    超过 max_bytes，再从最旧的备份开始删除（始终保留最新的一个）。各项为 0 表示不启用，
+    默认全部为 0，即保留所有备份。回滚快照（pre_*）默认与普通备份一样按上述规则保留；
+    keep_snapshots 大于 0 时回滚快照单独只保留最新的 keep_snapshots 个，不占用数量规则的名额。
+    """
+
+    def __init__(self, keep_last: int = 0, keep_hourly: int = 0, keep_daily: int = 0,
+                 keep_weekly: int = 0, max_bytes: int = 0, keep_snapshots: int = 0):
+        self.keep_last = keep_last
+        self.keep_hourly = keep_hourly
+        self.keep_daily = keep_daily
+        self.keep_weekly = keep_weekly
+        self.max_bytes = max_bytes
+        self.keep_snapshots = keep_snapshots
+
+    @classmethod
+    def from_env(cls) -> 'RetentionPolicy':
+        """从 HOMEMAN_BACKUP_KEEP_* / HOMEMAN_BACKUP_MAX_MB 环境变量读取策略，未设置的规则不启用"""
+        return cls(
+            keep_last=int(os.getenv('HOMEMAN_BACKUP_KEEP_LAST', '0')),
+            keep_hourly=int(os.getenv('HOMEMAN_BACKUP_KEEP_HOURLY', '0')),
+            keep_daily=int(os.getenv('HOMEMAN_BACKUP_KEEP_DAILY', '0')),
+            keep_weekly=int(os.getenv('HOMEMAN_BACKUP_KEEP_WEEKLY', '0')),
+            max_bytes=int(float(os.getenv('HOMEMAN_BACKUP_MAX_MB', '0')) * 1024 * 1024),
+            keep_snapshots=int(os.getenv('HOMEMAN_BACKUP_KEEP_SNAPSHOTS', '0'))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """是否设置了任一规则；未设置时不会删除任何备份"""
+        return any((self.keep_last, self.keep_hourly, self.keep_daily, self.keep_weekly, self.max_bytes,
+                    self.keep_snapshots))
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            'keep_last': self.keep_last,
+            'keep_hourly': self.keep_hourly,
+            'keep_daily': self.keep_daily,
+            'keep_weekly': self.keep_weekly,
+            'max_bytes': self.max_bytes,
+            'keep_snapshots': self.keep_snapshots
+        }
+
+    @staticmethod
+    def _keep_buckets(manifests: List[Dict[str, Any]], count: int, bucket_format: str, keep: set) -> None:
+        """每个时间段保留最新的一个备份，最多 count 个时间段"""
+        seen = set()
+        for manifest in manifests:
+            if len(seen) >= count:
+                break
+            bucket = datetime.fromtimestamp(manifest['timestamp']).strftime(bucket_format)
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(manifest['name'])
+
+    @staticmethod
+    def _stored_bytes(manifests: List[Dict[str, Any]]) -> int:
+        """一组备份在对象库中的实际占用（相同内容只计一次）"""
+        objects = {}
+        for manifest in manifests:
+            for entry in manifest.get('files', {}).values():
+                objects[entry['hash']] = entry['size']
+        return sum(objects.values())
+
+    def select(self, manifests: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """按策略划分备份，返回(保留列表, 删除列表)，均按时间倒序"""
+        manifests = sorted(manifests, key=lambda manifest: manifest['timestamp'], reverse=True)
+        keep = set()
+        backups = manifests
+        if self.keep_snapshots > 0:
+            # 回滚快照单独保留最新的 keep_snapshots 个，不占用数量规则的名额
+            snapshots = [manifest for manifest in manifests if manifest['name'].startswith(SNAPSHOT_PREFIX)]
+            keep.update(manifest['name'] for manifest in snapshots[:self.keep_snapshots])
+            backups = [manifest for manifest in manifests if not manifest['name'].startswith(SNAPSHOT_PREFIX)]
+        if not any((self.keep_last, self.keep_hourly, self.keep_daily, self.keep_weekly)):
+            # 未设置数量规则时全部保留，只受 max_bytes 限制
+            keep.update(manifest['name'] for manifest in backups)
+        else:
+            keep.update(manifest['name'] for manifest in backups[:max(self.keep_last, 0)])
+        if self.keep_hourly > 0:
+            self._keep_buckets(backups, self.keep_hourly, '%Y%m%d%H', keep)
+        if self.keep_daily > 0:
+            self._keep_buckets(backups, self.keep_daily, '%Y%m%d', keep)
+        if self.keep_weekly > 0:
+            self._keep_buckets(backups, self.keep_weekly, '%G%V', keep)
+
+        kept = [manifest for manifest in manifests if manifest['name'] in keep]
+        if self.max_bytes > 0:
+            while len(kept) > 1 and self._stored_bytes(kept) > self.max_bytes:
+                keep.discard(kept.pop()['name'])
+
+        return kept, [manifest for manifest in manifests if manifest['name'] not in keep]
+
+
+class BackupPruner:
+    """
+    后台备份清理线程
+
+    每隔 interval 秒（或创建备份后被 wake 唤醒时）按保留策略删除过期备份，
+    清理在后台线程执行，不占用请求处理时间。多个 worker 进程各自调用 start 时，
+    只有持有备份库清理锁的一个进程执行定时清理，其余进程等待，持有者退出后接替。
+    """
+
+    def __init__(self, backup_store, policy: RetentionPolicy, interval: float = 3600):
+        self.backup_store = backup_store
+        self.policy = policy
+        self.interval = interval
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.leader = False
+
+    def start(self) -> None:
+        """启动后台线程（重复调用无副作用）；策略未设置任何规则时不启动"""
+        if not self.policy.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name='backup-pruner', daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """
+        请求尽快执行一次清理
+
+        未启动时忽略；当前进程不是执行定时清理的进程时，在临时线程中清理一次
+        """
+        if self._thread is None:
+            return
+        if self.leader:
+            self._wake.set()
+        else:
+            threading.Thread(target=self._prune_logged, name='backup-pruner-once', daemon=True).start()
+
+    def _prune_logged(self) -> None:
+        try:
+            self.prune()
+        except Exception as e:
+            logger.error(f"Backup pruning failed: {e}")
+
+    def _run(self) -> None:
+        try:
+            # 阻塞直到成为唯一执行定时清理的进程，锁随进程退出释放
+            with self.backup_store.pruner_lock():
+                self.leader = True
+                while True:
+                    self._prune_logged()
+                    self._wake.wait(self.interval)
+                    self._wake.clear()
+        except Exception as e:
+            logger.error(f"Backup pruner stopped: {e}")
+
+    def prune(self) -> Dict[str, Any]:
+        """执行一次清理，返回清理报告"""
+        with self._lock:
+            started = time.time()
+            kept, expired = self.policy.select(self.backup_store.list_manifests())
+            reclaimed = self.backup_store.delete_many([manifest['name'] for manifest in expired]) if expired else 0
+
+            report = {
+                'time': datetime.fromtimestamp(started).strftime('%Y-%m-%d %H:%M:%S'),
+                'kept': len(kept),
+                'pruned': [manifest['name'] for manifest in expired],
+                'reclaimed_bytes': reclaimed,
+                'duration_ms': round((time.time() - started) * 1000, 1)
+            }
+            self.last_report = report
+            if expired:
+                logger.info(f"Pruned {len(expired)} backups, kept {len(kept)}, reclaimed {reclaimed} bytes")
+            return report
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'policy': self.policy.to_dict(),
+            'interval': self.interval,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'leader': self.leader,
+            'last_run': self.last_report
+        }
@@ -0,0 +1,516 @@
+import io
+import os
+import re
+import json
+import zlib
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.backup_catalog import BackupCatalog
+from utils.line_delta import apply_delta, make_delta
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 备份名称只允许字母、数字、下划线、点和短横线，防止路径穿越
+BACKUP_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+class BackupStore:
+    """
+    内容寻址的备份存储
+
+    目录结构（位于 backups/ 下）:
+        objects/ab/abcdef...   按 sha256 存储的文件内容，相同内容只存一份
+        objects/ab/abcdef.delta 启用增量模式时，新内容可存为相对上一个备份同名文件的按行差异
+        manifests/<名称>.json  每个备份的清单：时间、文件名及其内容哈希和大小
+        refs.json              每个对象被多少个清单引用，删除备份时引用归零的对象被回收
+        catalog.db             清单的 SQLite 索引，列表与分页查询不再扫描清单目录
+
+    写操作（创建、删除、迁移）持有 backup-store 文件锁，读操作无需加锁。
+
+    增量模式（delta_chain > 0）下差异链长度不超过 delta_chain，超过时重新存一份完整内容（关键帧），
+    还原任一文件最多应用 delta_chain 次差异；差异对象引用其基准对象，基准在差异删除前不会被回收。
+    还原出的内容按 LRU 缓存，总大小不超过 cache_bytes。
+    """
+
+    OBJECTS_DIR = 'objects'
+    MANIFESTS_DIR = 'manifests'
+    REFS_FILE = 'refs.json'
+    CATALOG_FILE = 'catalog.db'
+    LOCK_NAME = 'backup-store'
+    PRUNER_LOCK_NAME = 'backup-pruner'
+    DELTA_SUFFIX = '.delta'
+
+    def __init__(self, backup_dir: str, file_locks, delta_chain: int = 0, cache_bytes: int = 32 * 1024 * 1024):
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, self.OBJECTS_DIR)
+        self.manifests_dir = os.path.join(backup_dir, self.MANIFESTS_DIR)
+        self.refs_file = os.path.join(backup_dir, self.REFS_FILE)
+        self._file_locks = file_locks
+        self.delta_chain = delta_chain
+        # 还原内容缓存: {哈希: 内容}
+        self._cache = OrderedDict()
+        self._cache_bytes = cache_bytes
+        self._cache_size = 0
+        self._cache_lock = threading.Lock()
+        # 统计缓存: (清单目录版本, 统计)，增删备份后失效
+        self._stats = None
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        self.catalog = BackupCatalog(os.path.join(backup_dir, self.CATALOG_FILE), self.manifests_dir,
+                                     self._iter_manifests)
+
+    # ===== 基础读写 =====
+
+    @staticmethod
+    def is_valid_name(name: str) -> bool:
+        """检查备份名称是否合法"""
+        return bool(name) and bool(BACKUP_NAME_PATTERN.match(name)) and name not in ('.', '..')
+
+    def _write_atomic(self, path: str, content: bytes) -> None:
+        """写临时文件并 fsync 后原子替换"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _delta_path(self, digest: str) -> str:
+        return self._object_path(digest) + self.DELTA_SUFFIX
+
+    def _manifest_path(self, name: str) -> str:
+        return os.path.join(self.manifests_dir, f'{name}.json')
+
+    def _stored_path(self, digest: str) -> Optional[str]:
+        """对象实际存储的文件（完整内容或差异），不存在时返回 None"""
+        for path in (self._object_path(digest), self._delta_path(digest)):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _load_delta(self, digest: str) -> Optional[Dict[str, Any]]:
+        """读取差异对象 {base, depth, ops}，对象以完整内容存储时返回 None"""
+        try:
+            with open(self._delta_path(digest), 'rb') as f:
+                return json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+    def _make_delta(self, content: bytes, base: Optional[str]) -> Optional[bytes]:
+        """
+        生成相对 base 的差异对象内容
+
+        未启用增量模式、无基准、链长已达上限（需要关键帧）、内容不是文本，
+        或差异不足完整内容一半大小时返回 None，改为存完整内容。
+        """
+        if self.delta_chain <= 0 or not base or self._stored_path(base) is None:
+            return None
+        base_delta = self._load_delta(base)
+        depth = (base_delta['depth'] if base_delta else 0) + 1
+        if depth > self.delta_chain:
+            return None
+
+        ops = make_delta(self.read_object(base), content)
+        if ops is None:
+            return None
+        record = zlib.compress(json.dumps({'base': base, 'depth': depth, 'ops': ops}).encode('utf-8'))
+        return record if len(record) * 2 < len(content) else None
+
+    def _put_object(self, content: bytes, refs: Dict[str, int], base: Optional[str] = None) -> str:
+        """
+        存储文件内容，已存在相同内容时直接复用，返回内容哈希
+
+        base 为上一个备份中同名文件的哈希，增量模式下据此存储差异，并为基准增加一次引用。
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        if self._stored_path(digest) is not None:
+            return digest
+
+        os.makedirs(os.path.dirname(self._object_path(digest)), exist_ok=True)
+        delta = self._make_delta(content, base) if base != digest else None
+        if delta is None:
+            self._write_atomic(self._object_path(digest), content)
+        else:
+            self._write_atomic(self._delta_path(digest), delta)
+            refs[base] = refs.get(base, 0) + 1
+            self._cache_put(digest, content)
+        return digest
+
+    def _cache_get(self, digest: str) -> Optional[bytes]:
+        with self._cache_lock:
+            content = self._cache.get(digest)
+            if content is not None:
+                self._cache.move_to_end(digest)
+            return content
+
+    def _cache_put(self, digest: str, content: bytes) -> None:
+        if len(content) > self._cache_bytes:
+            return
+        with self._cache_lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return
+            self._cache[digest] = content
+            self._cache_size += len(content)
+            while self._cache_size > self._cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_size -= len(evicted)
+
+    def _cache_discard(self, digest: str) -> None:
+        with self._cache_lock:
+            content = self._cache.pop(digest, None)
+            if content is not None:
+                self._cache_size -= len(content)
+
+    def open_object(self, digest: str):
+        """以二进制只读方式打开对象，用于流式读取（差异对象还原后从内存读取）"""
+        try:
+            return open(self._object_path(digest), 'rb')
+        except FileNotFoundError:
+            return io.BytesIO(self.read_object(digest))
+
+    def read_object(self, digest: str) -> bytes:
+        """读取对象内容，差异对象沿差异链找到关键帧（或已缓存的内容）后依次还原"""
+        content = self._cache_get(digest)
+        if content is not None:
+            return content
+
+        chain = []
+        current = digest
+        while True:
+            content = self._cache_get(current)
+            if content is not None:
+                break
+            try:
+                with open(self._object_path(current), 'rb') as f:
+                    content = f.read()
+                break
+            except FileNotFoundError:
+                delta = self._load_delta(current)
+                if delta is None:
+                    raise FileNotFoundError(f"备份对象不存在: {current}")
+                chain.append((current, delta))
+                current = delta['base']
+
+        for current, delta in reversed(chain):
+            content = apply_delta(content, delta['ops'])
+            self._cache_put(current, content)
+        if chain and hashlib.sha256(content).hexdigest() != digest:
+            raise ValueError(f"备份对象还原后校验失败: {digest}")
+        return content
+
+    def _load_refs(self) -> Dict[str, int]:
+        """读取引用计数，文件缺失或损坏时根据所有清单重建"""
+        try:
+            with open(self.refs_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            refs = self._compute_refs()
+            logger.info(f"Rebuilt backup reference counts: {len(refs)} objects")
+            return refs
+
+    def _compute_refs(self) -> Dict[str, int]:
+        """按所有清单计算引用计数：每个清单引用计一次，每个仍被需要的差异对象为其基准计一次"""
+        refs = {}
+        for manifest in self._iter_manifests():
+            for digest in self._manifest_objects(manifest):
+                refs[digest] = refs.get(digest, 0) + 1
+        pending = list(refs)
+        while pending:
+            delta = self._load_delta(pending.pop())
+            if delta is None:
+                continue
+            base = delta['base']
+            if base not in refs:
+                pending.append(base)
+            refs[base] = refs.get(base, 0) + 1
+        return refs
+
+    def _save_refs(self, refs: Dict[str, int]) -> None:
+        self._write_atomic(self.refs_file, json.dumps(refs, sort_keys=True).encode('utf-8'))
+
+    @staticmethod
+    def _manifest_objects(manifest: Dict[str, Any]) -> List[str]:
+        """清单引用的所有对象"""
+        return [entry['hash'] for entry in manifest.get('files', {}).values()]
+
+    # ===== 清单 =====
+
+    def get_manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        """读取备份清单，不存在时返回 None"""
+        if not self.is_valid_name(name):
+            return None
+        try:
+            with open(self._manifest_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def exists(self, name: str) -> bool:
+        return self.is_valid_name(name) and os.path.exists(self._manifest_path(name))
+
+    def get_manifest_path(self, name: str) -> str:
+        return self._manifest_path(name)
+
+    def _iter_manifests(self):
+        for filename in os.listdir(self.manifests_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.manifests_dir, filename), 'r', encoding='utf-8') as f:
+                    yield json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Invalid backup manifest {filename}: {e}")
+
+    def list_manifests(self) -> List[Dict[str, Any]]:
+        """列出所有备份清单，按时间倒序"""
+        return self.catalog.query()[0]
+
+    def query(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """分页列出备份清单，返回(清单列表, 下一页游标)，游标无效时抛出 ValueError"""
+        return self.catalog.query(limit, cursor)
+
+    def read_file(self, name: str, filename: str) -> Optional[bytes]:
+        """读取备份中某个文件的内容，不存在时返回 None"""
+        manifest = self.get_manifest(name)
+        if manifest is None or filename not in manifest.get('files', {}):
+            return None
+        return self.read_object(manifest['files'][filename]['hash'])
+
+    def read_files(self, name: str) -> Optional[Dict[str, bytes]]:
+        """读取备份中的全部文件 {文件名: 内容}，备份不存在时返回 None"""
+        manifest = self.get_manifest(name)
+        if manifest is None:
+            return None
+        return {filename: self.read_object(entry['hash']) for filename, entry in manifest.get('files', {}).items()}
+
+    # ===== 创建与删除 =====
+
+    def _unique_name(self, base_name: str) -> str:
+        name = base_name
+        suffix = 2
+        while os.path.exists(self._manifest_path(name)):
+            name = f'{base_name}_{suffix}'
+            suffix += 1
+        return name
+
+    def create(self, files: Dict[str, bytes], name: Optional[str] = None,
+               timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """
+        创建备份：未出现过的文件内容写入对象库，再写入清单并增加引用计数
+
+        files 为 {文件名: 内容}；name 省略时按时间生成 backup_YYYYmmdd_HHMMSS。
+        """
+        if timestamp is None:
+            timestamp = datetime.now().timestamp()
+        created = datetime.fromtimestamp(timestamp)
+
+        with self._file_locks.lock(self.LOCK_NAME):
+            name = self._unique_name(name or f"backup_{created.strftime('%Y%m%d_%H%M%S')}")
+            refs = self._load_refs()
+            # 增量模式下以最近一个备份中的同名文件为差异基准
+            previous = {}
+            if self.delta_chain > 0:
+                latest = self.catalog.query(limit=1)[0]
+                if latest:
+                    previous = {filename: entry['hash'] for filename, entry in latest[0].get('files', {}).items()}
+
+            entries = {}
+            for filename, content in files.items():
+                digest = self._put_object(content, refs, previous.get(filename))
+                entries[filename] = {'hash': digest, 'size': len(content)}
+
+            manifest = {
+                'name': name,
+                'timestamp': timestamp,
+                'date': created.strftime('%Y-%m-%d %H:%M:%S'),
+                'size': sum(entry['size'] for entry in entries.values()),
+                'files': entries
+            }
+
+            for digest in self._manifest_objects(manifest):
+                refs[digest] = refs.get(digest, 0) + 1
+            self._save_refs(refs)
+            previous_version = self.catalog.manifests_version()
+            self._write_atomic(self._manifest_path(name), json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+            self.catalog.add(manifest, previous_version)
+            self._stats = None
+
+        logger.info(f"Created backup manifest {name} with {len(entries)} files")
+        return manifest
+
+    def pruner_lock(self):
+        """后台清理的跨进程锁：多个进程中只有持有该锁的一个执行定时清理"""
+        return self._file_locks.lock(self.PRUNER_LOCK_NAME)
+
+    def delete(self, name: str) -> bool:
+        """删除备份清单，并回收引用归零的对象"""
+        if self.get_manifest(name) is None:
+            return False
+        self.delete_many([name])
+        return True
+
+    def delete_many(self, names: List[str]) -> int:
+        """批量删除备份（只读写一次引用计数），返回回收的字节数"""
+        reclaimed = 0
+        with self._file_locks.lock(self.LOCK_NAME):
+            # 先读取引用计数再删除清单（引用计数缺失时按现有清单重建，需包含这些清单）
+            refs = self._load_refs()
+            previous_version = self.catalog.manifests_version()
+            deleted = []
+            for name in names:
+                manifest = self.get_manifest(name)
+                if manifest is None:
+                    continue
+                os.remove(self._manifest_path(name))
+                deleted.append(name)
+                for digest in self._manifest_objects(manifest):
+                    count = refs.get(digest, 0) - 1
+                    if count > 0:
+                        refs[digest] = count
+                        continue
+                    refs.pop(digest, None)
+                    reclaimed += self._remove_object(digest, refs)
+            self._save_refs(refs)
+            if deleted:
+                self.catalog.remove(deleted, previous_version)
+            self._stats = None
+
+        logger.info(f"Deleted {len(names)} backups, reclaimed {reclaimed} bytes")
+        return reclaimed
+
+    def _remove_object(self, digest: str, refs: Optional[Dict[str, int]] = None) -> int:
+        """
+        删除对象文件，返回回收的字节数
+
+        传入 refs 时，删除差异对象会减少其基准的引用，基准引用归零时一并删除。
+        """
+        self._cache_discard(digest)
+        delta = self._load_delta(digest) if refs is not None else None
+        reclaimed = 0
+        for path in (self._object_path(digest), self._delta_path(digest)):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                reclaimed += size
+            except FileNotFoundError:
+                pass
+
+        if delta is not None:
+            base = delta['base']
+            count = refs.get(base, 0) - 1
+            if count > 0:
+                refs[base] = count
+            else:
+                refs.pop(base, None)
+                reclaimed += self._remove_object(base, refs)
+        return reclaimed
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """按所有清单重新计算引用计数，删除未被引用的对象和空的前缀目录（修复中断的删除操作）"""
+        with self._file_locks.lock(self.LOCK_NAME):
+            refs = self._compute_refs()
+
+            removed = 0
+            reclaimed = 0
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for filename in os.listdir(prefix_dir):
+                    digest = filename[:-len(self.DELTA_SUFFIX)] if filename.endswith(self.DELTA_SUFFIX) else filename
+                    if digest not in refs:
+                        reclaimed += self._remove_object(digest)
+                        removed += 1
+                # 删除对象后留下的空前缀目录（持有存储锁，不会与写入新对象冲突）
+                if not os.listdir(prefix_dir):
+                    os.rmdir(prefix_dir)
+            self._save_refs(refs)
+            self._stats = None
+
+        return {'objects': len(refs), 'removed': removed, 'reclaimed_bytes': reclaimed}
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        对象库统计：备份数、对象数及实际占用空间
+
+        统计需要遍历全部对象和清单，结果按清单目录版本缓存：增删备份（包括其他进程）
+        会改变版本，未变化时直接返回上次的结果。
+        """
+        version = self.catalog.manifests_version()
+        cached = self._stats
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
+
+        refs = self._load_refs()
+        stored = 0
+        deltas = 0
+        for digest in refs:
+            path = self._stored_path(digest)
+            if path is None:
+                continue
+            stored += os.path.getsize(path)
+            deltas += path.endswith(self.DELTA_SUFFIX)
+        manifests = self.list_manifests()
+        stats = {
+            'backups': len(manifests),
+            'objects': len(refs),
+            'delta_objects': deltas,
+            'logical_bytes': sum(manifest.get('size', 0) for manifest in manifests),
+            'stored_bytes': stored
+        }
+        # 使用统计前的版本，统计期间有增删时下次访问会重新统计
+        self._stats = (version, stats)
+        return dict(stats)
+
+    # ===== 迁移 =====
+
+    @staticmethod
+    def _legacy_timestamp(name: str, path: str) -> float:
+        """旧版备份的时间：优先取目录名中的时间，否则取目录修改时间"""
+        try:
+            return datetime.strptime(name, 'backup_%Y%m%d_%H%M%S').timestamp()
+        except ValueError:
+            return os.stat(path).st_mtime
+
+    def migrate_legacy_backups(self) -> int:
+        """将旧版 backups/backup_<时间> 目录转换为清单，转换后删除原目录，返回迁移的备份数"""
+        migrated = 0
+        with self._file_locks.lock(self.LOCK_NAME):
+            for entry in sorted(os.listdir(self.backup_dir)):
+                legacy_path = os.path.join(self.backup_dir, entry)
+                if entry in (self.OBJECTS_DIR, self.MANIFESTS_DIR) or not os.path.isdir(legacy_path):
+                    continue
+                if not self.is_valid_name(entry) or os.path.exists(self._manifest_path(entry)):
+                    continue
+
+                files = {}
+                for filename in sorted(os.listdir(legacy_path)):
+                    file_path = os.path.join(legacy_path, filename)
+                    if os.path.isfile(file_path):
+                        with open(file_path, 'rb') as f:
+                            files[filename] = f.read()
+
+                self.create(files, name=entry, timestamp=self._legacy_timestamp(entry, legacy_path))
+                shutil.rmtree(legacy_path)
+                migrated += 1
+
+        if migrated:
+            logger.info(f"Migrated {migrated} legacy backup directories to the object store")
+        return migrated
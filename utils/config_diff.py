@@ -0,0 +1,215 @@
+import os
+import difflib
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import yaml_backend
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 结构化差异展开的层数：第一层为分组（或顶层字段），第二层为分组内的条目
+STRUCTURAL_DEPTH = 2
+
+# 参与比较的配置文件（与备份、恢复的文件一致）
+CONFIG_FILES = ['settings.yaml', 'bookmarks.yaml', 'services.yaml', 'widgets.yaml', 'docker.yaml']
+
+
+def _as_mapping(value: Any) -> Optional[Dict[str, Any]]:
+    """
+    把配置节点转换为 {键: 值}
+
+    字典原样返回；Homepage 的分组/条目列表（每个元素是只有一个键的字典，如
+    [{'Media': [...]}, {'Tools': [...]}]）按键展开；其他类型返回 None。
+    """
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, list) and all(isinstance(item, dict) and len(item) == 1 for item in value):
+        mapping = {}
+        for item in value:
+            key = next(iter(item))
+            if not isinstance(key, str) or key in mapping:
+                return None
+            mapping[key] = item[key]
+        return mapping
+    return None
+
+
+def structural_diff(old: Any, new: Any) -> List[Dict[str, Any]]:
+    """
+    比较两份解析后的配置，返回变更列表
+
+    每项为 {'path': [分组, 条目], 'type': 'added'|'removed'|'modified', 'old', 'new'}，
+    修改的条目为字典时附带 'fields'（发生变化的字段名）。
+    """
+    changes: List[Dict[str, Any]] = []
+    _diff_node(old, new, [], changes)
+    return changes
+
+
+def _diff_node(old: Any, new: Any, path: List[str], changes: List[Dict[str, Any]]) -> None:
+    old_map = _as_mapping(old)
+    new_map = _as_mapping(new)
+    if len(path) < STRUCTURAL_DEPTH and old_map is not None and new_map is not None:
+        for key, value in old_map.items():
+            if key not in new_map:
+                changes.append({'path': path + [key], 'type': 'removed', 'old': value, 'new': None})
+            elif value != new_map[key]:
+                _diff_node(value, new_map[key], path + [key], changes)
+        for key, value in new_map.items():
+            if key not in old_map:
+                changes.append({'path': path + [key], 'type': 'added', 'old': None, 'new': value})
+        return
+
+    if old != new:
+        change = {'path': path, 'type': 'modified', 'old': old, 'new': new}
+        if isinstance(old, dict) and isinstance(new, dict):
+            change['fields'] = sorted(str(key) for key in set(old) | set(new) if old.get(key) != new.get(key))
+        changes.append(change)
+
+
+def text_diff(old: bytes, new: bytes) -> Tuple[str, int, int]:
+    """统一格式的文本差异（不含 ---/+++ 文件头），返回(差异文本, 新增行数, 删除行数)"""
+    old_lines = old.decode('utf-8', errors='replace').splitlines(keepends=True)
+    new_lines = new.decode('utf-8', errors='replace').splitlines(keepends=True)
+    lines = list(difflib.unified_diff(old_lines, new_lines))[2:]
+    added = sum(1 for line in lines if line.startswith('+'))
+    removed = sum(1 for line in lines if line.startswith('-'))
+    text = ''.join(line if line.endswith('\n') else line + '\n' for line in lines)
+    return text, added, removed
+
+
+class ConfigDiffer:
+    """
+    备份与当前配置、备份与备份之间的差异
+
+    每一侧的文件以内容哈希标识（备份清单中已记录，当前配置读取后计算），
+    同一对内容的差异只计算一次并按 LRU 缓存，重复预览时不再解析 YAML 和比较。
+    """
+
+    def __init__(self, yaml_manager, max_entries: int = 256):
+        self.yaml_manager = yaml_manager
+        # {(旧内容哈希, 新内容哈希): 差异结果}
+        self._cache = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ===== 内容来源 =====
+
+    def _live_files(self, filenames: List[str]) -> Dict[str, Tuple[str, Callable[[], bytes]]]:
+        """当前配置文件: {文件名: (内容哈希, 读取函数)}，不存在的文件内容为空"""
+        self.yaml_manager.flush_writes()
+        files = {}
+        for filename in filenames:
+            try:
+                with open(os.path.join(self.yaml_manager.config_path, filename), 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                content = b''
+            files[filename] = (hashlib.sha256(content).hexdigest(), partial(bytes, content))
+        return files
+
+    def _backup_files(self, manifest: Dict[str, Any]) -> Dict[str, Tuple[str, Callable[[], bytes]]]:
+        """备份中的文件: {文件名: (内容哈希, 读取函数)}，内容在缓存未命中时才读取"""
+        store = self.yaml_manager.backup_store
+        return {filename: (entry['hash'], partial(store.read_object, entry['hash']))
+                for filename, entry in manifest.get('files', {}).items()}
+
+    def compare(self, old_backup: Optional[str], new_backup: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        比较两个备份，None 表示当前配置；任一备份不存在时返回 None
+
+        返回 {'files': [每个文件的差异], 'changed_files': 有变化的文件数}；
+        与当前配置比较时只比较备份中包含的文件（即恢复会覆盖的文件）。
+        """
+        manifests = {}
+        for name in (old_backup, new_backup):
+            if name is not None:
+                manifests[name] = self.yaml_manager.backup_store.get_manifest(name)
+                if manifests[name] is None:
+                    return None
+
+        backup_names = [name for name in (old_backup, new_backup) if name is not None]
+        filenames = set()
+        for name in backup_names:
+            filenames.update(manifests[name].get('files', {}))
+        if not backup_names:
+            filenames.update(CONFIG_FILES)
+        filenames = sorted(filenames, key=lambda filename: (
+            CONFIG_FILES.index(filename) if filename in CONFIG_FILES else len(CONFIG_FILES), filename))
+
+        missing = (hashlib.sha256(b'').hexdigest(), partial(bytes))
+        sides = []
+        for name in (old_backup, new_backup):
+            files = self._backup_files(manifests[name]) if name is not None else self._live_files(filenames)
+            sides.append((name, files))
+
+        results = []
+        for filename in filenames:
+            (old_name, old_files), (new_name, new_files) = sides
+            old_key, load_old = old_files.get(filename, missing)
+            new_key, load_new = new_files.get(filename, missing)
+            result = self.diff(old_key, load_old, new_key, load_new,
+                               self._label(old_name, filename), self._label(new_name, filename))
+            results.append(dict(result, file=filename))
+        return {'files': results, 'changed_files': sum(1 for result in results if result['changed'])}
+
+    @staticmethod
+    def _label(backup_name: Optional[str], filename: str) -> str:
+        return f'{backup_name}/{filename}' if backup_name is not None else f'当前配置/{filename}'
+
+    # ===== 差异计算 =====
+
+    def diff(self, old_key: str, load_old: Callable[[], bytes], new_key: str, load_new: Callable[[], bytes],
+             old_label: str = 'old', new_label: str = 'new') -> Dict[str, Any]:
+        """
+        比较两份内容，返回 {'changed', 'changes', 'summary', 'text_diff', 'added_lines', 'removed_lines'}
+
+        old_key/new_key 为内容哈希，命中缓存时不调用读取函数；
+        内容无法解析为 YAML 时 changes 为 None，只提供文本差异。
+        """
+        cache_key = (old_key, new_key)
+        with self._lock:
+            result = self._cache.get(cache_key)
+            if result is not None:
+                self._cache.move_to_end(cache_key)
+                self.hits += 1
+        if result is None:
+            result = self._compute(load_old(), load_new()) if old_key != new_key else self._compute(b'', b'')
+            with self._lock:
+                self.misses += 1
+                self._cache[cache_key] = result
+                while len(self._cache) > self._max_entries:
+                    self._cache.popitem(last=False)
+
+        # 缓存的结果与文件名无关，文本差异的文件头按本次比较的双方生成
+        text = f'--- {old_label}\n+++ {new_label}\n{result["text_diff"]}' if result['changed'] else ''
+        return dict(result, text_diff=text)
+
+    @staticmethod
+    def _compute(old: bytes, new: bytes) -> Dict[str, Any]:
+        if old == new:
+            return {'changed': False, 'changes': [], 'summary': {'added': 0, 'removed': 0, 'modified': 0},
+                    'text_diff': '', 'added_lines': 0, 'removed_lines': 0}
+
+        text, added, removed = text_diff(old, new)
+        try:
+            changes = structural_diff(yaml_backend.safe_load(old.decode('utf-8')) if old else None,
+                                      yaml_backend.safe_load(new.decode('utf-8')) if new else None)
+            summary = {change_type: sum(1 for change in changes if change['type'] == change_type)
+                       for change_type in ('added', 'removed', 'modified')}
+        except Exception as e:
+            logger.warning(f"Structural diff unavailable: {e}")
+            changes = None
+            summary = None
+        return {'changed': True, 'changes': changes, 'summary': summary,
+                'text_diff': text, 'added_lines': added, 'removed_lines': removed}
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
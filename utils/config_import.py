@@ -0,0 +1,152 @@
+import os
+import shutil
+import logging
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils import yaml_backend
+from utils.config_restore import RESTORABLE_FILES
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 单个配置文件的大小上限，超过时拒绝导入（防止压缩炸弹）
+MAX_IMPORT_FILE_BYTES = 32 * 1024 * 1024
+# 读取归档成员时的块大小
+CHUNK_SIZE = 64 * 1024
+# 非 ZIP 上传时在内存中缓冲的上限，超过后转存到临时文件
+SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def detect_archive_format(head: bytes) -> Optional[str]:
+    """根据文件开头的魔数判断归档格式"""
+    if head.startswith(b'PK\x03\x04') or head.startswith(b'PK\x05\x06'):
+        return 'zip'
+    if head.startswith(b'\x1f\x8b'):
+        return 'tar.gz'
+    if len(head) >= 262 and head[257:262] == b'ustar':
+        return 'tar'
+    return None
+
+
+def _iter_members(stream: BinaryIO, archive_format: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """逐个产出归档中的普通文件 (路径, 可读文件对象)；tar 以流模式读取，不需要定位"""
+    if archive_format == 'zip':
+        if not stream.seekable():
+            # ZIP 的目录在文件末尾，不可定位的输入先转存
+            spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+            shutil.copyfileobj(stream, spooled, CHUNK_SIZE)
+            spooled.seek(0)
+            stream = spooled
+        with zipfile.ZipFile(stream) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as member:
+                        yield info.filename, member
+    else:
+        with tarfile.open(fileobj=stream, mode='r|*') as archive:
+            for info in archive:
+                if info.isfile():
+                    yield info.name, archive.extractfile(info)
+
+
+class ConfigImporter:
+    """
+    从 ZIP / tar(.gz) 归档批量导入配置文件
+
+    归档按成员逐块解压到配置目录中的临时文件，内存中不保留整个文件内容；
+    所有文件在线程池中并行解析和验证，汇总全部错误，全部通过后才作为整体原子提交
+    （提交前的配置自动保存为 pre_import 备份），任一文件无效则不修改任何配置。
+    """
+
+    def __init__(self, yaml_manager, validate: Callable[[str, Any], Tuple[bool, str]], max_workers: int = 4):
+        self.yaml_manager = yaml_manager
+        self.validate = validate
+        self.max_workers = max_workers
+
+    def _stage(self, stream: BinaryIO, archive_format: str, staged: Dict[str, str],
+               skipped: List[str], errors: List[Dict[str, Any]]) -> None:
+        """把归档中可识别的配置文件解压为临时文件"""
+        for path, member in _iter_members(stream, archive_format):
+            filename = os.path.basename(path)
+            if filename not in RESTORABLE_FILES or '__MACOSX' in path:
+                skipped.append(path)
+                continue
+            if filename in staged:
+                errors.append({'file': path, 'line': None, 'message': f'归档中包含多个 {filename}'})
+                continue
+
+            f, staged[filename] = self.yaml_manager.create_staged_file(filename)
+            size = 0
+            with f:
+                while size <= MAX_IMPORT_FILE_BYTES:
+                    chunk = member.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    f.write(chunk)
+            if size > MAX_IMPORT_FILE_BYTES:
+                self.yaml_manager.discard_staged_files({filename: staged.pop(filename)})
+                errors.append({'file': filename, 'line': None,
+                               'message': f'文件超过 {MAX_IMPORT_FILE_BYTES // (1024 * 1024)} MB 上限'})
+
+    def _check(self, filename: str, temp_path: str) -> List[Dict[str, Any]]:
+        """解析并验证单个文件，返回错误列表；解析结果验证后即丢弃"""
+        try:
+            with open(temp_path, 'rb') as f:
+                data = yaml_backend.safe_load(f)
+        except Exception as e:
+            mark = getattr(e, 'problem_mark', None)
+            return [{'file': filename, 'line': mark.line + 1 if mark else None,
+                     'message': f'YAML 语法错误: {getattr(e, "problem", None) or e}'}]
+
+        if data is not None:
+            is_valid, message = self.validate(filename[:-len('.yaml')], data)
+            if not is_valid:
+                return [{'file': filename, 'line': None, 'message': message}]
+        return []
+
+    def import_archive(self, stream: BinaryIO, archive_format: str,
+                       allowed_revisions: Optional[set] = None) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        导入归档，返回(成功状态, 消息, 详情)
+
+        详情包含 imported（导入的文件）、skipped（忽略的归档成员）、errors（全部错误）
+        以及成功时的 snapshot（导入前配置的备份名称）。
+        allowed_revisions 为调用方已知的版本号集合，被替换的文件当前版本不在其中时抛出 RevisionConflictError。
+        """
+        staged: Dict[str, str] = {}
+        skipped: List[str] = []
+        errors: List[Dict[str, Any]] = []
+        details = {'imported': [], 'skipped': skipped, 'errors': errors, 'snapshot': None}
+        committed = False
+        try:
+            try:
+                self._stage(stream, archive_format, staged, skipped, errors)
+            except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+                errors.append({'file': None, 'line': None, 'message': f'无法读取归档: {e}'})
+                return False, '导入失败，无法读取归档', details
+            if not staged and not errors:
+                errors.append({'file': None, 'line': None, 'message': '归档中没有可导入的配置文件'})
+
+            # 并行解析和验证全部文件（已有错误时也继续，一次报告所有错误）；
+            # 内存中同时存在的解析结果不超过 max_workers 个
+            if staged:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(staged))) as pool:
+                    for file_errors in pool.map(lambda item: self._check(*item), staged.items()):
+                        errors.extend(file_errors)
+            if errors:
+                return False, f'导入失败，共 {len(errors)} 个错误', details
+
+            details['snapshot'] = self.yaml_manager.commit_staged_files(staged, 'pre_import',
+                                                                        allowed_revisions=allowed_revisions)
+            committed = True
+            details['imported'] = sorted(staged, key=RESTORABLE_FILES.index)
+            logger.info(f"Imported {len(staged)} config files, snapshot {details['snapshot']}")
+            return True, f"成功导入 {len(staged)} 个文件，导入前的配置已保存为备份 {details['snapshot']}", details
+        finally:
+            if not committed:
+                self.yaml_manager.discard_staged_files(staged)
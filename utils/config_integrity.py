@@ -0,0 +1,140 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.config_tree import iter_services
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 参与整体检查的配置（顺序即报告中的顺序）
+INTEGRITY_CONFIGS = ['settings', 'bookmarks', 'services', 'widgets', 'docker']
+
+# 验证函数：接收解析后的配置，返回全部错误 [{'path', 'code', 'message'}]，空列表表示通过
+ErrorListValidator = Callable[[Any], List[Dict[str, str]]]
+
+
+class ConfigIntegrityChecker:
+    """
+    全部配置的整体验证与跨文件完整性检查
+
+    五个配置文件在线程池中并行解析和验证，每个文件的结果按文件指纹（mtime/大小/inode）缓存，
+    指纹未变化的文件直接复用上次的结论；跨文件检查（服务引用的 Docker 实例是否存在等）
+    按 services/docker 两个文件的指纹缓存。
+    """
+
+    def __init__(self, yaml_manager, validators: Dict[str, ErrorListValidator], max_workers: int = 5):
+        self.yaml_manager = yaml_manager
+        self.validators = validators
+        self.max_workers = max_workers
+        # {配置名: (文件指纹, 检查结果)}
+        self._results: Dict[str, tuple] = {}
+        # (services 指纹, docker 指纹, 问题列表)
+        self._cross_file: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_file(self, config_name: str) -> Dict[str, Any]:
+        """检查单个配置文件（指纹未变化时复用缓存），返回带本次耗时的结果"""
+        started = time.perf_counter()
+        file_path = self.yaml_manager.get_config_file_path(config_name)
+        fingerprint = self.yaml_manager.file_fingerprint(file_path)
+        with self._lock:
+            entry = self._results.get(config_name)
+            cached = entry is not None and entry[0] == fingerprint
+            if cached:
+                self.hits += 1
+        if cached:
+            result = entry[1]
+        else:
+            result = self._validate_file(config_name, file_path, fingerprint)
+            with self._lock:
+                self.misses += 1
+                self._results[config_name] = (fingerprint, result)
+        return dict(result, cached=cached, time_ms=round((time.perf_counter() - started) * 1000, 2))
+
+    def _validate_file(self, config_name: str, file_path: str, fingerprint: Optional[tuple]) -> Dict[str, Any]:
+        if fingerprint is None:
+            return {'valid': True, 'exists': False, 'message': '文件不存在，使用默认配置', 'errors': []}
+
+        try:
+            data, _ = self.yaml_manager._get_document(file_path)
+        except Exception as e:
+            mark = getattr(e, 'problem_mark', None)
+            error = {'path': '', 'code': 'syntax', 'line': mark.line + 1 if mark else None,
+                     'message': f'YAML 语法错误: {getattr(e, "problem", None) or e}'}
+            return {'valid': False, 'exists': True, 'message': error['message'], 'errors': [error]}
+
+        errors = []
+        validate = self.validators.get(config_name)
+        # 空文件与不存在的文件一样使用默认配置
+        if validate is not None and data not in ({}, []):
+            try:
+                errors = validate(data)
+            except Exception as e:
+                logger.error(f"Error validating {config_name}: {e}")
+                errors = [{'path': '', 'code': 'exception', 'message': f'验证异常: {e}'}]
+        if not errors:
+            return {'valid': True, 'exists': True, 'message': '验证通过', 'errors': []}
+        message = errors[0]['message'] if len(errors) == 1 else f"{errors[0]['message']} 等 {len(errors)} 个错误"
+        return {'valid': False, 'exists': True, 'message': message, 'errors': errors}
+
+    def _check_cross_file(self) -> List[Dict[str, Any]]:
+        """检查服务引用的 Docker 实例；按 services/docker 的文件指纹缓存"""
+        services_fingerprint = self.yaml_manager.file_fingerprint(self.yaml_manager.services_file)
+        docker_fingerprint = self.yaml_manager.file_fingerprint(self.yaml_manager.docker_file)
+        with self._lock:
+            entry = self._cross_file
+        if entry is not None and entry[:2] == (services_fingerprint, docker_fingerprint):
+            return entry[2]
+
+        services = self.yaml_manager._load_document(self.yaml_manager.services_file)
+        # 与 load_docker 一致：docker.yaml 为空时使用默认实例
+        docker = self.yaml_manager._load_document(self.yaml_manager.docker_file) or self.yaml_manager.load_docker()
+        instances = set(docker) if isinstance(docker, dict) else set()
+
+        issues = []
+        for pointer, _, name, config in iter_services(services):
+            server = config.get('server')
+            if server is not None and server not in instances:
+                issues.append({'config': 'services', 'path': pointer, 'code': 'docker-server',
+                               'message': f"服务 '{name}' 引用的 Docker 实例 '{server}' 未在 docker.yaml 中定义"})
+            elif server is None and config.get('container'):
+                issues.append({'config': 'services', 'path': pointer, 'code': 'docker-container',
+                               'message': f"服务 '{name}' 配置了 container 但没有指定 server"})
+
+        with self._lock:
+            self._cross_file = (services_fingerprint, docker_fingerprint, issues)
+        return issues
+
+    def check(self) -> Dict[str, Any]:
+        """
+        检查全部配置，返回 {'valid', 'results', 'cross_file', 'issues', 'time_ms'}
+
+        results 为 {配置名: {'valid', 'message', 'errors', 'exists', 'cached', 'time_ms'}}，
+        issues 汇总所有文件的错误和跨文件问题，每项为 {'config', 'path', 'code', 'message'}。
+        """
+        started = time.perf_counter()
+        # 合并写入落盘后再取指纹，保证检查的是最新内容
+        self.yaml_manager.flush_writes()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(INTEGRITY_CONFIGS))) as pool:
+            results = dict(zip(INTEGRITY_CONFIGS, pool.map(self._check_file, INTEGRITY_CONFIGS)))
+        cross_file = self._check_cross_file()
+
+        issues = []
+        for config_name, result in results.items():
+            issues.extend(dict(error, config=config_name) for error in result['errors'])
+        issues.extend(cross_file)
+        return {
+            'valid': not issues,
+            'results': results,
+            'cross_file': cross_file,
+            'issues': issues,
+            'time_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'entries': len(self._results), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,78 @@
+import copy
+from typing import Any, List, Sequence, Tuple
+
+# 可以从备份恢复的配置文件
+RESTORABLE_FILES = ['settings.yaml', 'bookmarks.yaml', 'services.yaml', 'widgets.yaml', 'docker.yaml']
+
+
+def _find_child(node: Any, key: str) -> Tuple[bool, Any]:
+    """在字典或 Homepage 分组列表（[{名称: 内容}, ...]）中查找子节点，返回(是否存在, 内容)"""
+    if isinstance(node, dict):
+        return (key in node), node.get(key)
+    if isinstance(node, list):
+        for item in node:
+            if isinstance(item, dict) and len(item) == 1 and key in item:
+                return True, item[key]
+    return False, None
+
+
+def _set_child(node: Any, key: str, value: Any) -> None:
+    """设置子节点：列表中已有同名元素时原位替换，否则追加到末尾"""
+    if isinstance(node, dict):
+        node[key] = value
+        return
+    for index, item in enumerate(node):
+        if isinstance(item, dict) and len(item) == 1 and key in item:
+            node[index] = {key: value}
+            return
+    node.append({key: value})
+
+
+def _remove_child(node: Any, key: str) -> None:
+    if isinstance(node, dict):
+        node.pop(key, None)
+    else:
+        node[:] = [item for item in node if not (isinstance(item, dict) and len(item) == 1 and key in item)]
+
+
+def _empty_like(value: Any) -> Any:
+    return [] if isinstance(value, list) else {}
+
+
+def _restore_path(live: Any, backup: Any, path: Sequence[str]) -> None:
+    key = path[0]
+    if not isinstance(live, (dict, list)) or (backup is not None and not isinstance(backup, (dict, list))):
+        raise ValueError(f"无法按路径恢复: {' / '.join(path)}")
+
+    in_backup, backup_value = _find_child(backup, key)
+    in_live, live_value = _find_child(live, key)
+    if not in_backup and not in_live:
+        raise ValueError(f"备份和当前配置中都不存在: {key}")
+
+    if len(path) == 1:
+        # 备份中存在则覆盖为备份内容，不存在则从当前配置中删除
+        if in_backup:
+            _set_child(live, key, copy.deepcopy(backup_value))
+        else:
+            _remove_child(live, key)
+        return
+
+    if live_value is None:
+        live_value = _empty_like(backup_value)
+        _set_child(live, key, live_value)
+    _restore_path(live_value, backup_value, path[1:])
+
+
+def merge_selected(live: Any, backup: Any, paths: List[Sequence[str]]) -> Any:
+    """
+    从备份中恢复选定的分组或条目，其余内容保持当前配置不变
+
+    paths 中每项为 [分组] 或 [分组, 条目]（settings 等字典配置为 [字段] 或 [字段, 子字段]）；
+    路径无效时抛出 ValueError。返回合并后的新数据，不修改 live。
+    """
+    result = copy.deepcopy(live) if live is not None else _empty_like(backup)
+    for path in paths:
+        if not path or len(path) > 2 or not all(isinstance(key, str) for key in path):
+            raise ValueError(f"无效的恢复路径: {path}")
+        _restore_path(result, backup, list(path))
+    return result
@@ -0,0 +1,511 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.json_patch import make_pointer
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# ===== 声明式配置模式 =====
+#
+# 每个节点是一个字典，检查按以下顺序进行，遇到类型不符时不再检查该节点的其他规则：
+#   allowEmpty  值为空（''、None、False、0）时跳过整个节点
+#   ifType      值不是该类型时跳过整个节点（不报错）
+#   type        string / integer / boolean / array / object
+#   nonBlank    字符串去掉空白后不能为空
+#   enum        取值范围（编译为 frozenset）
+#   minimum / maximum、maxLength、minItems、format: 'url'
+#   requiredAny 对象中至少一个字段有值；required 对象中必须包含的字段（缺少任一个只报告一次）
+#   properties  按声明顺序检查的字段，字段节点可声明 required（必填）、dependsOn（另一字段有值时才检查）、
+#               allowedWhen（{'field': 字段, 'values': [...]}，仅当该字段取这些值时允许出现）
+#   additionalProperties  对象中每个值都按此节点检查，值的键作为消息中的 {name}
+#   items       数组中每个元素都按此节点检查，元素序号（从 1 开始）作为消息中的 {index}
+#   variants    依次应用的子节点（通常配合 ifType 按类型选择）
+#
+# 错误消息由 messages[规则名]（缺省为 message）生成，可用的占位符：
+#   {name} 条目名、{index} 元素序号、{value} 当前值、{type} 当前值的类型名、{choices} 取值范围
+# 错误代码默认按规则名确定，可用 codes[规则名] 覆盖。
+
+THEMES = ['light', 'dark']
+COLORS = [
+    'slate', 'gray', 'zinc', 'neutral', 'stone', 'amber', 'yellow',
+    'lime', 'green', 'emerald', 'teal', 'cyan', 'sky', 'blue',
+    'indigo', 'violet', 'purple', 'fuchsia', 'pink', 'rose', 'red', 'white'
+]
+HEADER_STYLES = ['underlined', 'boxed', 'clean', 'boxedWidgets']
+ICON_STYLES = ['gradient', 'theme']
+STATUS_STYLES = ['', 'dot', 'basic']
+TARGETS = ['_self', '_blank', '_top']
+LANGUAGES = [
+    'ca', 'de', 'en', 'es', 'fr', 'he', 'hr', 'hu', 'it',
+    'nb-NO', 'nl', 'pt', 'ru', 'sv', 'vi', 'zh-CN', 'zh-Hant'
+]
+BOOKMARK_STYLES = ['grid', 'icons']
+CARD_BLUR = ['', 'xs', 'sm', 'md', 'lg', 'xl', '2xl', '3xl']
+QUICKLAUNCH_PROVIDERS = ['google', 'duckduckgo', 'bing', 'baidu', 'brave', 'custom']
+WIDGET_TYPES = [
+    'healthchecks', 'uptimekuma', 'ping', 'portainer',
+    'plex', 'jellyfin', 'emby', 'sonarr', 'adguard',
+    'pihole', 'customapi', 'opnsense'
+]
+
+
+SETTINGS_SCHEMA = {
+    'type': 'object',
+    'message': "设置配置必须是字典格式，当前类型: {type}",
+    'properties': {
+        'theme': {'enum': THEMES, 'message': "无效的主题设置: {value}，支持的主题: {choices}"},
+        'color': {'enum': COLORS, 'message': "无效的颜色设置: {value}，支持的颜色: {choices}"},
+        'headerStyle': {'enum': HEADER_STYLES, 'message': "无效的页眉样式: {value}，支持的样式: {choices}"},
+        'iconStyle': {'enum': ICON_STYLES, 'message': "无效的图标样式: {value}，支持的样式: {choices}"},
+        'statusStyle': {'enum': STATUS_STYLES, 'message': "无效的状态样式: {value}，支持的样式: {choices}"},
+        'target': {'enum': TARGETS, 'message': "无效的链接目标: {value}，支持的目标: {choices}"},
+        'language': {'enum': LANGUAGES, 'message': "无效的语言设置: {value}，支持的语言: {choices}"},
+        'bookmarksStyle': {'enum': BOOKMARK_STYLES, 'message': "无效的书签样式: {value}，支持的样式: {choices}"},
+        'cardBlur': {'enum': CARD_BLUR, 'message': "无效的卡片模糊效果: {value}，支持的效果: {choices}"},
+        'maxGroupColumns': {'type': 'integer', 'minimum': 1, 'maximum': 8,
+                            'message': "最大分组列数必须是1-8之间的整数，当前值: {value}"},
+        'maxBookmarkGroupColumns': {'type': 'integer', 'minimum': 1, 'maximum': 8,
+                                    'message': "最大书签分组列数必须是1-8之间的整数，当前值: {value}"},
+        'quicklaunch': {'ifType': 'object', 'properties': {
+            'provider': {'enum': QUICKLAUNCH_PROVIDERS,
+                         'message': "无效的快速启动提供商: {value}，支持的提供商: {choices}"}
+        }},
+        **{field: {'type': 'boolean', 'message': f"字段 {field} 必须是布尔值，当前值: {{value}} ({{type}})"}
+           for field in ('hideVersion', 'showStats', 'useEqualHeights', 'fiveColumns', 'disableCollapse',
+                         'groupsInitiallyCollapsed', 'fullWidth', 'hideErrors', 'disableUpdateCheck')},
+        'startUrl': {'format': 'url', 'message': "无效的起始URL格式: {value}"},
+        'base': {'format': 'url', 'message': "无效的基础URL格式: {value}"},
+        'favicon': {'allowEmpty': True, 'format': 'url', 'message': "无效的favicon URL格式: {value}"},
+        'background': {'allowEmpty': True, 'variants': [
+            {'ifType': 'string', 'format': 'url', 'message': "无效的背景图片URL格式: {value}"},
+            {'ifType': 'object', 'properties': {
+                'image': {'format': 'url', 'message': "无效的背景图片URL格式: {value}"}
+            }}
+        ]}
+    }
+}
+
+# 服务条目（{name} 为服务名）
+SERVICE_SCHEMA = {
+    'type': 'object',
+    'codes': {'type': 'type'},
+    'message': "服务 '{name}' 的配置必须是字典格式，当前类型: {type}",
+    'properties': {
+        'href': {'required': True, 'format': 'url', 'messages': {
+            'required': "服务 '{name}' 缺少必需的 'href' 字段",
+            'format': "服务 '{name}' 的URL格式无效: {value}"
+        }},
+        'siteMonitor': {'allowEmpty': True, 'format': 'url',
+                        'message': "服务 '{name}' 的 siteMonitor URL格式无效: {value}"},
+        'ping': {'allowEmpty': True, 'format': 'url', 'message': "服务 '{name}' 的 ping URL格式无效: {value}"},
+        'statusStyle': {'enum': STATUS_STYLES,
+                        'message': "服务 '{name}' 的状态样式无效: {value}，支持的样式: {choices}"},
+        'target': {'enum': TARGETS, 'message': "服务 '{name}' 的链接目标无效: {value}，支持的目标: {choices}"},
+        'showStats': {'type': 'boolean',
+                      'message': "服务 '{name}' 的 showStats 必须是布尔值，当前值: {value} ({type})"}
+    }
+}
+
+# 书签条目：配置项列表（{name} 为书签名，{index} 为配置项序号）
+BOOKMARK_PREFIX = "书签 '{name}' 的配置项 #{index}"
+BOOKMARK_SCHEMA = {
+    'type': 'array',
+    'minItems': 1,
+    'codes': {'type': 'type'},
+    'messages': {
+        'type': "书签 '{name}' 的配置必须是列表格式，当前类型: {type}",
+        'minItems': "书签 '{name}' 的配置列表不能为空"
+    },
+    'items': {
+        'type': 'object',
+        'codes': {'type': 'type'},
+        'message': f"{BOOKMARK_PREFIX} 必须是字典格式，当前类型: {{type}}",
+        'properties': {
+            'href': {'required': True, 'format': 'url', 'messages': {
+                'required': f"{BOOKMARK_PREFIX} 缺少必需的 'href' 字段",
+                'format': f"{BOOKMARK_PREFIX} URL格式无效: {{value}}"
+            }},
+            'abbr': {'type': 'string', 'maxLength': 2, 'messages': {
+                'type': f"{BOOKMARK_PREFIX} abbr 必须是字符串，当前类型: {{type}}",
+                'maxLength': f"{BOOKMARK_PREFIX} 缩写长度不能超过2个字符，当前: {{value}}"
+            }},
+            'description': {'type': 'string',
+                            'message': f"{BOOKMARK_PREFIX} description 必须是字符串，当前类型: {{type}}"},
+            'icon': {'type': 'string', 'message': f"{BOOKMARK_PREFIX} icon 必须是字符串，当前类型: {{type}}"},
+            'target': {'enum': TARGETS,
+                       'message': f"{BOOKMARK_PREFIX} 链接目标无效: {{value}}，支持的目标: {{choices}}"}
+        }
+    }
+}
+
+WIDGETS_SCHEMA = {
+    'type': 'object',
+    'message': "小工具配置必须是字典格式，当前类型: {type}",
+    'additionalProperties': {
+        'type': 'object',
+        'message': "小工具 '{name}' 的配置必须是字典格式，当前类型: {type}",
+        'properties': {
+            'type': {'required': True, 'enum': WIDGET_TYPES, 'messages': {
+                'required': "小工具 '{name}' 缺少必需的 'type' 字段",
+                'enum': "小工具 '{name}' 的类型不支持: {value}，支持的类型: {choices}"
+            }},
+            'url': {'required': True, 'format': 'url', 'messages': {
+                'required': "小工具 '{name}' 缺少必需的 'url' 字段",
+                'format': "小工具 '{name}' 的URL格式无效: {value}"
+            }},
+            'refreshInterval': {'type': 'integer', 'minimum': 1000,
+                                'message': "小工具 '{name}' 的刷新间隔必须是大于等于1000的整数，当前值: {value}"},
+            'fields': {'type': 'array', 'message': "小工具 '{name}' 的 fields 必须是列表格式，当前类型: {type}"},
+            'mappings': {
+                'allowedWhen': {'field': 'type', 'values': ['customapi']},
+                'type': 'array',
+                'messages': {
+                    'allowedWhen': "小工具 '{name}' 的 mappings 字段只能用于 customapi 类型，当前类型: {other}",
+                    'type': "小工具 '{name}' 的 mappings 必须是列表格式，当前类型: {type}"
+                },
+                'items': {
+                    'type': 'object',
+                    'required': ['label', 'field'],
+                    'messages': {
+                        'type': "小工具 '{name}' 的 mapping #{index} 必须是字典格式，当前类型: {type}",
+                        'required': "小工具 '{name}' 的 mapping #{index} 缺少必需的 'label' 或 'field' 字段"
+                    }
+                }
+            }
+        }
+    }
+}
+
+DOCKER_SCHEMA = {
+    'type': 'object',
+    'message': "Docker配置必须是字典格式，当前类型: {type}",
+    'additionalProperties': {
+        'type': 'object',
+        'requiredAny': ['socket', 'host'],
+        'messages': {
+            'type': "Docker实例 '{name}' 的配置必须是字典格式，当前类型: {type}",
+            'requiredAny': "Docker实例 '{name}' 必须配置 'socket' 或 'host' 连接方式"
+        },
+        'properties': {
+            'host': {'allowEmpty': True, 'type': 'string', 'nonBlank': True,
+                     'message': "Docker实例 '{name}' 的 host 必须是非空字符串，当前值: {value}"},
+            'port': {'dependsOn': 'host', 'type': 'integer', 'minimum': 1, 'maximum': 65535,
+                     'message': "Docker实例 '{name}' 的端口必须是1-65535之间的整数，当前值: {value}"},
+            'socket': {'allowEmpty': True, 'type': 'string', 'nonBlank': True,
+                       'message': "Docker实例 '{name}' 的 socket 必须是非空字符串，当前值: {value}"},
+            **{field: {'type': 'boolean',
+                       'message': f"Docker实例 '{{name}}' 的 {field} 必须是布尔值，当前值: {{value}} ({{type}})"}
+               for field in ('showStats', 'swarm')},
+            **{field: {'type': 'string',
+                       'message': f"Docker实例 '{{name}}' 的 {field} 必须是字符串，当前类型: {{type}}"}
+               for field in ('username', 'password')},
+            'tls': {
+                'type': 'object',
+                'message': "Docker实例 '{name}' 的 TLS 配置必须是字典格式，当前类型: {type}",
+                'properties': {
+                    'skipVerify': {'type': 'boolean', 'message': "Docker实例 '{name}' 的 TLS skipVerify 必须是布尔值，当前值: {value} ({type})"},
+                    **{field: {'type': 'string',
+                               'message': f"Docker实例 '{{name}}' 的 TLS {field} 必须是字符串，当前类型: {{type}}"}
+                       for field in ('cert', 'key', 'ca')}
+                }
+            }
+        }
+    }
+}
+
+SCHEMAS = {
+    'settings': SETTINGS_SCHEMA,
+    'service': SERVICE_SCHEMA,
+    'bookmark': BOOKMARK_SCHEMA,
+    'widgets': WIDGETS_SCHEMA,
+    'docker': DOCKER_SCHEMA
+}
+
+
+# ===== 编译 =====
+
+TYPES = {'string': str, 'integer': int, 'boolean': bool, 'array': list, 'object': dict}
+
+# 各规则默认的错误代码
+DEFAULT_CODES = {
+    'type': 'invalid_type', 'nonBlank': 'invalid_value', 'enum': 'invalid_value', 'range': 'invalid_value',
+    'maxLength': 'invalid_value', 'minItems': 'empty', 'format': 'invalid_url', 'required': 'missing_field',
+    'requiredAny': 'missing_field', 'allowedWhen': 'invalid_value'
+}
+
+# 检查函数: check(值, 条目名, 序号, 路径, 错误列表)，错误为(相对路径, 错误代码, 错误信息)
+# 路径为 None（根节点）或 (上级路径, 键)，只在报错时才拼接为字符串
+Check = Callable[[Any, Any, Optional[int], Optional[tuple], list], None]
+
+# 只含这些键的字段节点只有类型规则
+TYPE_ONLY_KEYS = {'type', 'message', 'messages', 'codes'}
+
+# 字段不存在的标记
+_MISSING = object()
+
+
+def _resolve(path: Optional[tuple]) -> str:
+    """把 (上级路径, 键) 链拼接为相对路径字符串"""
+    keys = []
+    while path is not None:
+        path, key = path
+        keys.append(key)
+    return make_pointer(*reversed(keys))[1:]
+
+
+def _member(value: Any, choices: frozenset) -> bool:
+    """取值是否在范围内；列表、字典等不可哈希的值一定不在范围内"""
+    try:
+        return value in choices
+    except TypeError:
+        return False
+
+
+def _reporter(schema: Dict[str, Any], rule: str, field: Optional[str], choices: str = ''):
+    """生成某条规则的报错函数，消息模板在出错时才格式化"""
+    template = schema.get('messages', {}).get(rule) or schema.get('message') or f"字段 {field} 无效: {{value}}"
+    code = schema.get('codes', {}).get(rule, DEFAULT_CODES[rule])
+
+    def report(value, name, index, path, errors, **extra):
+        errors.append((_resolve(path), code, template.format(name=name, index=index, value=value, field=field,
+                                                             type=type(value).__name__, choices=choices, **extra)))
+    return report
+
+
+def _sequence(checks: List[Check]) -> Optional[Check]:
+    """依次执行多个检查函数；没有检查时返回 None，只有一个时直接返回它"""
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    if len(checks) == 2:
+        first, second = checks
+
+        def check(value, name, index, path, errors):
+            first(value, name, index, path, errors)
+            second(value, name, index, path, errors)
+        return check
+
+    def check(value, name, index, path, errors):
+        for rule in checks:
+            rule(value, name, index, path, errors)
+    return check
+
+
+def _compile_rules(schema: Dict[str, Any], url_check: Callable[[str], bool], field: Optional[str]) -> List[Check]:
+    """把节点中类型以外的规则编译为检查函数列表（调用时值的类型已经检查过）"""
+    checks: List[Check] = []
+
+    if schema.get('nonBlank'):
+        report_blank = _reporter(schema, 'nonBlank', field)
+
+        def check_blank(value, name, index, path, errors):
+            if not value.strip():
+                report_blank(value, name, index, path, errors)
+        checks.append(check_blank)
+
+    if 'enum' in schema:
+        choices = frozenset(schema['enum'])
+        report_enum = _reporter(schema, 'enum', field, ', '.join(schema['enum']))
+
+        def check_enum(value, name, index, path, errors):
+            if not _member(value, choices):
+                report_enum(value, name, index, path, errors)
+        checks.append(check_enum)
+
+    if 'minimum' in schema or 'maximum' in schema:
+        low, high = schema.get('minimum', float('-inf')), schema.get('maximum', float('inf'))
+        report_range = _reporter(schema, 'range', field)
+
+        def check_range(value, name, index, path, errors):
+            if not low <= value <= high:
+                report_range(value, name, index, path, errors)
+        checks.append(check_range)
+
+    if 'maxLength' in schema:
+        max_length = int(schema['maxLength'])
+        report_length = _reporter(schema, 'maxLength', field)
+
+        def check_length(value, name, index, path, errors):
+            if len(value) > max_length:
+                report_length(value, name, index, path, errors)
+        checks.append(check_length)
+
+    if 'minItems' in schema:
+        min_items = int(schema['minItems'])
+        report_items = _reporter(schema, 'minItems', field)
+
+        def check_min_items(value, name, index, path, errors):
+            if len(value) < min_items:
+                report_items(value, name, index, path, errors)
+        checks.append(check_min_items)
+
+    if schema.get('format') == 'url':
+        report_url = _reporter(schema, 'format', field)
+
+        # 与 _validate_url 一致：空值可以接受，非空值直接使用带缓存的判定
+        def check_url(value, name, index, path, errors):
+            if value and not (isinstance(value, str) and url_check(value)):
+                report_url(value, name, index, path, errors)
+        checks.append(check_url)
+
+    if 'requiredAny' in schema:
+        any_keys = tuple(schema['requiredAny'])
+        report_any = _reporter(schema, 'requiredAny', field)
+
+        def check_required_any(value, name, index, path, errors):
+            for key in any_keys:
+                if value.get(key):
+                    return
+            report_any(value, name, index, path, errors)
+        checks.append(check_required_any)
+
+    if isinstance(schema.get('required'), list):
+        required_keys = tuple(schema['required'])
+        report_required = _reporter(schema, 'required', field)
+
+        def check_required(value, name, index, path, errors):
+            for key in required_keys:
+                if key not in value:
+                    report_required(value, name, index, path, errors)
+                    return
+        checks.append(check_required)
+
+    if schema.get('properties'):
+        check_properties = _compile_properties(schema['properties'], url_check)
+        if check_properties is not None:
+            checks.append(check_properties)
+
+    if 'additionalProperties' in schema:
+        check_value = _compile_node(schema['additionalProperties'], url_check)
+        if check_value is not None:
+            def check_values(value, name, index, path, errors):
+                for key, item in value.items():
+                    check_value(item, key, index, (path, key), errors)
+            checks.append(check_values)
+
+    if 'items' in schema:
+        check_item = _compile_node(schema['items'], url_check)
+        if check_item is not None:
+            def check_items(value, name, index, path, errors):
+                for position, item in enumerate(value, 1):
+                    check_item(item, name, position, (path, position - 1), errors)
+            checks.append(check_items)
+
+    for variant in schema.get('variants', ()):
+        check_variant = _compile_node(variant, url_check, field)
+        if check_variant is not None:
+            checks.append(check_variant)
+
+    return checks
+
+
+def _compile_node(schema: Dict[str, Any], url_check: Callable[[str], bool],
+                  field: Optional[str] = None) -> Optional[Check]:
+    """
+    把模式节点编译为检查函数，节点没有任何规则时返回 None
+
+    规则、取值范围和报错函数在编译时确定并由闭包持有，验证时不再解析模式；
+    跳过条件（allowEmpty、ifType）与类型检查在同一个函数中先于其余规则执行。
+    """
+    rules = _sequence(_compile_rules(schema, url_check, field))
+    expected = TYPES.get(schema.get('type'))
+    only_type = TYPES.get(schema.get('ifType'))
+    allow_empty = bool(schema.get('allowEmpty'))
+    if expected is None:
+        if rules is None or (only_type is None and not allow_empty):
+            return rules
+    report_type = _reporter(schema, 'type', field) if expected is not None else None
+
+    if only_type is None and not allow_empty:
+        # 最常见的情况：只有类型检查，或类型检查后执行其余规则
+        if rules is None:
+            def check(value, name, index, path, errors):
+                if not isinstance(value, expected):
+                    report_type(value, name, index, path, errors)
+        else:
+            def check(value, name, index, path, errors):
+                if not isinstance(value, expected):
+                    report_type(value, name, index, path, errors)
+                else:
+                    rules(value, name, index, path, errors)
+        return check
+
+    def check(value, name, index, path, errors):
+        if allow_empty and not value:
+            return
+        if only_type is not None and not isinstance(value, only_type):
+            return
+        if expected is not None and not isinstance(value, expected):
+            report_type(value, name, index, path, errors)
+        elif rules is not None:
+            rules(value, name, index, path, errors)
+    return check
+
+
+def _compile_properties(properties: Dict[str, Dict[str, Any]], url_check: Callable[[str], bool]) -> Optional[Check]:
+    """把对象各字段的规则编译为一个按声明顺序检查字段的函数（参数为所在对象），没有任何规则时返回 None"""
+    # 每个字段为(字段名, 检查函数, 类型, 类型报错函数, 附加条件)：只有类型规则的字段不生成检查函数，
+    # 直接在循环中判断类型；只检查取值的字段附加条件为 None，否则为
+    # (必填报错函数, dependsOn 字段, allowedWhen 字段, 允许的取值, allowedWhen 报错函数)
+    specs = []
+    for key, schema in properties.items():
+        required = schema.get('required') is True
+        depends_on = schema.get('dependsOn')
+        allowed = schema.get('allowedWhen')
+        extra = None
+        if required or depends_on or allowed:
+            extra = (
+                _reporter(schema, 'required', key) if required else None,
+                depends_on,
+                allowed['field'] if allowed else None,
+                frozenset(allowed['values']) if allowed else None,
+                _reporter(schema, 'allowedWhen', key) if allowed else None
+            )
+        if extra is None and set(schema) <= TYPE_ONLY_KEYS and schema.get('type') in TYPES:
+            specs.append((key, None, TYPES[schema['type']], _reporter(schema, 'type', key), None))
+            continue
+        body = _compile_node(schema, url_check, key)
+        if body is None and extra is None:
+            continue
+        specs.append((key, body, None, None, extra))
+    if not specs:
+        return None
+    specs = tuple(specs)
+
+    def check(value, name, index, path, errors):
+        get = value.get
+        for key, body, expected, report_type, extra in specs:
+            child = get(key, _MISSING)
+            if extra is None:
+                if child is _MISSING:
+                    continue
+                if body is not None:
+                    body(child, name, index, (path, key), errors)
+                elif not isinstance(child, expected):
+                    report_type(child, name, index, (path, key), errors)
+                continue
+            report_required, depends_on, other_field, allowed_values, report_allowed = extra
+            if child is _MISSING:
+                if report_required is not None:
+                    report_required(value, name, index, (path, key), errors)
+                continue
+            if depends_on is not None and not get(depends_on):
+                continue
+            if other_field is not None:
+                other = get(other_field)
+                if not _member(other, allowed_values):
+                    report_allowed(child, name, index, (path, key), errors, other=other)
+                    continue
+            if body is not None:
+                body(child, name, index, (path, key), errors)
+    return check
+
+
+def compile_schema(schema: Dict[str, Any], url_check: Callable[[str], bool]) -> Check:
+    """把模式编译为检查函数，规则只在编译时解析一次"""
+    check = _compile_node(schema, url_check)
+    if check is None:
+        return lambda value, name, index, path, errors: None
+    return check
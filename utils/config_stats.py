@@ -0,0 +1,103 @@
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Dict
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 统计项及其默认值
+EMPTY_STATS = {
+    'bookmarks_count': 0,
+    'bookmarks_groups': 0,
+    'services_count': 0,
+    'services_groups': 0,
+    'widgets_count': 0,
+    'docker_instances': 0,
+    'configured_settings': 0
+}
+
+
+class ConfigStats:
+    """
+    配置统计计数器
+
+    按配置文件分别维护计数：经 YamlManager 保存时直接用保存的数据更新对应文件的计数，
+    只有文件指纹（mtime/大小/inode）在应用外发生变化时才重新加载并统计该文件。
+    """
+
+    def __init__(self, yaml_manager):
+        self.yaml_manager = yaml_manager
+        # {配置名: (文件指纹, 该文件贡献的统计项)}
+        self._partials: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        yaml_manager.add_change_listener(self._on_change)
+
+    def _count(self, config_name: str, data: Any) -> Dict[str, int]:
+        """统计单个配置文件，避免空数据或格式错误导致的崩溃"""
+        partial = {}
+        try:
+            if config_name in ('bookmarks', 'services'):
+                groups = data if isinstance(data, list) else []
+                count = 0
+                for group in groups:
+                    if isinstance(group, dict) and group:
+                        group_items = group[next(iter(group))]
+                        if isinstance(group_items, list):
+                            count += len(group_items)
+                partial[f'{config_name}_groups'] = len(groups)
+                partial[f'{config_name}_count'] = count
+            elif config_name == 'widgets':
+                partial['widgets_count'] = len(data) if isinstance(data, dict) else 0
+            elif config_name == 'docker':
+                # 与 load_docker 一致：配置为空时使用默认实例
+                if not data:
+                    data = self.yaml_manager.load_docker()
+                partial['docker_instances'] = len(data) if isinstance(data, dict) else 0
+            elif config_name == 'settings':
+                # 与 load_settings 一致：合并默认设置后统计
+                settings = self.yaml_manager.get_default_settings()
+                if isinstance(data, dict):
+                    settings.update(data)
+                partial['configured_settings'] = len([k for k, v in settings.items()
+                                                      if v not in ['', None, False]])
+        except Exception as e:
+            logger.error(f"计算 {config_name} 统计信息时发生错误: {e}")
+        return partial
+
+    def _on_change(self, config_name: str, data: Any) -> None:
+        """配置保存后增量更新对应文件的统计"""
+        file_path = self.yaml_manager.get_config_file_path(config_name)
+        fingerprint = self.yaml_manager.file_fingerprint(file_path)
+        if data is None:
+            with self._lock:
+                self._partials.pop(config_name, None)
+            return
+        partial = self._count(config_name, data)
+        with self._lock:
+            self._partials[config_name] = (fingerprint, partial)
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取统计信息，仅重新统计在应用外被修改过的文件"""
+        stats = dict(EMPTY_STATS)
+        for config_name in self.yaml_manager.get_supported_config_types():
+            file_path = self.yaml_manager.get_config_file_path(config_name)
+            fingerprint = self.yaml_manager.file_fingerprint(file_path)
+            with self._lock:
+                entry = self._partials.get(config_name)
+            if entry is None or entry[0] != fingerprint:
+                partial = self._count(config_name, self.yaml_manager._load_document(file_path))
+                with self._lock:
+                    self._partials[config_name] = (fingerprint, partial)
+                    self.rebuilds += 1
+            else:
+                partial = entry[1]
+            stats.update(partial)
+        return stats
+
+    @staticmethod
+    def get_etag(stats: Dict[str, int]) -> str:
+        """根据统计内容生成 ETag"""
+        return hashlib.md5(json.dumps(stats, sort_keys=True).encode('utf-8')).hexdigest()
@@ -0,0 +1,76 @@
+from typing import Any, Iterator, Optional, Tuple
+
+from utils.json_patch import make_pointer, parse_pointer
+
+# 遍历产出的条目：(JSON Pointer, 所在分组名, 条目名, 条目配置)
+Entry = Tuple[str, Any, Any, Any]
+
+
+def iter_group_services(node: Any, pointer: str, group_name: Any = None) -> Iterator[Entry]:
+    """
+    遍历服务配置中的单个节点（pointer 为节点自身的路径，如 /0）
+
+    {名称: 字典} 为服务，{名称: 列表} 为分组（可以嵌套），分组名为服务所在的最内层分组；
+    顶层的 {名称: 字典} 不属于任何分组，分组名为 None。
+    """
+    if not isinstance(node, dict) or len(node) != 1:
+        return
+    name = next(iter(node))
+    value = node[name]
+    item_pointer = pointer + make_pointer(name)
+    if isinstance(value, dict):
+        yield item_pointer, group_name, name, value
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield from iter_group_services(child, f"{item_pointer}/{index}", name)
+
+
+def iter_services(groups: Any, pointer: str = '') -> Iterator[Entry]:
+    """遍历服务配置，产出 (JSON Pointer, 所在分组名, 服务名, 服务配置)；支持嵌套分组"""
+    if not isinstance(groups, list):
+        return
+    for index, group in enumerate(groups):
+        yield from iter_group_services(group, f"{pointer}/{index}")
+
+
+def iter_group_bookmarks(group: Any, pointer: str) -> Iterator[Entry]:
+    """遍历书签配置中的单个分组（书签分组不嵌套，书签配置为列表）"""
+    if not isinstance(group, dict) or len(group) != 1:
+        return
+    group_name = next(iter(group))
+    items = group[group_name]
+    if not isinstance(items, list):
+        return
+    group_pointer = pointer + make_pointer(group_name)
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and len(item) == 1:
+            name = next(iter(item))
+            yield f"{group_pointer}/{index}" + make_pointer(name), group_name, name, item[name]
+
+
+def iter_group_entries(config_name: str, group: Any, pointer: str) -> Iterator[Entry]:
+    """按配置类型遍历服务/书签配置中的单个顶层分组"""
+    if config_name == 'services':
+        return iter_group_services(group, pointer)
+    return iter_group_bookmarks(group, pointer)
+
+
+def resolve_pointer(document: Any, pointer: str) -> Optional[Any]:
+    """按遍历产出的 JSON Pointer 定位条目配置，路径不存在时返回 None"""
+    node = document
+    for token in parse_pointer(pointer):
+        if isinstance(node, list):
+            if not token.isdigit() or int(token) >= len(node):
+                return None
+            node = node[int(token)]
+        elif isinstance(node, dict):
+            # YAML 中的分组名/条目名可能不是字符串（如 2024），按字符串形式匹配
+            if token in node:
+                node = node[token]
+            else:
+                node = next((value for key, value in node.items() if str(key) == token), None)
+                if node is None:
+                    return None
+        else:
+            return None
+    return node
@@ -1,182 +1,117 @@
 import re
 import logging
-from typing import Dict, Any, List, Union, Tuple
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Union, Tuple
+
+from utils.config_schema import SCHEMAS, compile_schema
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# URL/图标判定结果的缓存容量
+VERDICT_CACHE_SIZE = 65536
+
 class ConfigValidator:
-    """Homepage 配置验证器"""
+    """Homepage 配置验证器，字段规则由 utils/config_schema.py 中的声明式模式编译而来"""
     
-    def __init__(self):
-        # 支持的主题
-        self.valid_themes = ['light', 'dark']
-        
-        # 支持的颜色
-        self.valid_colors = [
-            'slate', 'gray', 'zinc', 'neutral', 'stone', 'amber', 'yellow',
-            'lime', 'green', 'emerald', 'teal', 'cyan', 'sky', 'blue',
-            'indigo', 'violet', 'purple', 'fuchsia', 'pink', 'rose', 'red', 'white'
-        ]
-        
-        # 支持的页眉样式
-        self.valid_header_styles = ['underlined', 'boxed', 'clean', 'boxedWidgets']
-        
-        # 支持的图标样式
-        self.valid_icon_styles = ['gradient', 'theme']
-        
-        # 支持的状态样式
-        self.valid_status_styles = ['', 'dot', 'basic']
+    # 基本的 URL 格式（类级别预编译，避免每次验证重新编译）
+    URL_PATTERN = re.compile(
+        r'^https?://'  # http:// or https://
+        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+        r'localhost|'  # localhost...
+        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+        r'(?::\d+)?'  # optional port
+        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+    
+    # 支持的图标格式合并为一个正则：
+    # 1. 文件名 (如 sonarr.png)
+    # 2. MDI 图标 (如 mdi-flask-outline) / Simple Icons (如 si-github)，可带 -#RRGGBB 颜色
+    # 3. selfh.st icons (如 sh-sonarr)
+    ICON_PATTERN = re.compile(
+        r'^(?:[a-zA-Z0-9_-]+\.(?:png|jpg|jpeg|gif|svg|webp)'
+        r'|(?:mdi|si)-[a-zA-Z0-9_-]+(?:-#[a-fA-F0-9]{6})?'
+        r'|sh-[a-zA-Z0-9_-]+(?:\.(?:svg|png|webp))?)$')
+    
+    def __init__(self, schemas: Dict[str, Dict[str, Any]] = SCHEMAS):
+        # 字段类型、取值范围与错误信息以声明式模式定义（utils/config_schema.py），启动时编译为检查函数
+        self.schemas = schemas
+        self._checks = {config_name: compile_schema(schema, self._url_verdict)
+                        for config_name, schema in schemas.items()}
+        # 列表型配置逐条调用，预先取出避免每次查表
+        self._check_service_item = self._checks['service']
+        self._check_bookmark_item = self._checks['bookmark']
+    
+    def check(self, config_name: str, data: Any, name: Any = None) -> List[Tuple[str, str, str]]:
+        """按模式检查数据，返回全部错误 [(相对路径, 错误代码, 错误信息)]"""
+        errors: List[Tuple[str, str, str]] = []
+        self._checks[config_name](data, name, None, None, errors)
+        return errors
+    
+    def validate_all(self, config_name: str, data: Any) -> List[Dict[str, str]]:
+        """验证 settings/widgets/docker，返回全部错误 [{'path': JSON Pointer, 'code', 'message'}]"""
+        try:
+            errors = self.check(config_name, data)
+        except Exception as e:
+            return [{'path': '', 'code': 'exception', 'message': f"验证异常: {e}"}]
+        return [{'path': f"/{path}" if path else '', 'code': code, 'message': message}
+                for path, code, message in errors]
+    
+    def _first_error(self, config_name: str, data: Any, label: str) -> Tuple[bool, str]:
+        """按模式验证，返回(验证结果, 第一个错误信息)"""
+        try:
+            errors = self.check(config_name, data)
+        except Exception as e:
+            error_msg = f"{label}验证异常: {e}"
+            logger.error(error_msg)
+            return False, error_msg
+        if errors:
+            logger.warning(errors[0][2])
+            return False, errors[0][2]
+        logger.info(f"{label} validation passed")
+        return True, "验证通过"
+    
+    def validate_settings(self, settings: Dict[str, Any]) -> Tuple[bool, str]:
+        """验证全局设置，返回(验证结果, 错误信息)"""
+        return self._first_error('settings', settings, '设置')
+    
+    def _check_list_group(self, label: str, group_index: int, group: Any) -> Tuple[Any, Any, Optional[Tuple[str, str, str]]]:
+        """检查列表型配置中的分组结构，返回(分组名, 分组内容, 错误)，错误为(相对路径, 错误代码, 错误信息)"""
+        if not isinstance(group, dict):
+            return None, None, ('', 'type', f"{label}分组 #{group_index + 1} 必须是字典格式，当前类型: {type(group).__name__}")
         
-        # 支持的链接目标
-        self.valid_targets = ['_self', '_blank', '_top']
+        # 每个组应该只有一个键
+        if len(group) != 1:
+            return None, None, ('', 'structure', f"{label}分组 #{group_index + 1} 应该只包含一个分组名称，当前包含 {len(group)} 个键")
         
-        # 支持的语言
-        self.valid_languages = [
-            'ca', 'de', 'en', 'es', 'fr', 'he', 'hr', 'hu', 'it', 
-            'nb-NO', 'nl', 'pt', 'ru', 'sv', 'vi', 'zh-CN', 'zh-Hant'
-        ]
+        group_name = next(iter(group))
+        group_items = group[group_name]
+        if not isinstance(group_items, list):
+            return group_name, None, ('', 'type', f"{label}分组 '{group_name}' 的内容必须是列表格式，当前类型: {type(group_items).__name__}")
         
-        # 支持的书签样式
-        self.valid_bookmark_styles = ['grid', 'icons']
+        return group_name, group_items, None
+    
+    def _check_group_item(self, label: str, group_name: Any, item_index: int, item: Any) -> Tuple[Any, Optional[Tuple[str, str, str]]]:
+        """检查分组中单个条目的结构，返回(条目名, 错误)"""
+        if not isinstance(item, dict):
+            return None, ('', 'type', f"分组 '{group_name}' 中的{label} #{item_index + 1} 必须是字典格式，当前类型: {type(item).__name__}")
         
-        # 支持的卡片模糊效果
-        self.valid_card_blur = ['', 'xs', 'sm', 'md', 'lg', 'xl', '2xl', '3xl']
+        # 每个条目应该只有一个键
+        if len(item) != 1:
+            return None, ('', 'structure', f"分组 '{group_name}' 中的{label} #{item_index + 1} 应该只包含一个{label}名称，当前包含 {len(item)} 个键")
         
-        # 支持的快速启动提供商
-        self.valid_quicklaunch_providers = [
-            'google', 'duckduckgo', 'bing', 'baidu', 'brave', 'custom'
-        ]
+        return next(iter(item)), None
     
-    def validate_settings(self, settings: Dict[str, Any]) -> Tuple[bool, str]:
-        """验证全局设置，返回(验证结果, 错误信息)"""
-        try:
-            logger.info(f"Validating settings with {len(settings)} keys")
-            
-            # 验证主题
-            if 'theme' in settings and settings['theme'] not in self.valid_themes:
-                error_msg = f"无效的主题设置: {settings['theme']}，支持的主题: {', '.join(self.valid_themes)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证颜色
-            if 'color' in settings and settings['color'] not in self.valid_colors:
-                error_msg = f"无效的颜色设置: {settings['color']}，支持的颜色: {', '.join(self.valid_colors)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证页眉样式
-            if 'headerStyle' in settings and settings['headerStyle'] not in self.valid_header_styles:
-                error_msg = f"无效的页眉样式: {settings['headerStyle']}，支持的样式: {', '.join(self.valid_header_styles)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证图标样式
-            if 'iconStyle' in settings and settings['iconStyle'] not in self.valid_icon_styles:
-                error_msg = f"无效的图标样式: {settings['iconStyle']}，支持的样式: {', '.join(self.valid_icon_styles)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证状态样式
-            if 'statusStyle' in settings and settings['statusStyle'] not in self.valid_status_styles:
-                error_msg = f"无效的状态样式: {settings['statusStyle']}，支持的样式: {', '.join(self.valid_status_styles)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证链接目标
-            if 'target' in settings and settings['target'] not in self.valid_targets:
-                error_msg = f"无效的链接目标: {settings['target']}，支持的目标: {', '.join(self.valid_targets)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证语言
-            if 'language' in settings and settings['language'] not in self.valid_languages:
-                error_msg = f"无效的语言设置: {settings['language']}，支持的语言: {', '.join(self.valid_languages)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证书签样式
-            if 'bookmarksStyle' in settings and settings['bookmarksStyle'] not in self.valid_bookmark_styles:
-                error_msg = f"无效的书签样式: {settings['bookmarksStyle']}，支持的样式: {', '.join(self.valid_bookmark_styles)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证卡片模糊效果
-            if 'cardBlur' in settings and settings['cardBlur'] not in self.valid_card_blur:
-                error_msg = f"无效的卡片模糊效果: {settings['cardBlur']}，支持的效果: {', '.join(self.valid_card_blur)}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证数值类型
-            if 'maxGroupColumns' in settings:
-                if not isinstance(settings['maxGroupColumns'], int) or settings['maxGroupColumns'] < 1 or settings['maxGroupColumns'] > 8:
-                    error_msg = f"最大分组列数必须是1-8之间的整数，当前值: {settings['maxGroupColumns']}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-            
-            if 'maxBookmarkGroupColumns' in settings:
-                if not isinstance(settings['maxBookmarkGroupColumns'], int) or settings['maxBookmarkGroupColumns'] < 1 or settings['maxBookmarkGroupColumns'] > 8:
-                    error_msg = f"最大书签分组列数必须是1-8之间的整数，当前值: {settings['maxBookmarkGroupColumns']}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-            
-            # 验证快速启动配置
-            if 'quicklaunch' in settings and isinstance(settings['quicklaunch'], dict):
-                ql_config = settings['quicklaunch']
-                if 'provider' in ql_config and ql_config['provider'] not in self.valid_quicklaunch_providers:
-                    error_msg = f"无效的快速启动提供商: {ql_config['provider']}，支持的提供商: {', '.join(self.valid_quicklaunch_providers)}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-            
-            # 验证布尔值
-            bool_fields = ['hideVersion', 'showStats', 'useEqualHeights', 'fiveColumns', 
-                          'disableCollapse', 'groupsInitiallyCollapsed', 'fullWidth', 'hideErrors', 'disableUpdateCheck']
-            for field in bool_fields:
-                if field in settings and not isinstance(settings[field], bool):
-                    error_msg = f"字段 {field} 必须是布尔值，当前值: {settings[field]} ({type(settings[field]).__name__})"
-                    logger.warning(error_msg)
-                    return False, error_msg
-            
-            # 验证 URL 格式
-            if 'startUrl' in settings:
-                if not self._validate_url(settings['startUrl']):
-                    error_msg = f"无效的起始URL格式: {settings['startUrl']}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-            
-            if 'base' in settings:
-                if not self._validate_url(settings['base']):
-                    error_msg = f"无效的基础URL格式: {settings['base']}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-            
-            # 验证 favicon URL
-            if 'favicon' in settings and settings['favicon']:
-                if not self._validate_url(settings['favicon']):
-                    error_msg = f"无效的favicon URL格式: {settings['favicon']}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-            
-            # 验证背景图片URL
-            if 'background' in settings and settings['background']:
-                if isinstance(settings['background'], str):
-                    if not self._validate_url(settings['background']):
-                        error_msg = f"无效的背景图片URL格式: {settings['background']}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                elif isinstance(settings['background'], dict):
-                    if 'image' in settings['background'] and not self._validate_url(settings['background']['image']):
-                        error_msg = f"无效的背景图片URL格式: {settings['background']['image']}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-            
-            logger.info("Settings validation passed")
-            return True, "验证通过"
-            
-        except Exception as e:
-            error_msg = f"设置验证异常: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+    def _check_bookmark(self, bookmark_name: Any, bookmark_config: Any) -> List[Tuple[str, str, str]]:
+        """检查单个书签的配置，返回全部错误 [(相对路径, 错误代码, 错误信息)]"""
+        errors: List[Tuple[str, str, str]] = []
+        self._check_bookmark_item(bookmark_config, bookmark_name, None, None, errors)
+        return errors
+    
+    def _check_service(self, service_name: Any, service_data: Any) -> List[Tuple[str, str, str]]:
+        """检查单个服务的配置，返回全部错误 [(相对路径, 错误代码, 错误信息)]"""
+        errors: List[Tuple[str, str, str]] = []
+        self._check_service_item(service_data, service_name, None, None, errors)
+        return errors
     
     def validate_bookmarks(self, bookmarks: List[Dict[str, Any]]) -> Tuple[bool, str]:
         """验证书签配置，返回(验证结果, 错误信息)"""
@@ -189,100 +124,22 @@ class ConfigValidator:
                 return False, error_msg
             
             for group_index, group in enumerate(bookmarks):
-                if not isinstance(group, dict):
-                    error_msg = f"书签分组 #{group_index + 1} 必须是字典格式，当前类型: {type(group).__name__}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                # 每个组应该只有一个键
-                if len(group) != 1:
-                    error_msg = f"书签分组 #{group_index + 1} 应该只包含一个分组名称，当前包含 {len(group)} 个键"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                group_name = list(group.keys())[0]
-                group_items = group[group_name]
-                
-                if not isinstance(group_items, list):
-                    error_msg = f"书签分组 '{group_name}' 的内容必须是列表格式，当前类型: {type(group_items).__name__}"
-                    logger.warning(error_msg)
-                    return False, error_msg
+                group_name, group_items, error = self._check_list_group('书签', group_index, group)
+                if error:
+                    logger.warning(error[2])
+                    return False, error[2]
                 
                 # 验证每个书签项
                 for item_index, item in enumerate(group_items):
-                    if not isinstance(item, dict):
-                        error_msg = f"分组 '{group_name}' 中的书签 #{item_index + 1} 必须是字典格式，当前类型: {type(item).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 每个书签项应该只有一个键
-                    if len(item) != 1:
-                        error_msg = f"分组 '{group_name}' 中的书签 #{item_index + 1} 应该只包含一个书签名称，当前包含 {len(item)} 个键"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    bookmark_name = list(item.keys())[0]
-                    bookmark_config = item[bookmark_name]
+                    bookmark_name, error = self._check_group_item('书签', group_name, item_index, item)
+                    if error:
+                        logger.warning(error[2])
+                        return False, error[2]
                     
-                    # 书签配置应该是一个列表，包含配置字典
-                    if not isinstance(bookmark_config, list):
-                        error_msg = f"书签 '{bookmark_name}' 的配置必须是列表格式，当前类型: {type(bookmark_config).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 列表不能为空
-                    if not bookmark_config:
-                        error_msg = f"书签 '{bookmark_name}' 的配置列表不能为空"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 验证配置列表中的每个配置项
-                    for config_index, config_item in enumerate(bookmark_config):
-                        if not isinstance(config_item, dict):
-                            error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} 必须是字典格式，当前类型: {type(config_item).__name__}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                        
-                        # 验证必需字段
-                        if 'href' not in config_item:
-                            error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} 缺少必需的 'href' 字段"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                        
-                        # 验证 URL
-                        if not self._validate_url(config_item['href']):
-                            error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} URL格式无效: {config_item['href']}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                        
-                        # 验证可选字段
-                        if 'abbr' in config_item:
-                            if not isinstance(config_item['abbr'], str):
-                                error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} abbr 必须是字符串，当前类型: {type(config_item['abbr']).__name__}"
-                                logger.warning(error_msg)
-                                return False, error_msg
-                            if len(config_item['abbr']) > 2:
-                                error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} 缩写长度不能超过2个字符，当前: {config_item['abbr']}"
-                                logger.warning(error_msg)
-                                return False, error_msg
-                        
-                        # 验证其他可选字段
-                        if 'description' in config_item and not isinstance(config_item['description'], str):
-                            error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} description 必须是字符串，当前类型: {type(config_item['description']).__name__}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                        
-                        if 'icon' in config_item and not isinstance(config_item['icon'], str):
-                            error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} icon 必须是字符串，当前类型: {type(config_item['icon']).__name__}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                        
-                        # 验证链接目标
-                        if 'target' in config_item:
-                            if config_item['target'] not in self.valid_targets:
-                                error_msg = f"书签 '{bookmark_name}' 的配置项 #{config_index + 1} 链接目标无效: {config_item['target']}，支持的目标: {', '.join(self.valid_targets)}"
-                                logger.warning(error_msg)
-                                return False, error_msg
+                    errors = self._check_bookmark(bookmark_name, item[bookmark_name])
+                    if errors:
+                        logger.warning(errors[0][2])
+                        return False, errors[0][2]
             
             logger.info("Bookmarks validation passed")
             return True, "验证通过"
@@ -303,87 +160,22 @@ class ConfigValidator:
                 return False, error_msg
             
             for group_index, group in enumerate(services):
-                if not isinstance(group, dict):
-                    error_msg = f"服务分组 #{group_index + 1} 必须是字典格式，当前类型: {type(group).__name__}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                # 每个组应该只有一个键
-                if len(group) != 1:
-                    error_msg = f"服务分组 #{group_index + 1} 应该只包含一个分组名称，当前包含 {len(group)} 个键"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                group_name = list(group.keys())[0]
-                group_items = group[group_name]
-                
-                if not isinstance(group_items, list):
-                    error_msg = f"服务分组 '{group_name}' 的内容必须是列表格式，当前类型: {type(group_items).__name__}"
-                    logger.warning(error_msg)
-                    return False, error_msg
+                group_name, group_items, error = self._check_list_group('服务', group_index, group)
+                if error:
+                    logger.warning(error[2])
+                    return False, error[2]
                 
                 # 验证每个服务项
                 for item_index, item in enumerate(group_items):
-                    if not isinstance(item, dict):
-                        error_msg = f"分组 '{group_name}' 中的服务 #{item_index + 1} 必须是字典格式，当前类型: {type(item).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 每个服务项应该只有一个键
-                    if len(item) != 1:
-                        error_msg = f"分组 '{group_name}' 中的服务 #{item_index + 1} 应该只包含一个服务名称，当前包含 {len(item)} 个键"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    service_name = list(item.keys())[0]
-                    service_data = item[service_name]
-                    
-                    if not isinstance(service_data, dict):
-                        error_msg = f"服务 '{service_name}' 的配置必须是字典格式，当前类型: {type(service_data).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 验证必需字段
-                    if 'href' not in service_data:
-                        error_msg = f"服务 '{service_name}' 缺少必需的 'href' 字段"
-                        logger.warning(error_msg)
-                        return False, error_msg
+                    service_name, error = self._check_group_item('服务', group_name, item_index, item)
+                    if error:
+                        logger.warning(error[2])
+                        return False, error[2]
                     
-                    # 验证 URL
-                    if not self._validate_url(service_data['href']):
-                        error_msg = f"服务 '{service_name}' 的URL格式无效: {service_data['href']}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 验证可选的 URL 字段
-                    url_fields = ['siteMonitor', 'ping']
-                    for field in url_fields:
-                        if field in service_data and service_data[field]:
-                            if not self._validate_url(service_data[field]):
-                                error_msg = f"服务 '{service_name}' 的 {field} URL格式无效: {service_data[field]}"
-                                logger.warning(error_msg)
-                                return False, error_msg
-                    
-                    # 验证状态样式
-                    if 'statusStyle' in service_data:
-                        if service_data['statusStyle'] not in self.valid_status_styles:
-                            error_msg = f"服务 '{service_name}' 的状态样式无效: {service_data['statusStyle']}，支持的样式: {', '.join(self.valid_status_styles)}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                    
-                    # 验证链接目标
-                    if 'target' in service_data:
-                        if service_data['target'] not in self.valid_targets:
-                            error_msg = f"服务 '{service_name}' 的链接目标无效: {service_data['target']}，支持的目标: {', '.join(self.valid_targets)}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                    
-                    # 验证布尔值
-                    if 'showStats' in service_data:
-                        if not isinstance(service_data['showStats'], bool):
-                            error_msg = f"服务 '{service_name}' 的 showStats 必须是布尔值，当前值: {service_data['showStats']} ({type(service_data['showStats']).__name__})"
-                            logger.warning(error_msg)
-                            return False, error_msg
+                    errors = self._check_service(service_name, item[service_name])
+                    if errors:
+                        logger.warning(errors[0][2])
+                        return False, errors[0][2]
             
             logger.info("Services validation passed")
             return True, "验证通过"
@@ -395,248 +187,56 @@ class ConfigValidator:
     
     def validate_widgets(self, widgets: Dict[str, Any]) -> Tuple[bool, str]:
         """验证小工具配置，返回(验证结果, 错误信息)"""
-        try:
-            logger.info(f"Validating widgets with {len(widgets) if isinstance(widgets, dict) else 'N/A'} items")
-            
-            if not isinstance(widgets, dict):
-                error_msg = f"小工具配置必须是字典格式，当前类型: {type(widgets).__name__}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 支持的小工具类型
-            supported_types = [
-                'healthchecks', 'uptimekuma', 'ping', 'portainer',
-                'plex', 'jellyfin', 'emby', 'sonarr', 'adguard', 
-                'pihole', 'customapi', 'opnsense'
-            ]
-            
-            for widget_name, widget_config in widgets.items():
-                if not isinstance(widget_config, dict):
-                    error_msg = f"小工具 '{widget_name}' 的配置必须是字典格式，当前类型: {type(widget_config).__name__}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                # 验证必需字段
-                if 'type' not in widget_config:
-                    error_msg = f"小工具 '{widget_name}' 缺少必需的 'type' 字段"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                widget_type = widget_config['type']
-                if widget_type not in supported_types:
-                    error_msg = f"小工具 '{widget_name}' 的类型不支持: {widget_type}，支持的类型: {', '.join(supported_types)}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                # 验证 URL（必需）
-                if 'url' not in widget_config:
-                    error_msg = f"小工具 '{widget_name}' 缺少必需的 'url' 字段"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                if not self._validate_url(widget_config['url']):
-                    error_msg = f"小工具 '{widget_name}' 的URL格式无效: {widget_config['url']}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                # 验证可选字段
-                if 'refreshInterval' in widget_config:
-                    interval = widget_config['refreshInterval']
-                    if not isinstance(interval, int) or interval < 1000:
-                        error_msg = f"小工具 '{widget_name}' 的刷新间隔必须是大于等于1000的整数，当前值: {interval}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                
-                # 验证字段配置
-                if 'fields' in widget_config:
-                    fields = widget_config['fields']
-                    if not isinstance(fields, list):
-                        error_msg = f"小工具 '{widget_name}' 的 fields 必须是列表格式，当前类型: {type(fields).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                
-                # 验证自定义映射（仅限 customapi）
-                if 'mappings' in widget_config:
-                    if widget_type != 'customapi':
-                        error_msg = f"小工具 '{widget_name}' 的 mappings 字段只能用于 customapi 类型，当前类型: {widget_type}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    mappings = widget_config['mappings']
-                    if not isinstance(mappings, list):
-                        error_msg = f"小工具 '{widget_name}' 的 mappings 必须是列表格式，当前类型: {type(mappings).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 验证映射结构
-                    for mapping_index, mapping in enumerate(mappings):
-                        if not isinstance(mapping, dict):
-                            error_msg = f"小工具 '{widget_name}' 的 mapping #{mapping_index + 1} 必须是字典格式，当前类型: {type(mapping).__name__}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                        if 'label' not in mapping or 'field' not in mapping:
-                            error_msg = f"小工具 '{widget_name}' 的 mapping #{mapping_index + 1} 缺少必需的 'label' 或 'field' 字段"
-                            logger.warning(error_msg)
-                            return False, error_msg
-            
-            logger.info("Widgets validation passed")
-            return True, "验证通过"
-            
-        except Exception as e:
-            error_msg = f"小工具验证异常: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+        return self._first_error('widgets', widgets, '小工具')
     
     def validate_docker(self, docker_config: Dict[str, Any]) -> Tuple[bool, str]:
         """验证 Docker 配置，返回(验证结果, 错误信息)"""
-        try:
-            logger.info(f"Validating docker config with {len(docker_config) if isinstance(docker_config, dict) else 'N/A'} instances")
-            
-            if not isinstance(docker_config, dict):
-                error_msg = f"Docker配置必须是字典格式，当前类型: {type(docker_config).__name__}"
-                logger.warning(error_msg)
-                return False, error_msg
-            
-            # 验证每个 Docker 实例配置
-            for instance_name, config in docker_config.items():
-                if not isinstance(config, dict):
-                    error_msg = f"Docker实例 '{instance_name}' 的配置必须是字典格式，当前类型: {type(config).__name__}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                # 验证连接配置 - 必须有 socket 或 host
-                has_socket = 'socket' in config and config['socket']
-                has_host = 'host' in config and config['host']
-                
-                if not (has_socket or has_host):
-                    error_msg = f"Docker实例 '{instance_name}' 必须配置 'socket' 或 'host' 连接方式"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                
-                # 如果使用 host，验证格式
-                if has_host:
-                    host = config['host']
-                    if not isinstance(host, str) or not host.strip():
-                        error_msg = f"Docker实例 '{instance_name}' 的 host 必须是非空字符串，当前值: {host}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 验证端口（如果存在）
-                    if 'port' in config:
-                        port = config['port']
-                        if not isinstance(port, int) or port < 1 or port > 65535:
-                            error_msg = f"Docker实例 '{instance_name}' 的端口必须是1-65535之间的整数，当前值: {port}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                
-                # 验证 socket 路径
-                if has_socket:
-                    socket_path = config['socket']
-                    if not isinstance(socket_path, str) or not socket_path.strip():
-                        error_msg = f"Docker实例 '{instance_name}' 的 socket 必须是非空字符串，当前值: {socket_path}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                
-                # 验证布尔值字段
-                bool_fields = ['showStats', 'swarm']
-                for field in bool_fields:
-                    if field in config and not isinstance(config[field], bool):
-                        error_msg = f"Docker实例 '{instance_name}' 的 {field} 必须是布尔值，当前值: {config[field]} ({type(config[field]).__name__})"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                
-                # 验证字符串字段
-                string_fields = ['username', 'password']
-                for field in string_fields:
-                    if field in config and not isinstance(config[field], str):
-                        error_msg = f"Docker实例 '{instance_name}' 的 {field} 必须是字符串，当前类型: {type(config[field]).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                
-                # 验证 TLS 配置
-                if 'tls' in config:
-                    tls_config = config['tls']
-                    if not isinstance(tls_config, dict):
-                        error_msg = f"Docker实例 '{instance_name}' 的 TLS 配置必须是字典格式，当前类型: {type(tls_config).__name__}"
-                        logger.warning(error_msg)
-                        return False, error_msg
-                    
-                    # 验证 TLS 相关字段
-                    tls_bool_fields = ['skipVerify']
-                    for field in tls_bool_fields:
-                        if field in tls_config and not isinstance(tls_config[field], bool):
-                            error_msg = f"Docker实例 '{instance_name}' 的 TLS {field} 必须是布尔值，当前值: {tls_config[field]} ({type(tls_config[field]).__name__})"
-                            logger.warning(error_msg)
-                            return False, error_msg
-                    
-                    tls_string_fields = ['cert', 'key', 'ca']
-                    for field in tls_string_fields:
-                        if field in tls_config and not isinstance(tls_config[field], str):
-                            error_msg = f"Docker实例 '{instance_name}' 的 TLS {field} 必须是字符串，当前类型: {type(tls_config[field]).__name__}"
-                            logger.warning(error_msg)
-                            return False, error_msg
-            
-            logger.info("Docker validation passed")
-            return True, "验证通过"
-            
-        except Exception as e:
-            error_msg = f"Docker验证异常: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+        return self._first_error('docker', docker_config, 'Docker')
     
     def _validate_url(self, url: str) -> bool:
         """验证 URL 格式"""
         if not url:
             return True  # 空 URL 可以接受
         
-        # 基本的 URL 格式检查
-        url_pattern = re.compile(
-            r'^https?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-            r'localhost|'  # localhost...
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-        
-        # 也支持相对路径
-        if url.startswith('/'):
-            return True
-        
-        return bool(url_pattern.match(url))
+        return self._url_verdict(url)
     
     def _validate_icon(self, icon: str) -> bool:
         """验证图标格式"""
         if not icon:
             return True
         
-        # 支持的图标格式
-        # 1. 文件名 (如 sonarr.png)
-        # 2. MDI 图标 (如 mdi-flask-outline)
-        # 3. Simple Icons (如 si-github)
-        # 4. selfh.st icons (如 sh-sonarr)
-        # 5. 完整 URL
-        
-        # 文件名格式
-        if re.match(r'^[a-zA-Z0-9_-]+\.(png|jpg|jpeg|gif|svg|webp)$', icon):
-            return True
-        
-        # MDI 图标格式
-        if re.match(r'^mdi-[a-zA-Z0-9_-]+(\-#[a-fA-F0-9]{6})?$', icon):
-            return True
-        
-        # Simple Icons 格式
-        if re.match(r'^si-[a-zA-Z0-9_-]+(\-#[a-fA-F0-9]{6})?$', icon):
+        return self._icon_verdict(icon)
+    
+    @staticmethod
+    @lru_cache(maxsize=VERDICT_CACHE_SIZE)
+    def _url_verdict(url: str) -> bool:
+        """URL 格式判定（结果按 URL 缓存）"""
+        # 也支持相对路径
+        if url.startswith('/'):
             return True
         
-        # selfh.st icons 格式
-        if re.match(r'^sh-[a-zA-Z0-9_-]+(\.(svg|png|webp))?$', icon):
+        return bool(ConfigValidator.URL_PATTERN.match(url))
+    
+    @staticmethod
+    @lru_cache(maxsize=VERDICT_CACHE_SIZE)
+    def _icon_verdict(icon: str) -> bool:
+        """图标格式判定（结果按图标缓存）"""
+        # 文件名 / MDI / Simple Icons / selfh.st icons
+        if ConfigValidator.ICON_PATTERN.match(icon):
             return True
         
         # 完整 URL
-        if self._validate_url(icon):
+        if ConfigValidator._url_verdict(icon):
             return True
         
         # 本地图标路径
-        if icon.startswith('/icons/'):
-            return True
-        
-        return False 
\ No newline at end of file
+        return icon.startswith('/icons/')
+    
+    def get_cache_info(self) -> Dict[str, Any]:
+        """获取 URL/图标判定缓存统计"""
+        url_info = self._url_verdict.cache_info()
+        icon_info = self._icon_verdict.cache_info()
+        return {
+            'url': {'hits': url_info.hits, 'misses': url_info.misses, 'size': url_info.currsize},
+            'icon': {'hits': icon_info.hits, 'misses': icon_info.misses, 'size': icon_info.currsize}
+        }
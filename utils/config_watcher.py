@@ -0,0 +1,202 @@
+import os
+import queue
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# inotify 事件掩码
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0x00000800
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class EventBroker:
+    """
+    事件广播：每个订阅者一个有界队列，事件只生成一次后分发给所有订阅者
+
+    每个订阅连接在同步 worker 中长期占用一个线程，max_subscribers 限制同时订阅的连接数，
+    为普通请求保留线程；0 表示不限制。
+    """
+
+    def __init__(self, max_queue_size: int = 100, max_subscribers: int = 0):
+        self.max_queue_size = max_queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._on_first_subscriber: Optional[Callable[[], None]] = None
+
+    def on_first_subscriber(self, callback: Callable[[], None]) -> None:
+        """设置首个订阅者连接时的回调（用于按需启动文件监听）"""
+        self._on_first_subscriber = callback
+
+    def subscribe(self) -> Optional[queue.Queue]:
+        """新增订阅者，返回其事件队列；订阅数已达上限时返回 None"""
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            if self.max_subscribers > 0 and len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.append(subscriber)
+        if self._on_first_subscriber is not None:
+            self._on_first_subscriber()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """移除订阅者"""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """向所有订阅者广播事件，队列已满的慢客户端丢弃该事件"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                logger.warning("Event subscriber queue full, dropping event")
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+class _Inotify:
+    """基于 ctypes 的最小 inotify 封装（仅 Linux）"""
+
+    def __init__(self, directory: str):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not supported on this platform")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        watch = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if watch < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def read_names(self, timeout: float) -> List[str]:
+        """等待事件并返回发生变化的文件名"""
+        import select
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    """
+    配置目录监听线程
+
+    优先使用 inotify 监听配置目录，不可用时回退为定时比较文件指纹。
+    检测到配置文件变化后（短暂合并连续事件），调用 on_change(配置名列表)。
+    """
+
+    def __init__(self, yaml_manager, on_change: Callable[[List[str]], None],
+                 poll_interval: float = 2.0, debounce: float = 0.2):
+        self.yaml_manager = yaml_manager
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.mode = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._fingerprints = {}
+
+        # 文件名 -> 配置名
+        self._watched = {
+            os.path.basename(yaml_manager.get_config_file_path(name)): name
+            for name in yaml_manager.get_supported_config_types()
+        }
+
+    def start(self) -> None:
+        """启动监听线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._fingerprints = self._snapshot()
+            self._thread = threading.Thread(target=self._run, name='config-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {
+            name: self.yaml_manager.file_fingerprint(self.yaml_manager.get_config_file_path(name))
+            for name in self._watched.values()
+        }
+
+    def _emit_changes(self) -> None:
+        """比较文件指纹，只对真正变化的配置触发回调"""
+        current = self._snapshot()
+        changed = [name for name, fingerprint in current.items() if self._fingerprints.get(name) != fingerprint]
+        self._fingerprints = current
+        if changed:
+            try:
+                self.on_change(changed)
+            except Exception as e:
+                logger.error(f"Config change handler failed: {e}")
+
+    def _run(self) -> None:
+        try:
+            inotify = _Inotify(self.yaml_manager.config_path)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify unavailable ({e}), falling back to polling every {self.poll_interval}s")
+            self.mode = 'polling'
+            while not self._stop.wait(self.poll_interval):
+                self._emit_changes()
+            return
+
+        self.mode = 'inotify'
+        logger.info(f"Watching {self.yaml_manager.config_path} with inotify")
+        try:
+            while not self._stop.is_set():
+                names = inotify.read_names(timeout=1.0)
+                if not any(name in self._watched for name in names):
+                    continue
+                # 合并短时间内的连续事件（如临时文件写入 + rename）
+                deadline = time.monotonic() + self.debounce
+                while time.monotonic() < deadline:
+                    inotify.read_names(timeout=max(0.0, deadline - time.monotonic()))
+                self._emit_changes()
+        finally:
+            inotify.close()
@@ -0,0 +1,177 @@
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import yaml_backend
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 顶层列表元素的起始行（如 "- Media:"）
+LIST_ITEM_LINE = re.compile(r'-(?:[ \t]|$)')
+# 顶层映射键的起始行（如 "title: ..."、"'my key':"）
+MAPPING_KEY_LINE = re.compile(
+    r'''(?:"(?:[^"\\\n]|\\.)*"|'(?:[^'\n]|'')*'|[^\s#'"\[\]{}&*!|>%@`,?:-][^#\n]*?)[ \t]*:(?:[ \t]|$)''')
+# 分段后语义可能改变的写法：多文档、指令、锚点与别名（别名可能跨段引用）
+UNSAFE_FOR_SECTIONS = re.compile(r'^(?:---|\.\.\.|%)|(?:^|[\s\[{,])[&*][^\s,\]}]', re.MULTILINE)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+
+
+def split_sections(content: str) -> Optional[Tuple[str, List[Tuple[int, str]]]]:
+    """
+    把文档按顶层分组/字段切分，返回(类型 'list' 或 'mapping', [(起始行号, 段落文本)])
+
+    每段可以独立解析，结果拼接（列表）或合并（映射）后与整篇解析一致；
+    无法安全切分（空文档、多文档、锚点/别名、顶层写法不规则等）时返回 None。
+    """
+    if UNSAFE_FOR_SECTIONS.search(content):
+        return None
+    lines = content.splitlines(keepends=True)
+    mode = None
+    starts = []
+    for index, line in enumerate(lines):
+        # 空行、注释和缩进的行属于当前段
+        if not line.strip() or line[0] in ' \t#':
+            continue
+        is_item = LIST_ITEM_LINE.match(line) is not None
+        if mode is None:
+            mode = 'list' if is_item else 'mapping'
+        if mode == 'list' and is_item:
+            starts.append(index)
+        elif mode == 'mapping' and MAPPING_KEY_LINE.match(line):
+            starts.append(index)
+        elif not (mode == 'mapping' and is_item):
+            # 映射的值可以是与键同级缩进的列表，其余顶层写法不切分
+            return None
+    if not starts:
+        return None
+    ends = starts[1:] + [len(lines)]
+    return mode, [(start, ''.join(lines[start:end])) for start, end in zip(starts, ends)]
+
+
+def _error_info(error: Exception) -> Dict[str, Any]:
+    """把解析异常转换为 {'error', 'line', 'column'}，行列号从 1 开始"""
+    mark = getattr(error, 'problem_mark', None) or getattr(error, 'context_mark', None)
+    problem = getattr(error, 'problem', None)
+    if problem is None:
+        return {'error': f"YAML 语法错误: {error}", 'line': None, 'column': None}
+    context = getattr(error, 'context', None)
+    message = f"YAML 语法错误: {context + ', ' if context else ''}{problem}"
+    if mark is None:
+        return {'error': message, 'line': None, 'column': None}
+    return {'error': f"{message} (第 {mark.line + 1} 行, 第 {mark.column + 1} 列)",
+            'line': mark.line + 1, 'column': mark.column + 1}
+
+
+class EditorValidator:
+    """
+    YAML 编辑器的语法检查服务
+
+    每次请求只解析一次，结果按内容哈希缓存，重复检查未修改的内容直接返回缓存结果；
+    内容变化时按顶层分组/字段切分，只重新解析变化的段落（段落同样按内容哈希缓存），
+    任一段落解析失败时再解析整篇文档，保证错误的行列号与编辑器中的位置一致。
+    返回的 data 与缓存共享，调用方只能读取。
+    """
+
+    def __init__(self, max_documents: int = 64, max_sections: int = 8192):
+        # {内容哈希: 检查结果}
+        self._documents = OrderedDict()
+        # {(段落类型, 段落哈希): 解析结果}
+        self._sections = OrderedDict()
+        self._max_documents = max_documents
+        self._max_sections = max_sections
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sections_parsed = 0
+        self.full_parses = 0
+
+    @staticmethod
+    def _put(cache: OrderedDict, key: Any, value: Any, limit: int) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def check(self, content: str) -> Dict[str, Any]:
+        """
+        检查 YAML 文本，返回 {'valid', 'data', 'error', 'line', 'column', 'sections', 'reparsed'}
+
+        sections 为切分出的段落数（0 表示整篇解析），reparsed 为本次实际解析的段落数。
+        """
+        key = _digest(content)
+        with self._lock:
+            result = self._documents.get(key)
+            if result is not None:
+                self._documents.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = self._check_sections(content)
+        if result is None:
+            result = self._check_full(content)
+        with self._lock:
+            self._put(self._documents, key, result, self._max_documents)
+        return result
+
+    def _check_full(self, content: str) -> Dict[str, Any]:
+        with self._lock:
+            self.full_parses += 1
+        try:
+            data = yaml_backend.safe_load(content)
+        except Exception as e:
+            return dict(_error_info(e), valid=False, data=None, sections=0, reparsed=0)
+        return {'valid': True, 'data': data, 'error': None, 'line': None, 'column': None,
+                'sections': 0, 'reparsed': 0}
+
+    def _check_sections(self, content: str) -> Optional[Dict[str, Any]]:
+        """按段落增量解析，任一段落失败或结构不符时返回 None 交给整篇解析"""
+        split = split_sections(content)
+        if split is None:
+            return None
+        mode, sections = split
+        expected = list if mode == 'list' else dict
+        parts = []
+        reparsed = 0
+        for _, text in sections:
+            section_key = (mode, _digest(text))
+            with self._lock:
+                found = section_key in self._sections
+                if found:
+                    self._sections.move_to_end(section_key)
+                    data = self._sections[section_key]
+            if not found:
+                try:
+                    data = yaml_backend.safe_load(text)
+                except Exception:
+                    return None
+                reparsed += 1
+                if not isinstance(data, expected):
+                    return None
+                with self._lock:
+                    self.sections_parsed += 1
+                    self._put(self._sections, section_key, data, self._max_sections)
+            parts.append(data)
+
+        if mode == 'list':
+            combined = [item for part in parts for item in part]
+        else:
+            # 与整篇解析一致：重复的键以后出现的为准
+            combined = {}
+            for part in parts:
+                combined.update(part)
+        return {'valid': True, 'data': combined, 'error': None, 'line': None, 'column': None,
+                'sections': len(sections), 'reparsed': reparsed}
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'documents': len(self._documents), 'sections': len(self._sections),
+                    'hits': self.hits, 'misses': self.misses,
+                    'sections_parsed': self.sections_parsed, 'full_parses': self.full_parses}
@@ -0,0 +1,68 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows 等不支持 fcntl 的平台只做进程内互斥
+    fcntl = None
+
+
+class FileLockManager:
+    """
+    跨进程文件锁
+
+    每个被保护的文件对应锁目录下的一个 .lock 文件，使用 fcntl.flock 加锁，
+    多个 worker 进程写同一配置文件时互斥；读取配置不需要加锁（写入均为原子替换）。
+    flock 锁属于打开的文件描述，同一进程内不同线程各自打开锁文件，同样互斥；
+    同一线程可重入（嵌套加锁只在最外层真正加锁）。
+    """
+
+    def __init__(self, lock_dir: str):
+        self.lock_dir = lock_dir
+        os.makedirs(lock_dir, exist_ok=True)
+        # 不支持 fcntl 时使用的进程内锁
+        self._local_locks: Dict[str, threading.RLock] = {}
+        self._local_guard = threading.Lock()
+        # 当前线程已持有的锁: {name: 嵌套层数}
+        self._held = threading.local()
+
+    def _lock_path(self, name: str) -> str:
+        return os.path.join(self.lock_dir, f'{os.path.basename(name)}.lock')
+
+    @contextmanager
+    def lock(self, name: str, shared: bool = False) -> Iterator[None]:
+        """获取 name 对应的锁；shared=True 时为共享锁（如备份只需阻止写入）"""
+        counts = self._held.__dict__.setdefault('counts', {})
+        if counts.get(name, 0) > 0:
+            counts[name] += 1
+            try:
+                yield
+            finally:
+                counts[name] -= 1
+            return
+
+        counts[name] = 1
+        try:
+            with self._acquire(name, shared):
+                yield
+        finally:
+            counts[name] = 0
+
+    @contextmanager
+    def _acquire(self, name: str, shared: bool) -> Iterator[None]:
+        if fcntl is None:
+            with self._local_guard:
+                local_lock = self._local_locks.setdefault(name, threading.RLock())
+            with local_lock:
+                yield
+            return
+
+        fd = os.open(self._lock_path(name), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        finally:
+            # 关闭描述符即释放锁
+            os.close(fd)
@@ -0,0 +1,158 @@
+import pickle
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.config_validator import ConfigValidator
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def _escape(token: Any) -> str:
+    """按 RFC 6901 转义 JSON Pointer 片段"""
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def _digest(node: Any) -> bytes:
+    """计算节点内容摘要"""
+    return hashlib.blake2b(pickle.dumps(node, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+
+
+class IncrementalValidator:
+    """
+    增量配置验证引擎
+
+    对书签/服务配置中的每个分组与条目按内容摘要缓存验证结果，
+    内容未变化的节点直接复用缓存结论，只有变化的节点才会重新验证。
+    计算摘要需要序列化整个分组，因此先按分组名与上次验证的分组对象比较（不序列化），
+    内容相同的分组直接复用上次的结论；上次验证的分组对象之后不应被原地修改。
+    与 ConfigValidator 不同，它收集全部错误而不是遇到第一个错误就返回，
+    每个错误为 {'path': JSON Pointer, 'code': 错误代码, 'message': 错误信息}。
+    """
+
+    def __init__(self, validator: ConfigValidator, max_entries: int = 200000):
+        self.validator = validator
+        self.max_entries = max_entries
+        # {(类型, 摘要): ((相对路径, 错误代码, 错误信息), ...)}
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # {类型: {分组名: (上次验证的分组, 相对于分组的错误)}}
+        self._last_groups: Dict[str, Dict[Any, tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.unchanged = 0
+
+    def _cache_get(self, key: Tuple[str, bytes]):
+        with self._lock:
+            records = self._cache.get(key)
+            if records is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return records
+
+    def _cache_put(self, key: Tuple[str, bytes], records: tuple) -> None:
+        with self._lock:
+            self._cache[key] = records
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _check_item(self, kind: str, item_name: Any, item_config: Any) -> tuple:
+        """验证单个条目内容（按内容摘要缓存），返回相对于条目名的错误"""
+        key = (kind, _digest((item_name, item_config)))
+        records = self._cache_get(key)
+        if records is None:
+            try:
+                if kind == 'services':
+                    errors = self.validator._check_service(item_name, item_config)
+                else:
+                    errors = self.validator._check_bookmark(item_name, item_config)
+            except Exception as e:
+                errors = [('', 'exception', f"验证异常: {e}")]
+            records = tuple(errors)
+            self._cache_put(key, records)
+        return records
+
+    def _check_group(self, kind: str, label: str, group: Dict[str, list], group_name: Any, group_items: list) -> tuple:
+        """验证单个分组内的全部条目（按分组摘要缓存），返回相对于分组的错误"""
+        key = (f'{kind}-group', _digest(group))
+        records = self._cache_get(key)
+        if records is not None:
+            return records
+
+        group_records = []
+        group_pointer = _escape(group_name)
+        for item_index, item in enumerate(group_items):
+            item_name, error = self.validator._check_group_item(label, group_name, item_index, item)
+            item_pointer = f"{group_pointer}/{item_index}"
+            if error:
+                group_records.append((item_pointer, error[1], error[2]))
+                continue
+            for path, code, message in self._check_item(kind, item_name, item[item_name]):
+                pointer = f"{item_pointer}/{_escape(item_name)}"
+                group_records.append((f"{pointer}/{path}" if path else pointer, code, message))
+
+        records = tuple(group_records)
+        self._cache_put(key, records)
+        return records
+
+    def _validate_groups(self, kind: str, label: str, groups: Any,
+                         indices: Optional[List[int]] = None) -> List[Dict[str, str]]:
+        if not isinstance(groups, list):
+            return [{'path': '', 'code': 'type',
+                     'message': f"{label}配置必须是列表格式，当前类型: {type(groups).__name__}"}]
+
+        errors = []
+        last_groups = self._last_groups.get(kind, {})
+        # 完整验证时只保留本次的分组，部分验证（indices）时在上次的基础上更新
+        validated = dict(last_groups) if indices is not None else {}
+        unchanged = 0
+        for position, group in enumerate(groups):
+            group_index = indices[position] if indices is not None else position
+            group_name, group_items, error = self.validator._check_list_group(label, group_index, group)
+            if error:
+                pointer = f"/{group_index}/{_escape(group_name)}" if group_name is not None else f"/{group_index}"
+                errors.append({'path': pointer, 'code': error[1], 'message': error[2]})
+                continue
+            # 同一对象可能已被原地修改，只有不同对象且内容相等时才复用上次的结论
+            last = last_groups.get(group_name)
+            if last is not None and last[0] is not group and last[0] == group:
+                records = last[1]
+                unchanged += 1
+            else:
+                records = self._check_group(kind, label, group, group_name, group_items)
+            validated[group_name] = (group, records)
+            for path, code, message in records:
+                errors.append({'path': f"/{group_index}/{path}", 'code': code, 'message': message})
+        with self._lock:
+            self._last_groups[kind] = validated
+            self.unchanged += unchanged
+        return errors
+
+    def validate_services(self, services: Any, indices: Optional[List[int]] = None) -> List[Dict[str, str]]:
+        """
+        增量验证服务配置，返回全部错误（空列表表示通过）
+
+        只验证部分分组时，indices 为各分组在完整配置中的下标，错误路径和信息按该下标生成
+        """
+        return self._validate_groups('services', '服务', services, indices)
+
+    def validate_bookmarks(self, bookmarks: Any, indices: Optional[List[int]] = None) -> List[Dict[str, str]]:
+        """增量验证书签配置，返回全部错误（空列表表示通过），indices 含义同 validate_services"""
+        return self._validate_groups('bookmarks', '书签', bookmarks, indices)
+
+    def clear(self) -> None:
+        """清空验证缓存"""
+        with self._lock:
+            self._cache.clear()
+            self._last_groups.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'unchanged_groups': self.unchanged,
+                    'entries': len(self._cache)}
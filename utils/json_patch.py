@@ -0,0 +1,179 @@
+import pickle
+from typing import Any, List, Tuple
+
+_MISSING = object()
+
+
+class JsonPatchError(ValueError):
+    """JSON Patch 操作无效或执行失败"""
+
+
+def _clone(value: Any) -> Any:
+    """深拷贝纯数据结构（pickle 往返比 copy.deepcopy 快得多）"""
+    return pickle.loads(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """解析 RFC 6901 JSON Pointer，返回路径片段列表"""
+    if not isinstance(pointer, str):
+        raise JsonPatchError(f"路径必须是字符串: {pointer!r}")
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise JsonPatchError(f"路径必须以 '/' 开头: {pointer}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def make_pointer(*tokens: Any) -> str:
+    """由路径片段生成 RFC 6901 JSON Pointer（片段按需转义）"""
+    return ''.join('/' + str(token).replace('~', '~0').replace('/', '~1') for token in tokens)
+
+
+def _list_index(container: list, token: str, allow_end: bool = False) -> int:
+    """将路径片段解析为列表下标"""
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+        raise JsonPatchError(f"无效的列表下标: {token}")
+    index = int(token)
+    limit = len(container) + (1 if allow_end else 0)
+    if index >= limit:
+        raise JsonPatchError(f"列表下标越界: {token}")
+    return index
+
+
+def _child(container: Any, token: str) -> Any:
+    """按路径片段取子节点"""
+    if isinstance(container, list):
+        return container[_list_index(container, token)]
+    if isinstance(container, dict):
+        if token not in container:
+            raise JsonPatchError(f"路径不存在: {token}")
+        return container[token]
+    raise JsonPatchError(f"无法在 {type(container).__name__} 上继续解析路径: {token}")
+
+
+class _PatchSession:
+    """一次补丁批处理：顶层容器浅拷贝，被修改的顶层节点按需深拷贝（写时复制）"""
+
+    def __init__(self, document: Any):
+        if isinstance(document, list):
+            self.document = list(document)
+        elif isinstance(document, dict):
+            self.document = dict(document)
+        else:
+            raise JsonPatchError(f"不支持的文档类型: {type(document).__name__}")
+        self._owned = set()
+
+    def _own_top(self, token: str) -> None:
+        """确保顶层节点是本次会话私有的副本，修改它不会影响原文档"""
+        doc = self.document
+        key = _list_index(doc, token) if isinstance(doc, list) else token
+        if isinstance(doc, dict) and key not in doc:
+            raise JsonPatchError(f"路径不存在: {token}")
+        node = doc[key]
+        if id(node) not in self._owned:
+            node = _clone(node)
+            doc[key] = node
+            self._owned.add(id(node))
+
+    def _parent(self, tokens: List[str]) -> Any:
+        """获取路径的父容器（必要时先复制所在顶层节点）"""
+        if len(tokens) > 1:
+            self._own_top(tokens[0])
+        container = self.document
+        for token in tokens[:-1]:
+            container = _child(container, token)
+        return container
+
+    def get(self, tokens: List[str]) -> Any:
+        value = self.document
+        for token in tokens:
+            value = _child(value, token)
+        return value
+
+    def add(self, tokens: List[str], value: Any, fresh: bool = True) -> None:
+        if not tokens:
+            raise JsonPatchError("不支持替换整个文档")
+        parent = self._parent(tokens)
+        if isinstance(parent, list):
+            parent.insert(_list_index(parent, tokens[-1], allow_end=True), value)
+        elif isinstance(parent, dict):
+            parent[tokens[-1]] = value
+        else:
+            raise JsonPatchError(f"无法向 {type(parent).__name__} 添加子节点")
+        # 只有本次会话新建的值才可原地修改，从原文档移动过来的顶层节点仍需写时复制
+        if fresh:
+            self._owned.add(id(value))
+
+    def remove(self, tokens: List[str]) -> Any:
+        if not tokens:
+            raise JsonPatchError("不支持删除整个文档")
+        parent = self._parent(tokens)
+        if isinstance(parent, list):
+            return parent.pop(_list_index(parent, tokens[-1]))
+        if isinstance(parent, dict):
+            if tokens[-1] not in parent:
+                raise JsonPatchError(f"路径不存在: {tokens[-1]}")
+            return parent.pop(tokens[-1])
+        raise JsonPatchError(f"无法从 {type(parent).__name__} 删除子节点")
+
+    def replace(self, tokens: List[str], value: Any) -> None:
+        self.remove(tokens)
+        self.add(tokens, value)
+
+    def move(self, source: List[str], tokens: List[str]) -> None:
+        if tokens[:len(source)] == source and tokens != source:
+            raise JsonPatchError("不能将节点移动到其自身的子节点中")
+        value = self.remove(source)
+        self.add(tokens, value, fresh=len(source) > 1 or id(value) in self._owned)
+
+
+def apply_patch(document: Any, operations: List[dict]) -> Tuple[Any, list]:
+    """
+    对文档应用 RFC 6902 JSON Patch，返回(新文档, 被修改的顶层键/下标列表)
+
+    原文档不会被修改：新文档与原文档共享未被触及的顶层节点，
+    只有被修改的顶层节点会被复制，因此补丁成本只与触及的节点相关。
+    任一操作失败时抛出 JsonPatchError，整批操作不生效。
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("补丁必须是操作列表")
+
+    session = _PatchSession(document)
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or 'op' not in operation or 'path' not in operation:
+            raise JsonPatchError(f"操作 #{index + 1} 缺少 'op' 或 'path' 字段")
+
+        op = operation['op']
+        tokens = parse_pointer(operation['path'])
+        try:
+            if op == 'add':
+                session.add(tokens, operation['value'])
+            elif op == 'remove':
+                session.remove(tokens)
+            elif op == 'replace':
+                session.replace(tokens, operation['value'])
+            elif op == 'move':
+                session.move(parse_pointer(operation['from']), tokens)
+            elif op == 'copy':
+                session.add(tokens, _clone(session.get(parse_pointer(operation['from']))))
+            elif op == 'test':
+                if session.get(tokens) != operation['value']:
+                    raise JsonPatchError(f"测试失败: {operation['path']}")
+            else:
+                raise JsonPatchError(f"不支持的操作: {op}")
+        except KeyError as e:
+            raise JsonPatchError(f"操作 #{index + 1} ({op}) 缺少字段: {e}")
+        except JsonPatchError as e:
+            raise JsonPatchError(f"操作 #{index + 1} ({op} {operation['path']}) 失败: {e}")
+
+    # 与原文档对象不同的顶层节点即为新增或被修改的节点
+    new_document = session.document
+    if isinstance(new_document, list):
+        original_ids = {id(node) for node in document}
+        touched = [i for i, node in enumerate(new_document) if id(node) not in original_ids]
+    else:
+        touched = [key for key, node in new_document.items() if document.get(key, _MISSING) is not node]
+    return new_document, touched
+
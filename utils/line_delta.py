@@ -0,0 +1,61 @@
+import difflib
+from typing import List, Optional, Union
+
+# 差异操作：[起始行, 结束行] 表示复制基准内容中的这些行，字符串表示插入的新内容
+DeltaOp = Union[List[int], str]
+
+
+def _split_lines(content: bytes) -> Optional[List[str]]:
+    """按行拆分（保留换行符），非 UTF-8 内容返回 None"""
+    try:
+        return content.decode('utf-8').splitlines(keepends=True)
+    except UnicodeDecodeError:
+        return None
+
+
+def make_delta(base: bytes, target: bytes) -> Optional[List[DeltaOp]]:
+    """
+    计算把 base 变为 target 的按行差异
+
+    只记录复制区间和插入的文本，删除的行不占空间；任一内容不是 UTF-8 文本时返回 None。
+    """
+    base_lines = _split_lines(base)
+    target_lines = _split_lines(target)
+    if base_lines is None or target_lines is None:
+        return None
+
+    # 先去掉相同的开头和结尾，只对中间变化的部分做匹配（通常只有几行）
+    prefix = 0
+    limit = min(len(base_lines), len(target_lines))
+    while prefix < limit and base_lines[prefix] == target_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and base_lines[-1 - suffix] == target_lines[-1 - suffix]):
+        suffix += 1
+
+    ops: List[DeltaOp] = []
+    if prefix:
+        ops.append([0, prefix])
+    matcher = difflib.SequenceMatcher(None, base_lines[prefix:len(base_lines) - suffix],
+                                      target_lines[prefix:len(target_lines) - suffix])
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([prefix + i1, prefix + i2])
+        elif j2 > j1:
+            ops.append(''.join(target_lines[prefix + j1:prefix + j2]))
+    if suffix:
+        ops.append([len(base_lines) - suffix, len(base_lines)])
+    return ops
+
+
+def apply_delta(base: bytes, ops: List[DeltaOp]) -> bytes:
+    """把差异应用到 base 上，得到目标内容"""
+    base_lines = base.decode('utf-8').splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return ''.join(parts).encode('utf-8')
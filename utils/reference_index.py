@@ -0,0 +1,217 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.config_tree import iter_group_entries, resolve_pointer
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 建立索引的配置文件
+INDEXED_CONFIGS = ['services', 'bookmarks']
+
+# 引用类型：docker 为服务的 server 字段，icon/href 为服务和书签的同名字段
+REFERENCE_KINDS = ['docker', 'icon', 'href']
+
+
+def _item_fields(config_name: str, value: Any) -> List[Dict[str, Any]]:
+    """条目中包含引用字段的字典：服务为配置字典本身，书签为配置列表中的每一项"""
+    if config_name == 'services':
+        return [value] if isinstance(value, dict) else []
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+
+def _group_refs(config_name: str, group_index: int, group: Any) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """单个顶层分组中的引用 [(引用类型, 被引用值, 引用方)]，按条目在配置中的顺序排列"""
+    # 只有服务可以关联 Docker 实例
+    kinds = REFERENCE_KINDS if config_name == 'services' else ['icon', 'href']
+    refs = []
+    for path, group_name, item_name, value in iter_group_entries(config_name, group, f"/{group_index}"):
+        if group_name is None:
+            continue
+        ref = {'config': config_name, 'group': group_name, 'name': item_name, 'path': path}
+        for fields in _item_fields(config_name, value):
+            for kind in kinds:
+                target = fields.get('server' if kind == 'docker' else kind)
+                if isinstance(target, str) and target:
+                    refs.append((kind, target, ref))
+    return refs
+
+
+def _ref_order(ref: Dict[str, Any]) -> tuple:
+    """引用方在配置中的位置（路径中各级列表下标），用于保持引用列表按配置顺序排列"""
+    tokens = ref['path'][1:].split('/')
+    return tuple(int(token) for token in tokens[::2])
+
+
+class _FileIndex:
+    """单个配置文件的索引：按顶层分组记录引用，配置变化时只重新遍历内容变化的分组"""
+
+    def __init__(self, config_name: str, fingerprint: Any, groups: list, group_refs: list,
+                 index: Dict[str, Dict[str, List[Dict[str, Any]]]]):
+        self.config_name = config_name
+        self.fingerprint = fingerprint
+        self.groups = groups
+        self.group_refs = group_refs
+        # {引用类型: {被引用值: [引用方]}}，只整体替换，不原地修改
+        self.index = index
+
+    @classmethod
+    def build(cls, config_name: str, fingerprint: Any, groups: Any) -> '_FileIndex':
+        groups = groups if isinstance(groups, list) else []
+        group_refs = [_group_refs(config_name, group_index, group) for group_index, group in enumerate(groups)]
+        index = {kind: {} for kind in REFERENCE_KINDS}
+        for refs in group_refs:
+            for kind, target, ref in refs:
+                index[kind].setdefault(target, []).append(ref)
+        return cls(config_name, fingerprint, groups, group_refs, index)
+
+    def update(self, fingerprint: Any, groups: Any) -> Tuple['_FileIndex', int]:
+        """
+        与上次的分组逐个比较，返回(新索引, 重新遍历的分组数)
+
+        同一位置上内容相等的分组沿用上次的引用；同一个对象可能已被调用方原地修改，
+        与增量验证一样重新遍历。其余分组重新遍历，只替换涉及的被引用值的引用列表。
+        """
+        groups = groups if isinstance(groups, list) else []
+        old_groups, old_refs = self.groups, self.group_refs
+        group_refs, removed, added = [], [], []
+        rescanned = 0
+        for group_index, group in enumerate(groups):
+            if group_index < len(old_groups):
+                old_group = old_groups[group_index]
+                if old_group is not group and old_group == group:
+                    group_refs.append(old_refs[group_index])
+                    continue
+                removed.extend(old_refs[group_index])
+            refs = _group_refs(self.config_name, group_index, group)
+            group_refs.append(refs)
+            added.extend(refs)
+            rescanned += 1
+        for refs in old_refs[len(groups):]:
+            removed.extend(refs)
+
+        index = dict(self.index)
+        changed: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for kind, target, ref in removed:
+            values = changed.setdefault(kind, {})
+            if target not in values:
+                values[target] = list(self.index[kind].get(target, []))
+            values[target] = [item for item in values[target] if item is not ref]
+        for kind, target, ref in added:
+            values = changed.setdefault(kind, {})
+            if target not in values:
+                values[target] = list(self.index[kind].get(target, []))
+            values[target].append(ref)
+        for kind, values in changed.items():
+            index[kind] = dict(index[kind])
+            for target, refs in values.items():
+                if refs:
+                    refs.sort(key=_ref_order)
+                    index[kind][target] = refs
+                else:
+                    index[kind].pop(target, None)
+        return _FileIndex(self.config_name, fingerprint, groups, group_refs, index), rescanned
+
+
+class ReferenceIndex:
+    """
+    服务/书签到 Docker 实例、图标和链接的反向引用索引
+
+    每个配置文件单独维护一份索引：经 YamlManager 保存时用保存的数据与上次的分组逐个比较，
+    只重新遍历变化的分组；文件指纹在应用外发生变化时重新加载后同样按分组更新。
+    查询"谁在使用"时只按键查找，不扫描配置。
+    """
+
+    def __init__(self, yaml_manager):
+        self.yaml_manager = yaml_manager
+        # {配置名: _FileIndex}
+        self._indexes: Dict[str, _FileIndex] = {}
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.rescanned_groups = 0
+        yaml_manager.add_change_listener(self._on_change)
+
+    def _refresh(self, config_name: str, fingerprint: Any, groups: Any) -> _FileIndex:
+        """用新的配置内容更新单个文件的索引"""
+        with self._lock:
+            entry = self._indexes.get(config_name)
+        if entry is None:
+            entry = _FileIndex.build(config_name, fingerprint, groups)
+            rescanned = len(entry.groups)
+        else:
+            entry, rescanned = entry.update(fingerprint, groups)
+        with self._lock:
+            self._indexes[config_name] = entry
+            self.rescanned_groups += rescanned
+        return entry
+
+    def _on_change(self, config_name: str, data: Any) -> None:
+        """配置保存后按分组更新对应文件的索引"""
+        if config_name not in INDEXED_CONFIGS:
+            return
+        if data is None:
+            with self._lock:
+                self._indexes.pop(config_name, None)
+            return
+        fingerprint = self.yaml_manager.file_fingerprint(self.yaml_manager.get_config_file_path(config_name))
+        self._refresh(config_name, fingerprint, data)
+
+    def _get_index(self, config_name: str) -> Dict[str, Dict[Any, List[Dict[str, Any]]]]:
+        """获取单个文件的索引，文件在应用外被修改过时重新加载并按分组更新"""
+        file_path = self.yaml_manager.get_config_file_path(config_name)
+        fingerprint = self.yaml_manager.file_fingerprint(file_path)
+        with self._lock:
+            entry = self._indexes.get(config_name)
+        if entry is not None and entry.fingerprint == fingerprint:
+            return entry.index
+        entry = self._refresh(config_name, fingerprint, self.yaml_manager._load_document(file_path))
+        with self._lock:
+            self.rebuilds += 1
+        return entry.index
+
+    def find(self, kind: str, value: str, configs: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        查找引用了指定值的条目，返回 [{'config', 'group', 'name', 'path'}]
+
+        kind 为 docker（Docker 实例名）、icon 或 href；path 为条目在配置中的 JSON Pointer。
+        """
+        if kind not in REFERENCE_KINDS:
+            raise ValueError(f"不支持的引用类型: {kind}")
+        refs = []
+        for config_name in configs or INDEXED_CONFIGS:
+            refs.extend(self._get_index(config_name)[kind].get(value, []))
+        return refs
+
+    def usage(self, kind: str) -> Dict[str, int]:
+        """每个被引用值的引用次数"""
+        counts: Dict[str, int] = {}
+        for config_name in INDEXED_CONFIGS:
+            for value, refs in self._get_index(config_name)[kind].items():
+                counts[value] = counts.get(value, 0) + len(refs)
+        return counts
+
+    def retarget_docker(self, services: list, old_name: str, new_name: Optional[str]) -> int:
+        """
+        把服务中引用 old_name 的 server 改为 new_name；new_name 为 None 时移除 server 和 container
+
+        services 为调用方持有文件锁时加载的服务配置（会被原地修改），按索引中的路径直接定位，
+        不遍历配置；索引与数据不一致时抛出 ValueError。返回修改的服务数。
+        """
+        refs = self.find('docker', old_name, configs=['services'])
+        for ref in refs:
+            config = resolve_pointer(services, ref['path'])
+            if not isinstance(config, dict) or config.get('server') != old_name:
+                raise ValueError(f"服务配置已变化，请刷新后重试: {ref['group']} / {ref['name']}")
+            if new_name is None:
+                config.pop('server', None)
+                config.pop('container', None)
+            else:
+                config['server'] = new_name
+        return len(refs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = {config_name: {kind: len(values) for kind, values in entry.index.items()}
+                       for config_name, entry in self._indexes.items()}
+        return {'indexes': entries, 'rebuilds': self.rebuilds, 'rescanned_groups': self.rescanned_groups}
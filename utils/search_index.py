@@ -0,0 +1,374 @@
+import re
+import hashlib
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from utils.incremental_validator import _escape
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 建立搜索索引的配置文件
+SEARCH_CONFIGS = ['services', 'bookmarks', 'widgets']
+
+# 条目的索引字段（小工具的 href 为 url，description 为类型）
+SEARCH_FIELDS = ['group', 'name', 'href', 'description', 'icon']
+
+# 词元：连续的字母数字，或单个汉字（中文按字检索）
+TOKEN_PATTERN = re.compile(r'[0-9a-z]+|[\u3400-\u9fff\uf900-\ufaff]')
+
+# 几乎每个链接都包含的词元，不建立索引
+STOP_TOKENS = frozenset(['http', 'https', 'www'])
+
+# 参与模糊匹配的最短词元长度（更短的词元误差一个字符就变成另一个词）
+FUZZY_MIN_LENGTH = 4
+
+# 单个查询词最多展开的前缀词元数
+MAX_PREFIX_EXPANSIONS = 512
+
+# 一次更新中词表变化超过该数量时整体重新排序，否则逐个插入/删除
+VOCABULARY_RESORT_THRESHOLD = 64
+
+# 匹配得分：完全匹配 > 前缀匹配 > 模糊匹配，命中名称额外加分
+SCORE_EXACT = 3
+SCORE_PREFIX = 2
+SCORE_FUZZY = 1
+SCORE_NAME_BONUS = 2
+
+# 内容未知、需要重新加载的文件指纹标记
+_STALE = object()
+
+
+def tokenize(text: Any) -> List[str]:
+    """把字段值切分为小写词元"""
+    if not isinstance(text, str) or not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_TOKENS]
+
+
+def _deletes(token: str) -> List[str]:
+    """删除一个字符得到的全部变体，用于编辑距离为 1 左右的模糊匹配"""
+    return [token[:position] + token[position + 1:] for position in range(len(token))]
+
+
+def _fuzzy_candidate(token: str) -> bool:
+    return len(token) >= FUZZY_MIN_LENGTH and not token.isdigit()
+
+
+def _text(value: Any) -> Optional[str]:
+    """只索引字符串字段，其他类型（无效配置）按缺失处理"""
+    return value if isinstance(value, str) else None
+
+
+def _segments(config_name: str, data: Any) -> Iterator[Tuple[Optional[int], Any, Any]]:
+    """
+    把配置切分为增量更新的单位，产出(分组序号, 分组名, 内容)
+
+    服务和书签以分组为单位；小工具每个一段，分组序号为小工具在配置中的序号。
+    """
+    if config_name == 'widgets':
+        if isinstance(data, dict):
+            for widget_index, (name, config) in enumerate(data.items()):
+                yield widget_index, name, config
+        return
+    if not isinstance(data, list):
+        return
+    for group_index, group in enumerate(data):
+        if isinstance(group, dict) and len(group) == 1:
+            group_name = next(iter(group))
+            if isinstance(group[group_name], list):
+                yield group_index, group_name, group[group_name]
+
+
+def _segment_items(config_name: str, label: Any, content: Any) -> Iterator[Tuple[int, tuple]]:
+    """遍历一段中的条目，产出(条目序号, (分组, 名称, 链接, 描述, 图标))"""
+    if config_name == 'widgets':
+        config = content if isinstance(content, dict) else {}
+        yield 0, (None, label, _text(config.get('url')), _text(config.get('type')), None)
+        return
+    for item_index, item in enumerate(content):
+        if not isinstance(item, dict) or len(item) != 1:
+            continue
+        name = next(iter(item))
+        value = item[name]
+        # 书签的配置为列表，取第一个配置项
+        if config_name == 'bookmarks' and isinstance(value, list):
+            value = next((entry for entry in value if isinstance(entry, dict)), None)
+        fields = value if isinstance(value, dict) else {}
+        yield item_index, (label, name, _text(fields.get('href')), _text(fields.get('description')),
+                           _text(fields.get('icon')))
+
+
+def _digest(content: Any) -> bytes:
+    """分组内容的摘要，内容相同的分组不重新建立索引"""
+    return hashlib.blake2b(repr(content).encode('utf-8', errors='surrogatepass'), digest_size=16).digest()
+
+
+def _path(doc: list) -> str:
+    """条目在配置中的 JSON Pointer"""
+    config_name, group_name, name, _, _, _, segment, item_index = doc
+    if config_name == 'widgets':
+        return f"/{_escape(name)}"
+    return f"/{segment[0]}/{_escape(group_name)}/{item_index}/{_escape(name)}"
+
+
+class SearchIndex:
+    """
+    服务、书签和小工具的全文搜索索引
+
+    倒排索引覆盖名称、链接、描述、图标和分组名：词表有序保存，前缀匹配用二分查找定位；
+    模糊匹配使用删除一个字符的变体索引，查询时只做字典查找。
+    配置经 YamlManager 保存后按分组内容的摘要比较新旧配置，只为新增或修改的分组重新建立索引，
+    分组移动位置时只更新序号；文件在应用外被修改时（文件指纹变化）在下次查询前同样增量更新。
+    """
+
+    def __init__(self, yaml_manager):
+        self.yaml_manager = yaml_manager
+        # {条目 ID: [配置名, 分组, 名称, 链接, 描述, 图标, 所在分段, 条目序号]}
+        self._docs: Dict[int, list] = {}
+        # {条目 ID: 词元}
+        self._doc_tokens: Dict[int, frozenset] = {}
+        # {词元: {条目 ID}}，名称中的词元另外保存一份用于加分
+        self._postings: Dict[str, Set[int]] = {}
+        self._name_postings: Dict[str, Set[int]] = {}
+        # {配置名: {条目 ID}}
+        self._config_docs: Dict[str, Set[int]] = {}
+        # 有序词表，用于前缀匹配
+        self._vocabulary: List[str] = []
+        # {删除一个字符的变体: {词元}}
+        self._deletes: Dict[str, Set[str]] = {}
+        # {配置名: (文件指纹, {(分组名, 内容摘要): [分段]})}，分段为 [分组序号, [条目 ID]]
+        self._configs: Dict[str, tuple] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.updates = 0
+        self.indexed = 0
+        yaml_manager.add_change_listener(self._on_change)
+
+    def _on_change(self, config_name: str, data: Any) -> None:
+        """配置保存后增量更新对应文件的索引"""
+        if config_name not in SEARCH_CONFIGS:
+            return
+        if data is None:
+            # 内容未知：下次查询时按文件指纹重新加载
+            with self._lock:
+                entry = self._configs.get(config_name)
+                if entry is not None:
+                    self._configs[config_name] = (_STALE, entry[1])
+            return
+        fingerprint = self.yaml_manager.file_fingerprint(self.yaml_manager.get_config_file_path(config_name))
+        with self._lock:
+            self._apply(config_name, data, fingerprint)
+            self.updates += 1
+
+    def _ensure(self, config_name: str) -> None:
+        """文件指纹变化（应用外修改或尚未建立索引）时重新加载并增量更新"""
+        file_path = self.yaml_manager.get_config_file_path(config_name)
+        fingerprint = self.yaml_manager.file_fingerprint(file_path)
+        with self._lock:
+            entry = self._configs.get(config_name)
+            if entry is not None and entry[0] == fingerprint:
+                return
+        data = self.yaml_manager._load_document(file_path)
+        with self._lock:
+            self._apply(config_name, data, fingerprint)
+            self.rebuilds += 1
+
+    def _apply(self, config_name: str, data: Any, fingerprint: Any) -> None:
+        """用新的配置内容更新索引：内容未变的分组只更新序号，其余分组删除或新增（调用方持有锁）"""
+        entry = self._configs.get(config_name)
+        previous = {key: list(segments) for key, segments in entry[1].items()} if entry is not None else {}
+        changed_tokens: Set[str] = set()
+        current: Dict[tuple, list] = {}
+        for position, label, content in _segments(config_name, data):
+            key = (label, _digest(content))
+            segments = previous.get(key)
+            if segments:
+                segment = segments.pop()
+                segment[0] = position
+            else:
+                segment = [position, []]
+                for item_index, fields in _segment_items(config_name, label, content):
+                    segment[1].append(self._add(config_name, fields, segment, item_index, changed_tokens))
+            current.setdefault(key, []).append(segment)
+        for segments in previous.values():
+            for segment in segments:
+                for doc_id in segment[1]:
+                    self._remove(doc_id, changed_tokens)
+        self._configs[config_name] = (fingerprint, current)
+        self._update_vocabulary(changed_tokens)
+
+    def _add(self, config_name: str, fields: tuple, segment: list, item_index: int,
+             changed_tokens: Set[str]) -> int:
+        doc_id = self._next_id
+        self._next_id += 1
+        tokens = set()
+        for value in fields:
+            tokens.update(tokenize(value))
+        self._docs[doc_id] = [config_name, *fields, segment, item_index]
+        self._doc_tokens[doc_id] = frozenset(tokens)
+        self._config_docs.setdefault(config_name, set()).add(doc_id)
+        for token in tokenize(fields[1]):
+            self._name_postings.setdefault(token, set()).add(doc_id)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                changed_tokens.add(token)
+                if _fuzzy_candidate(token):
+                    for variant in _deletes(token):
+                        self._deletes.setdefault(variant, set()).add(token)
+            postings.add(doc_id)
+        self.indexed += 1
+        return doc_id
+
+    def _remove(self, doc_id: int, changed_tokens: Set[str]) -> None:
+        doc = self._docs.pop(doc_id)
+        self._config_docs[doc[0]].discard(doc_id)
+        for token in tokenize(doc[2]):
+            named = self._name_postings.get(token)
+            if named is not None:
+                named.discard(doc_id)
+                if not named:
+                    del self._name_postings[token]
+        tokens = self._doc_tokens.pop(doc_id)
+        for token in tokens:
+            postings = self._postings[token]
+            postings.discard(doc_id)
+            if postings:
+                continue
+            del self._postings[token]
+            changed_tokens.add(token)
+            if _fuzzy_candidate(token):
+                for variant in _deletes(token):
+                    variants = self._deletes.get(variant)
+                    if variants is not None:
+                        variants.discard(token)
+                        if not variants:
+                            del self._deletes[variant]
+
+    def _update_vocabulary(self, changed_tokens: Set[str]) -> None:
+        """同步有序词表：变化较少时逐个插入/删除，否则整体重新排序"""
+        if len(changed_tokens) > VOCABULARY_RESORT_THRESHOLD:
+            self._vocabulary = sorted(self._postings)
+            return
+        for token in changed_tokens:
+            position = bisect_left(self._vocabulary, token)
+            present = position < len(self._vocabulary) and self._vocabulary[position] == token
+            if token in self._postings and not present:
+                insort(self._vocabulary, token)
+            elif token not in self._postings and present:
+                del self._vocabulary[position]
+
+    def _match_term(self, term: str, fuzzy: bool) -> Tuple[Set[int], Set[int], Set[int]]:
+        """单个查询词的匹配，返回(完全匹配, 前缀匹配, 全部匹配) 的条目 ID 集合"""
+        exact = self._postings.get(term, set())
+        expansions = []
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not token.startswith(term):
+                break
+            if token != term:
+                expansions.append(self._postings[token])
+        # 返回的集合可能就是倒排表本身，调用方只能读取
+        prefix = expansions[0] if len(expansions) == 1 else set().union(*expansions)
+        matched = exact | prefix if prefix else exact
+        if fuzzy and _fuzzy_candidate(term):
+            # 词元与查询词删除一个字符后相同（替换、插入、删除或相邻交换一个字符）
+            similar = set(self._deletes.get(term, ()))
+            for variant in _deletes(term):
+                similar.update(self._deletes.get(variant, ()))
+                if variant in self._postings:
+                    similar.add(variant)
+            similar.discard(term)
+            if similar:
+                matched = matched.union(*(self._postings[token] for token in similar))
+        return exact, prefix, matched
+
+    def search(self, query: str, configs: Optional[List[str]] = None, limit: int = 20,
+               fuzzy: bool = True) -> Dict[str, Any]:
+        """
+        搜索条目，返回 {'total', 'results'}
+
+        查询按词切分，每个词可以完全匹配、前缀匹配或模糊匹配（编辑距离约为 1）任一字段，
+        所有词都匹配的条目按得分排序；results 中每项为
+        {'config', 'group', 'name', 'href', 'description', 'icon', 'path', 'score'}。
+        """
+        configs = configs or SEARCH_CONFIGS
+        for config_name in configs:
+            if config_name not in SEARCH_CONFIGS:
+                raise ValueError(f"不支持搜索的配置: {config_name}")
+            self._ensure(config_name)
+
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {'total': 0, 'results': []}
+
+        with self._lock:
+            matches = [self._match_term(term, fuzzy) for term in terms]
+            # 从最小的集合开始求交集
+            candidates = None
+            for _, _, matched in sorted(matches, key=lambda match: len(match[2])):
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    break
+            if len(configs) < len(SEARCH_CONFIGS):
+                candidates = candidates & set().union(*(self._config_docs.get(config_name, ()) for config_name in configs))
+
+            # 得分 = 每个词的模糊匹配分 + 更好匹配的加分；加分按集合累计，不逐条目计算，
+            # 所有候选条目都能得到的加分直接计入基础分
+            base = SCORE_FUZZY * len(terms)
+            bonus: Counter = Counter()
+            for term, (exact, prefix, _) in zip(terms, matches):
+                weighted = [(exact & candidates, SCORE_EXACT - SCORE_FUZZY),
+                            ((prefix - exact) & candidates, SCORE_PREFIX - SCORE_FUZZY),
+                            (self._name_postings.get(term, set()) & candidates, SCORE_NAME_BONUS)]
+                for doc_ids, weight in weighted:
+                    if len(doc_ids) == len(candidates):
+                        base += weight
+                        continue
+                    for _ in range(weight):
+                        bonus.update(doc_ids)
+
+            # 从最高分开始取，同分时按条目在配置中的顺序排列（增量更新后条目编号不再反映配置中的顺序）
+            best: List[Tuple[int, int]] = []
+            for level in sorted(set(bonus.values()), reverse=True):
+                tied = heapq.nsmallest(limit - len(best), (doc_id for doc_id, value in bonus.items() if value == level),
+                                       key=self._order_key)
+                best.extend((doc_id, level) for doc_id in tied)
+                if len(best) >= limit:
+                    break
+            if len(best) < limit:
+                best.extend((doc_id, 0) for doc_id in heapq.nsmallest(limit - len(best), candidates - bonus.keys(),
+                                                                      key=self._order_key))
+            results = []
+            for doc_id, extra in best:
+                doc = self._docs[doc_id]
+                result = dict(zip(['config', *SEARCH_FIELDS], doc))
+                result['path'] = _path(doc)
+                result['score'] = base + extra
+                results.append(result)
+        return {'total': len(candidates), 'results': results}
+
+    def _order_key(self, doc_id: int) -> Tuple[int, int, int]:
+        """条目在配置中的位置：(配置, 分组序号, 条目序号)（调用方持有锁）"""
+        doc = self._docs[doc_id]
+        return SEARCH_CONFIGS.index(doc[0]), doc[6][0], doc[7]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'documents': len(self._docs),
+                'tokens': len(self._postings),
+                'configs': {config_name: sum(len(segment[1]) for segments in entry[1].values()
+                                             for segment in segments)
+                            for config_name, entry in self._configs.items()},
+                'rebuilds': self.rebuilds,
+                'updates': self.updates,
+                'indexed': self.indexed
+            }
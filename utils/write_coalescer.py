@@ -0,0 +1,103 @@
+import pickle
+import logging
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class WriteCoalescer:
+    """写入合并队列：在时间窗口内对同一文件的多次保存只落盘最后一次"""
+
+    def __init__(self, flush_func: Callable[[Dict[str, Any]], None], window: float):
+        # flush_func 接收 {文件路径: 数据}，负责一次性写入整批文件
+        self._flush_func = flush_func
+        self.window = window
+        # {文件路径: pickle 快照}，提交后调用方继续修改数据不会影响待写内容
+        self._pending: Dict[str, bytes] = {}
+        # 正在落盘的一批快照；落盘前被 take 取走或被新提交取代的文件不再写入
+        self._inflight: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self.submitted = 0
+        self.flushed = 0
+
+    def submit(self, file_path: str, data: Any) -> None:
+        """提交一次写入，窗口结束时统一落盘"""
+        snapshot = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._pending[file_path] = snapshot
+            self.submitted += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def get_pending(self, file_path: str) -> Tuple[bool, Any]:
+        """获取尚未落盘的数据，返回(是否存在, 数据副本)"""
+        with self._lock:
+            snapshot = self._pending.get(file_path)
+        if snapshot is None:
+            return False, None
+        return True, pickle.loads(snapshot)
+
+    def take(self, file_path: str) -> Tuple[bool, Any]:
+        """取出并移除尚未落盘的数据，返回(是否存在, 数据)；调用方持有文件锁并自行写入"""
+        with self._lock:
+            snapshot = self._pending.pop(file_path, None)
+        if snapshot is None:
+            return False, None
+        return True, pickle.loads(snapshot)
+
+    def is_current(self, file_path: str) -> bool:
+        """正在落盘的数据是否仍是该文件最新的待写数据（flush_func 持有文件锁后检查）"""
+        with self._lock:
+            snapshot = self._inflight.get(file_path)
+            return snapshot is not None and self._pending.get(file_path) is snapshot
+
+    def has_pending(self) -> bool:
+        """是否有待写入的数据"""
+        with self._lock:
+            return bool(self._pending)
+
+    def flush(self) -> None:
+        """立即写入所有待写数据"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch = dict(self._pending)
+                self._inflight = batch
+            if not batch:
+                return
+
+            try:
+                self._flush_func({path: pickle.loads(snapshot) for path, snapshot in batch.items()})
+                self.flushed += len(batch)
+            except Exception as e:
+                logger.error(f"Coalesced write failed: {e}")
+            finally:
+                # 写入期间又被提交的新数据保留到下一个窗口
+                with self._lock:
+                    self._inflight = {}
+                    for path, snapshot in batch.items():
+                        if self._pending.get(path) is snapshot:
+                            del self._pending[path]
+                    if self._pending and self._timer is None:
+                        self._timer = threading.Timer(self.window, self.flush)
+                        self._timer.daemon = True
+                        self._timer.start()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列统计"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'window_ms': int(self.window * 1000),
+            'submitted': self.submitted,
+            'flushed': self.flushed,
+            'pending': pending
+        }
@@ -0,0 +1,88 @@
+import os
+import logging
+from typing import Any, Dict, Optional
+
+import yaml
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 选择 YAML 后端的环境变量: auto（默认）、libyaml、python
+YAML_BACKEND_ENV = 'HOMEMAN_YAML_BACKEND'
+
+
+class YamlBackend:
+    """YAML 解析/序列化后端，封装一组 Loader/Dumper"""
+
+    def __init__(self, name: str, loader: type, dumper: type):
+        self.name = name
+        self.loader = loader
+        self.dumper = dumper
+
+    @property
+    def accelerated(self) -> bool:
+        """是否为 libyaml C 加速实现"""
+        return self.name == 'libyaml'
+
+    def safe_load(self, stream: Any) -> Any:
+        """等价于 yaml.safe_load"""
+        return yaml.load(stream, Loader=self.loader)
+
+    def dump(self, data: Any, stream: Any = None, **kwargs) -> Any:
+        """等价于 yaml.safe_dump"""
+        return yaml.dump(data, stream, Dumper=self.dumper, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"YamlBackend({self.name})"
+
+
+def available_backends() -> Dict[str, YamlBackend]:
+    """获取当前环境可用的后端，按优先级排列"""
+    backends = {}
+    if getattr(yaml, '__with_libyaml__', False):
+        backends['libyaml'] = YamlBackend('libyaml', yaml.CSafeLoader, yaml.CSafeDumper)
+    backends['python'] = YamlBackend('python', yaml.SafeLoader, yaml.SafeDumper)
+    return backends
+
+
+def select_backend(name: Optional[str] = None) -> YamlBackend:
+    """按名称选择后端，未指定时读取环境变量；请求的后端不可用时回退到纯 Python 实现"""
+    requested = (name or os.getenv(YAML_BACKEND_ENV, 'auto')).strip().lower()
+    backends = available_backends()
+
+    if requested in ('', 'auto'):
+        return next(iter(backends.values()))
+
+    if requested in ('c', 'libyaml'):
+        requested = 'libyaml'
+
+    if requested in backends:
+        return backends[requested]
+
+    logger.warning(f"YAML backend '{requested}' is not available, falling back to pure Python")
+    return backends['python']
+
+
+# 进程级默认后端
+backend = select_backend()
+logger.info(f"Using YAML backend: {backend.name}")
+
+
+def safe_load(stream: Any) -> Any:
+    """使用当前后端解析 YAML"""
+    return backend.safe_load(stream)
+
+
+def dump(data: Any, stream: Any = None, **kwargs) -> Any:
+    """使用当前后端序列化 YAML"""
+    return backend.dump(data, stream, **kwargs)
+
+
+def get_backend_info() -> Dict[str, Any]:
+    """获取后端状态信息"""
+    return {
+        'name': backend.name,
+        'accelerated': backend.accelerated,
+        'available': list(available_backends().keys()),
+        'pyyaml_version': yaml.__version__
+    }
@@ -1,18 +1,52 @@
 import yaml
 import os
+import json
+import base64
 import shutil
+import atexit
+import pickle
+import hashlib
 import logging
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from functools import partial
+from typing import BinaryIO, Dict, Any, Callable, Iterator, Optional, Tuple, Union
+from utils import yaml_backend
+from utils.write_coalescer import WriteCoalescer
+from utils.file_lock import FileLockManager
+from utils.backup_store import BackupStore
+from utils.archive_stream import ArchiveEntry
+from utils.config_restore import RESTORABLE_FILES, merge_selected
+from utils.json_patch import apply_patch, JsonPatchError
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class RevisionConflictError(Exception):
+    """写入时携带的版本号与配置文件当前版本不一致（或缺少版本号）"""
+
+    def __init__(self, config_name: str, current_revision: str, missing: bool = False):
+        self.config_name = config_name
+        self.current_revision = current_revision
+        self.missing = missing
+        if missing:
+            message = f"保存 {config_name} 需要提供当前版本号（If-Match）"
+        else:
+            message = f"{config_name} 已被修改，请重新加载后再保存"
+        super().__init__(message)
+
+
 class YamlManager:
     """Homepage YAML 配置文件管理器"""
     
-    def __init__(self, config_path: str = '/app/config'):
+    # 写入 YAML 时使用的序列化参数
+    DUMP_OPTIONS = dict(default_flow_style=False, allow_unicode=True, indent=2, sort_keys=False)
+    
+    def __init__(self, config_path: str = '/app/config', write_coalesce_window: float = 0.0,
+                 backup_delta_chain: int = 0):
         self.config_path = config_path
         self.settings_file = os.path.join(config_path, 'settings.yaml')
         self.bookmarks_file = os.path.join(config_path, 'bookmarks.yaml')
@@ -20,29 +54,166 @@ class YamlManager:
         self.widgets_file = os.path.join(config_path, 'widgets.yaml')
         self.docker_file = os.path.join(config_path, 'docker.yaml')
         self.backup_dir = os.path.join(config_path, 'backups')
+        self.lock_dir = os.path.join(config_path, '.homeman-locks')
+        self.restore_journal = os.path.join(config_path, '.homeman-restore.json')
+        
+        # 解析结果缓存: {文件路径: ((st_mtime_ns, st_size, st_ino), pickle 快照)}
+        # 命中时反序列化快照，每个调用方拿到独立副本，修改返回值不会污染缓存
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        # 配置变更监听器: listener(配置名, 数据)
+        self._change_listeners = []
+        
+        # 文件版本号缓存: {文件路径: (文件指纹, 版本号)}，版本号为文件内容的哈希
+        self._revisions = {}
+        
+        # 写入合并队列：窗口大于 0 时，同一文件的连续保存会合并为一次落盘
+        self._write_coalescer = None
+        if write_coalesce_window > 0:
+            self._write_coalescer = WriteCoalescer(self._write_yaml_batch, write_coalesce_window)
+            atexit.register(self._write_coalescer.flush)
         
         # 确保目录存在
         try:
             os.makedirs(config_path, exist_ok=True)
             os.makedirs(self.backup_dir, exist_ok=True)
+            # 跨进程写锁：多个 worker 写同一文件时互斥，读取无需加锁
+            self._file_locks = FileLockManager(self.lock_dir)
+            # 内容寻址的备份存储，首次启动时转换旧版备份目录；backup_delta_chain > 0 时启用增量备份
+            self.backup_store = BackupStore(self.backup_dir, self._file_locks, delta_chain=backup_delta_chain)
+            self.backup_store.migrate_legacy_backups()
+            self._recover_restore()
             logger.info(f"Initialized YamlManager with config path: {config_path}")
         except Exception as e:
             logger.error(f"Failed to create directories: {e}")
             raise
     
-    def _load_yaml_file(self, file_path: str) -> Dict[str, Any]:
-        """加载 YAML 文件"""
+    def file_fingerprint(self, file_path: str) -> Optional[Tuple[int, int, int]]:
+        """
+        获取文件指纹 (st_mtime_ns, st_size, st_ino)，文件不存在时返回 None
+
+        解析缓存以此判断文件是否变化；依赖配置内容的派生缓存（搜索索引、统计等）应使用同一指纹。
+        """
         try:
-            if os.path.exists(file_path):
-                logger.info(f"Loading YAML file: {file_path}")
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                    result = data if data is not None else {}
-                    logger.info(f"Successfully loaded {file_path}, data size: {len(result) if isinstance(result, (dict, list)) else 'N/A'}")
-                    return result
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _store_cache(self, file_path: str, data: Any, owned: bool = False) -> None:
+        """以文件当前指纹缓存数据；owned 表示调用方移交了 data 的所有权，之后不会再修改它"""
+        fingerprint = self.file_fingerprint(file_path)
+        if fingerprint is None:
+            return
+        if owned:
+            entry = [fingerprint, data, None]
+        else:
+            entry = [fingerprint, None, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)]
+        with self._cache_lock:
+            self._cache[file_path] = entry
+    
+    def add_change_listener(self, listener: Callable[[str, Any], None]) -> None:
+        """
+        注册配置变更监听器，配置经本管理器保存或恢复后调用 listener(配置名, 数据)
+
+        数据为保存后的文档，监听器只能读取、不能修改；
+        数据为 None 表示内容未知（如从备份恢复），监听器需要自行重新加载。
+        """
+        self._change_listeners.append(listener)
+    
+    def _notify_change(self, file_path: str, data: Any = None) -> None:
+        """通知监听器配置文件已变更"""
+        config_name = self.get_config_name(file_path)
+        if not config_name:
+            return
+        for listener in self._change_listeners:
+            try:
+                listener(config_name, data)
+            except Exception as e:
+                logger.error(f"Change listener failed for {config_name}: {e}")
+    
+    def _invalidate_cache(self, file_path: Optional[str] = None) -> None:
+        """使指定文件（或全部文件）的缓存失效"""
+        with self._cache_lock:
+            if file_path is None:
+                self._cache.clear()
             else:
-                logger.warning(f"YAML file does not exist: {file_path}")
-                return {}
+                self._cache.pop(file_path, None)
+    
+    def clear_cache(self) -> None:
+        """清空解析缓存"""
+        self._invalidate_cache()
+        logger.info("YAML parse cache cleared")
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        with self._cache_lock:
+            hits = self._cache_hits
+            misses = self._cache_misses
+            entries = len(self._cache)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'entries': entries,
+            'hit_rate': round(hits / total, 4) if total else 0.0
+        }
+    
+    def _get_document(self, file_path: str) -> Tuple[Any, Optional[list]]:
+        """
+        获取文件的解析结果，返回(文档, 缓存条目)
+
+        缓存条目为 [指纹, 文档, pickle 快照]，文档与快照按需生成。
+        条目不为 None 时文档由缓存共享，调用方只能读取，不能修改。
+        """
+        # 尚未落盘的合并写入优先，保证读到自己刚保存的内容
+        if self._write_coalescer is not None:
+            found, pending_data = self._write_coalescer.get_pending(file_path)
+            if found:
+                with self._cache_lock:
+                    self._cache_hits += 1
+                return pending_data, None
+        
+        fingerprint = self.file_fingerprint(file_path)
+        if fingerprint is None:
+            self._invalidate_cache(file_path)
+            logger.warning(f"YAML file does not exist: {file_path}")
+            return {}, None
+        
+        with self._cache_lock:
+            entry = self._cache.get(file_path)
+            if entry is not None and entry[0] == fingerprint:
+                self._cache_hits += 1
+            else:
+                self._cache_misses += 1
+                entry = None
+        
+        if entry is not None:
+            logger.debug(f"Cache hit for {file_path}")
+            if entry[1] is None:
+                entry[1] = pickle.loads(entry[2])
+            return entry[1], entry
+        
+        logger.info(f"Loading YAML file: {file_path}")
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = yaml_backend.safe_load(f)
+            result = data if data is not None else {}
+            logger.info(f"Successfully loaded {file_path}, data size: {len(result) if isinstance(result, (dict, list)) else 'N/A'}")
+        
+        # 使用读取前的指纹，若读取期间文件被修改，下次访问会因指纹不一致而重新解析
+        entry = [fingerprint, result, None]
+        with self._cache_lock:
+            self._cache[file_path] = entry
+        return result, entry
+    
+    def _load_document(self, file_path: str) -> Any:
+        """加载共享的只读文档（不复制），解析失败时返回空字典"""
+        try:
+            document, _ = self._get_document(file_path)
+            return document
         except yaml.YAMLError as e:
             logger.error(f"YAML parsing error in {file_path}: {e}")
             return {}
@@ -53,21 +224,163 @@ class YamlManager:
             logger.error(f"Unexpected error loading {file_path}: {e}")
             return {}
     
-    def _save_yaml_file(self, file_path: str, data: Dict[str, Any]) -> Tuple[bool, str]:
-        """保存 YAML 文件，返回(成功状态, 错误信息)"""
+    def _load_yaml_file(self, file_path: str) -> Dict[str, Any]:
+        """加载 YAML 文件（按文件指纹缓存解析结果，返回调用方可修改的独立副本）"""
         try:
-            logger.info(f"Saving YAML file: {file_path}")
+            document, entry = self._get_document(file_path)
+            if entry is None:
+                return document
+            
+            snapshot = entry[2]
+            if snapshot is None:
+                snapshot = pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL)
+                entry[2] = snapshot
+            return pickle.loads(snapshot)
+        except yaml.YAMLError as e:
+            logger.error(f"YAML parsing error in {file_path}: {e}")
+            return {}
+        except UnicodeDecodeError as e:
+            logger.error(f"Encoding error in {file_path}: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f"Unexpected error loading {file_path}: {e}")
+            return {}
+    
+    def _atomic_write(self, file_path: str, content: str, sync_dir: bool = True) -> None:
+        """原子写入文件：写临时文件并 fsync 后用 os.replace 替换，读取方不会看到写了一半的文件"""
+        directory = os.path.dirname(file_path) or '.'
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
             
-            # 创建备份
             if os.path.exists(file_path):
+                # 沿用原文件的权限和属主，避免 Homepage 容器无法读取
+                stat = os.stat(file_path)
+                os.chmod(temp_path, stat.st_mode & 0o7777)
+                try:
+                    os.chown(temp_path, stat.st_uid, stat.st_gid)
+                except (PermissionError, AttributeError):
+                    pass
+                
+                # 创建备份：硬链接到旧文件，替换后旧 inode 由 .backup 持有，无需复制内容
                 backup_path = f"{file_path}.backup"
-                shutil.copy2(file_path, backup_path)
+                self._link_backup(file_path, backup_path)
                 logger.info(f"Created backup: {backup_path}")
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_path, 0o666 & ~umask)
+            
+            os.replace(temp_path, file_path)
+            
+            # 已知写入的内容，直接记录新版本号，无需重新读取文件
+            self._revisions[file_path] = (self.file_fingerprint(file_path), self._content_revision(content.encode('utf-8')))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        if sync_dir:
+            self._fsync_dir(directory)
+    
+    def _link_backup(self, file_path: str, backup_path: str) -> None:
+        """将 file_path 以硬链接方式保存为 backup_path，文件系统不支持硬链接时回退为复制"""
+        temp_link = f"{backup_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(file_path, temp_link)
+            os.replace(temp_link, backup_path)
+        except OSError:
+            if os.path.exists(temp_link):
+                os.remove(temp_link)
+            shutil.copy2(file_path, backup_path)
+    
+    def _fsync_dir(self, directory: str) -> None:
+        """fsync 目录，确保 rename 持久化"""
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+    
+    def _write_yaml_batch(self, batch: Dict[str, Any], claimed: bool = False) -> None:
+        """
+        批量写入多个 YAML 文件，所有文件替换完成后每个目录只 fsync 一次
+
+        claimed 表示数据已由调用方从合并队列取出；否则持锁后确认数据仍是最新的待写数据，
+        在此之前被更新的保存或整体提交（导入/恢复）取代的数据不再写入。
+        """
+        directories = set()
+        for file_path, data in batch.items():
+            try:
+                content = yaml_backend.dump(data, **self.DUMP_OPTIONS)
+                with self._file_locks.lock(file_path):
+                    if not claimed and not self._write_coalescer.is_current(file_path):
+                        logger.info(f"Skipped superseded coalesced write: {file_path}")
+                        continue
+                    self._atomic_write(file_path, content, sync_dir=False)
+                    self._store_cache(file_path, data, owned=True)
+                self._notify_change(file_path, data)
+                directories.add(os.path.dirname(file_path) or '.')
+                logger.info(f"Flushed coalesced write: {file_path}")
+            except Exception as e:
+                self._invalidate_cache(file_path)
+                logger.error(f"Error flushing {file_path}: {e}")
+        for directory in directories:
+            self._fsync_dir(directory)
+    
+    def flush_writes(self, file_paths: Optional[list] = None) -> None:
+        """
+        立即写入合并队列中尚未落盘的数据
+
+        指定 file_paths 时只在当前线程写入这些文件（调用方可以已持有它们的锁，不会与合并队列互相等待）。
+        """
+        if self._write_coalescer is None:
+            return
+        if file_paths is None:
+            self._write_coalescer.flush()
+            return
+        batch = {}
+        for file_path in file_paths:
+            found, data = self._write_coalescer.take(file_path)
+            if found:
+                batch[file_path] = data
+        if batch:
+            self._write_yaml_batch(batch, claimed=True)
+    
+    def get_write_stats(self) -> Dict[str, Any]:
+        """获取写入合并队列统计"""
+        if self._write_coalescer is None:
+            return {'window_ms': 0, 'submitted': 0, 'flushed': 0, 'pending': 0}
+        return self._write_coalescer.get_stats()
+    
+    def _save_yaml_file(self, file_path: str, data: Dict[str, Any], owned: bool = False) -> Tuple[bool, str]:
+        """保存 YAML 文件，返回(成功状态, 错误信息)"""
+        try:
+            logger.info(f"Saving YAML file: {file_path}")
+            
+            # 启用写入合并时只入队，由合并队列在窗口结束时统一落盘
+            if self._write_coalescer is not None:
+                self._write_coalescer.submit(file_path, data)
+                self._notify_change(file_path, data)
+                return True, "保存成功"
+            
+            # 先序列化，序列化失败时不会触碰原文件
+            content = yaml_backend.dump(data, **self.DUMP_OPTIONS)
             
-            # 保存文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                yaml.dump(data, f, default_flow_style=False, allow_unicode=True, 
-                         indent=2, sort_keys=False)
+            # 原子写入（同时以硬链接保留 .backup），并用刚写入的数据预热缓存；
+            # 持有文件锁期间取指纹，避免其他进程的写入混入缓存
+            with self._file_locks.lock(file_path):
+                self._atomic_write(file_path, content)
+                self._store_cache(file_path, data, owned=owned)
+            self._notify_change(file_path, data)
             
             # 验证保存结果
             if os.path.exists(file_path):
@@ -92,9 +405,9 @@ class YamlManager:
             logger.error(f"Unexpected error saving {file_path}: {e}")
             return False, error_msg
     
-    def load_settings(self) -> Dict[str, Any]:
-        """加载全局设置"""
-        default_settings = {
+    def get_default_settings(self) -> Dict[str, Any]:
+        """获取默认全局设置（每次返回新的字典）"""
+        return {
             # 基础设置
             'title': 'Homepage',
             'description': '',
@@ -148,6 +461,10 @@ class YamlManager:
             'logpath': '',
             'disableUpdateCheck': False
         }
+    
+    def load_settings(self) -> Dict[str, Any]:
+        """加载全局设置"""
+        default_settings = self.get_default_settings()
         
         settings = self._load_yaml_file(self.settings_file)
         # 合并默认设置
@@ -189,6 +506,68 @@ class YamlManager:
         logger.info(f"Saving services with {len(services)} groups")
         return self._save_yaml_file(self.services_file, services)
     
+    def query_groups(self, config_name: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                     max_items: Optional[int] = None) -> Tuple[list, Optional[str], int]:
+        """
+        按分组分页读取 services/bookmarks 配置，返回(分组列表, 下一页游标, 分组总数)
+
+        每个分组为 {'index', 'name', 'count', 'items'}，items 与缓存共享，调用方不得修改。
+        格式无效的分组（不是 {分组名: 列表}）name 为 None，另有 raw 为原始内容，整体保存时需原样带回。
+        一页最多 limit 个分组；指定 max_items 时条目数累计超过该值即提前结束（至少返回一个分组）。
+        游标绑定配置版本号，配置在翻页期间被修改时抛出 RevisionConflictError，游标无效时抛出 ValueError。
+        """
+        if config_name not in ('services', 'bookmarks'):
+            raise ValueError(f"不支持分组分页的配置: {config_name}")
+        
+        revision = self.get_revision(config_name)
+        start = 0
+        if cursor:
+            cursor_revision, start = self._decode_group_cursor(cursor)
+            if cursor_revision != revision:
+                raise RevisionConflictError(config_name, revision)
+        
+        document = self._load_document(self.get_config_file_path(config_name))
+        if not isinstance(document, list):
+            document = []
+        
+        groups = []
+        item_total = 0
+        index = start
+        while index < len(document) and (limit is None or len(groups) < limit):
+            group = document[index]
+            name = next(iter(group)) if isinstance(group, dict) and len(group) == 1 else None
+            if name is not None and isinstance(group[name], list):
+                items = group[name]
+                page_group = {'index': index, 'name': name, 'count': len(items), 'items': items}
+            else:
+                items = []
+                page_group = {'index': index, 'name': None, 'count': 0, 'items': items, 'raw': group}
+            if groups and max_items is not None and item_total + len(items) > max_items:
+                break
+            groups.append(page_group)
+            item_total += len(items)
+            index += 1
+        
+        next_cursor = self._encode_group_cursor(revision, index) if index < len(document) else None
+        return groups, next_cursor, len(document)
+    
+    @staticmethod
+    def _encode_group_cursor(revision: str, index: int) -> str:
+        raw = json.dumps([revision, index]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+    
+    @staticmethod
+    def _decode_group_cursor(cursor: str) -> Tuple[str, int]:
+        """解析分组分页游标，格式错误时抛出 ValueError"""
+        try:
+            revision, index = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            index = int(index)
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+        if index < 0:
+            raise ValueError(f"无效的分页游标: {cursor}")
+        return str(revision), index
+    
     def load_widgets(self) -> Dict[str, Any]:
         """加载小工具配置"""
         return self._load_yaml_file(self.widgets_file)
@@ -219,8 +598,115 @@ class YamlManager:
         logger.info(f"Saving docker config with {len(docker_config)} instances")
         return self._save_yaml_file(self.docker_file, docker_config)
     
+    def patch_config(self, config_name: str, operations: Union[list, Callable[[Any], list]],
+                     validate_func: Optional[Callable[[Any, list], Tuple[bool, str]]] = None,
+                     expected_revision: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        对配置文件批量应用 JSON Patch (RFC 6902)，返回(成功状态, 错误信息)
+
+        补丁直接作用于缓存中的文档：未触及的顶层节点（分组/实例）被共享，
+        validate_func(局部配置, 顶层下标/键列表) 只接收被修改或新增的顶层节点组成的局部配置，
+        以及这些节点在新文档中的下标（列表）或键（字典），用于生成指向完整文档的错误路径；
+        整个文件只在序列化写入时被完整遍历。
+        operations 也可以是函数：持有文件锁时以当前文档（只读）调用，返回操作列表，
+        用于按名称定位分组/条目下标，避免定位与修改之间文件被其他请求改动。
+        版本号不一致时抛出 RevisionConflictError。
+        """
+        file_path = self.get_config_file_path(config_name)
+        if not file_path:
+            return False, f"未知的配置类型: {config_name}"
+        
+        expected_type = list if config_name in ('bookmarks', 'services') else dict
+        
+        with self.config_transaction(config_name, expected_revision):
+            try:
+                document = self._load_document(file_path)
+                if not isinstance(document, expected_type):
+                    document = expected_type()
+                
+                if callable(operations):
+                    operations = operations(document)
+                if not operations:
+                    return True, "没有需要修改的内容"
+                
+                new_document, touched = apply_patch(document, operations)
+                logger.info(f"Applied {len(operations)} patch operations to {config_name}, touched nodes: {len(touched)}")
+                
+                if validate_func is not None and touched:
+                    if expected_type is list:
+                        partial = [new_document[index] for index in touched]
+                    else:
+                        partial = {key: new_document[key] for key in touched}
+                    is_valid, validation_msg = validate_func(partial, touched)
+                    if not is_valid:
+                        return False, validation_msg
+                
+                return self._save_yaml_file(file_path, new_document, owned=True)
+            except JsonPatchError as e:
+                logger.warning(f"Invalid patch for {config_name}: {e}")
+                return False, f"补丁无效: {e}"
+            except Exception as e:
+                error_msg = f"应用补丁失败: {e}"
+                logger.error(error_msg)
+                return False, error_msg
+    
+    @staticmethod
+    def _content_revision(content: bytes) -> str:
+        """根据文件内容计算版本号"""
+        return hashlib.blake2b(content, digest_size=8).hexdigest()
+    
+    def get_revision(self, config_name: str) -> str:
+        """
+        获取配置文件的当前版本号（内容哈希），无需加锁
+
+        按文件指纹缓存，文件未变化时不重新读取；写入合并队列中尚未落盘的数据
+        按其序列化结果计算，与落盘后的版本号一致。
+        """
+        file_path = self.get_config_file_path(config_name)
+        if self._write_coalescer is not None:
+            found, pending = self._write_coalescer.get_pending(file_path)
+            if found:
+                return self._content_revision(yaml_backend.dump(pending, **self.DUMP_OPTIONS).encode('utf-8'))
+        
+        fingerprint = self.file_fingerprint(file_path)
+        cached = self._revisions.get(file_path)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except FileNotFoundError:
+            content = b''
+        revision = self._content_revision(content)
+        # 读取期间文件可能被替换，只有指纹未变时才缓存
+        if fingerprint is not None and self.file_fingerprint(file_path) == fingerprint:
+            self._revisions[file_path] = (fingerprint, revision)
+        return revision
+    
+    @contextmanager
+    def config_transaction(self, config_name: str, expected_revision: Optional[str] = None,
+                           require_revision: bool = False) -> Iterator[str]:
+        """
+        配置文件的读-改-写事务：持有该文件的跨进程锁，并校验调用方的版本号
+
+        expected_revision 与当前版本不一致时抛出 RevisionConflictError；
+        require_revision 为 True 时缺少版本号同样视为冲突。返回事务开始时的版本号。
+        """
+        file_path = self.get_config_file_path(config_name)
+        with self._file_locks.lock(file_path):
+            current_revision = self.get_revision(config_name)
+            if expected_revision is None:
+                if require_revision:
+                    raise RevisionConflictError(config_name, current_revision, missing=True)
+            elif expected_revision != current_revision:
+                logger.warning(f"Revision conflict on {config_name}: expected {expected_revision}, current {current_revision}")
+                raise RevisionConflictError(config_name, current_revision)
+            yield current_revision
+    
     def get_config_status(self) -> Dict[str, Any]:
         """获取配置文件状态"""
+        self.flush_writes()
         status = {}
         files = {
             'settings': self.settings_file,
@@ -248,113 +734,369 @@ class YamlManager:
         return status
     
     def backup_configs(self) -> Tuple[str, str]:
-        """备份所有配置文件，返回(备份路径, 错误信息)"""
+        """备份所有配置文件，返回(备份清单路径, 错误信息)；内容未变化的文件不会重复存储"""
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_path = os.path.join(self.backup_dir, f'backup_{timestamp}')
-            logger.info(f"Creating backup at: {backup_path}")
+            self.flush_writes()
             
-            os.makedirs(backup_path, exist_ok=True)
+            files = {}
+            for config_name in self.get_supported_config_types():
+                file_path = self.get_config_file_path(config_name)
+                filename = os.path.basename(file_path)
+                # 共享锁：允许并发备份，但不会读到其他进程写了一半的状态
+                with self._file_locks.lock(file_path, shared=True):
+                    try:
+                        with open(file_path, 'rb') as f:
+                            files[filename] = f.read()
+                    except FileNotFoundError:
+                        logger.warning(f"File not found for backup: {file_path}")
             
-            files_to_backup = [
-                self.settings_file,
-                self.bookmarks_file,
-                self.services_file,
-                self.widgets_file,
-                self.docker_file
-            ]
-            
-            backed_up_files = 0
-            for file_path in files_to_backup:
-                if os.path.exists(file_path):
-                    filename = os.path.basename(file_path)
-                    destination = os.path.join(backup_path, filename)
-                    shutil.copy2(file_path, destination)
-                    backed_up_files += 1
-                    logger.info(f"Backed up: {filename}")
-                else:
-                    logger.warning(f"File not found for backup: {file_path}")
-            
-            logger.info(f"Backup completed: {backed_up_files} files backed up")
-            return backup_path, f"成功备份 {backed_up_files} 个文件"
+            manifest = self.backup_store.create(files)
+            logger.info(f"Backup completed: {len(files)} files backed up as {manifest['name']}")
+            return self.get_backup_path(manifest['name']), f"成功备份 {len(files)} 个文件"
             
         except Exception as e:
             error_msg = f"备份失败: {e}"
             logger.error(f"Backup failed: {e}")
             return "", error_msg
     
-    def restore_configs(self, backup_path: str) -> Tuple[bool, str]:
-        """从备份恢复配置文件，返回(成功状态, 错误信息)"""
+    def restore_configs(self, backup_path: str, files: Optional[list] = None, items: Optional[Dict[str, list]] = None,
+                        validate: Optional[Callable[[str, Any], Tuple[bool, str]]] = None,
+                        allowed_revisions: Optional[set] = None) -> Tuple[bool, str]:
+        """
+        从备份恢复配置文件（backup_path 为 get_backup_path 返回的清单路径），返回(成功状态, 错误信息)
+
+        files 指定只恢复的文件（默认备份中的全部配置文件）；items 为 {文件名: [[分组], [分组, 条目], ...]}，
+        只恢复这些分组/条目，文件其余部分保持不变。validate(配置名, 数据) 返回(是否有效, 错误信息)。
+        allowed_revisions 不为 None 时，每个被替换文件的当前版本号都必须在其中，否则抛出 RevisionConflictError。
+
+        恢复以事务方式进行：先在内存中生成并验证所有文件，任一文件无效则不做任何修改；
+        持有所有相关文件的锁，把当前配置保存为 pre_restore 备份，写入并统一 fsync 临时文件，
+        记录恢复日志后逐个原子替换，最后只 fsync 一次目录。替换过程中出错时回滚已替换的文件；
+        进程在替换过程中崩溃时，下次启动按日志完成剩余的替换。
+        """
         try:
+            # 先落盘队列中的数据，避免恢复后被旧的合并写入覆盖
+            self.flush_writes()
             logger.info(f"Restoring configs from: {backup_path}")
             
-            if not os.path.exists(backup_path):
+            backup_name = self._backup_name_from_path(backup_path)
+            manifest = self.backup_store.get_manifest(backup_name)
+            if manifest is None:
                 error_msg = f"备份路径不存在: {backup_path}"
                 logger.error(error_msg)
                 return False, error_msg
             
-            files_to_restore = [
-                'settings.yaml',
-                'bookmarks.yaml',
-                'services.yaml',
-                'widgets.yaml',
-                'docker.yaml'
-            ]
-            
-            restored_files = 0
-            for filename in files_to_restore:
-                backup_file = os.path.join(backup_path, filename)
-                if os.path.exists(backup_file):
-                    target_file = os.path.join(self.config_path, filename)
-                    shutil.copy2(backup_file, target_file)
-                    restored_files += 1
-                    logger.info(f"Restored: {filename}")
-                else:
-                    logger.warning(f"Backup file not found: {backup_file}")
-            
-            if restored_files > 0:
-                logger.info(f"Restore completed: {restored_files} files restored")
-                return True, f"成功恢复 {restored_files} 个文件"
+            items = items or {}
+            backup_files = manifest.get('files', {})
+            if files is None and not items:
+                filenames = [filename for filename in RESTORABLE_FILES if filename in backup_files]
             else:
+                filenames = list(dict.fromkeys(list(files or []) + list(items)))
+            for filename in filenames:
+                if filename not in RESTORABLE_FILES:
+                    return False, f"不支持恢复的文件: {filename}"
+                if filename not in backup_files:
+                    return False, f"备份中不存在文件: {filename}"
+            if not filenames:
                 error_msg = "没有找到可恢复的配置文件"
                 logger.warning(error_msg)
                 return False, error_msg
+            
+            targets = {filename: os.path.join(self.config_path, filename) for filename in filenames}
+            with ExitStack() as stack:
+                # 按固定顺序获取所有相关文件的锁，整个恢复过程中不会有其他写入
+                for filename in sorted(targets):
+                    stack.enter_context(self._file_locks.lock(targets[filename]))
+                
+                # 1. 在内存中生成所有文件的新内容并验证
+                live = {}
+                staged = {}
+                for filename, target in targets.items():
+                    try:
+                        with open(target, 'rb') as f:
+                            live[filename] = f.read()
+                    except FileNotFoundError:
+                        live[filename] = None
+                    content, data = self._stage_restore_file(backup_name, backup_files[filename]['hash'],
+                                                             live[filename], items.get(filename))
+                    config_name = filename[:-len('.yaml')]
+                    if validate is not None and data is not None:
+                        is_valid, validation_msg = validate(config_name, data)
+                        if not is_valid:
+                            return False, f"{filename} 验证失败: {validation_msg}"
+                    if content != live[filename]:
+                        staged[filename] = (content, data)
+                
+                if not staged:
+                    return True, "当前配置与备份一致，无需恢复"
                 
+                # 2. 写入临时文件后整体提交，当前配置先保存为 pre_restore 备份
+                staged_files = {}
+                try:
+                    for filename, (content, _) in staged.items():
+                        f, staged_files[filename] = self.create_staged_file(filename)
+                        with f:
+                            f.write(content)
+                except BaseException:
+                    self.discard_staged_files(staged_files)
+                    raise
+                snapshot_name = self.commit_staged_files(staged_files, 'pre_restore',
+                                                         {filename: data for filename, (_, data) in staged.items()},
+                                                         allowed_revisions=allowed_revisions)
+            
+            logger.info(f"Restore completed: {', '.join(staged)} restored, snapshot {snapshot_name}")
+            return True, f"成功恢复 {len(staged)} 个文件，恢复前的配置已保存为备份 {snapshot_name}"
+                
+        except RevisionConflictError:
+            raise
+        except ValueError as e:
+            # 选定的分组/条目路径无效
+            return False, str(e)
         except Exception as e:
             error_msg = f"恢复失败: {e}"
             logger.error(f"Error restoring configs: {e}")
             return False, error_msg
+    
+    def _stage_restore_file(self, backup_name: str, digest: str, live: Optional[bytes],
+                            paths: Optional[list]) -> Tuple[bytes, Any]:
+        """生成恢复后的文件内容，返回(内容, 解析后的数据)；整文件恢复时保留备份的原始格式"""
+        content = self.backup_store.read_object(digest)
+        data = yaml_backend.safe_load(content.decode('utf-8'))
+        if not paths:
+            return content, data
+        
+        live_data = yaml_backend.safe_load(live.decode('utf-8')) if live else None
+        merged = merge_selected(live_data, data, paths)
+        return yaml_backend.dump(merged, **self.DUMP_OPTIONS).encode('utf-8'), merged
+    
+    def create_staged_file(self, filename: str) -> Tuple[BinaryIO, str]:
+        """在配置目录中创建待提交的临时文件，返回(可写的文件对象, 临时文件路径)"""
+        fd, temp_path = tempfile.mkstemp(dir=self.config_path, prefix=f".{filename}.", suffix='.staged')
+        return os.fdopen(fd, 'wb'), temp_path
+    
+    def discard_staged_files(self, staged: Dict[str, str]) -> None:
+        """删除未提交的临时文件"""
+        for temp_path in staged.values():
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+    
+    def commit_staged_files(self, staged: Dict[str, str], snapshot_prefix: str,
+                            parsed: Optional[Dict[str, Any]] = None,
+                            allowed_revisions: Optional[set] = None) -> str:
+        """
+        把一组临时文件 {文件名: 临时文件路径} 作为整体提交为配置文件，返回回滚备份的名称
 
-    def list_backups(self) -> list:
-        """获取备份列表"""
+        持有所有相关文件的锁，落盘这些文件尚未写入的合并写入，先把当前配置保存为 <snapshot_prefix>_<时间> 备份，
+        再统一 fsync、记录恢复日志并逐个原子替换；parsed 为已解析的数据，用于更新缓存和通知。
+        allowed_revisions 不为 None 时，每个被替换文件的当前版本号都必须在其中，否则抛出 RevisionConflictError。
+        失败时抛出异常，临时文件被删除，配置文件保持原样。
+        """
+        parsed = parsed or {}
         try:
-            backups = []
-            if os.path.exists(self.backup_dir):
-                for backup_name in os.listdir(self.backup_dir):
-                    backup_path = os.path.join(self.backup_dir, backup_name)
-                    if os.path.isdir(backup_path):
-                        stat = os.stat(backup_path)
-                        backups.append({
-                            'name': backup_name,
-                            'date': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                            'timestamp': stat.st_mtime
-                        })
-            
-            # 按时间戳倒序排列
-            backups.sort(key=lambda x: x['timestamp'], reverse=True)
-            return backups
+            for filename in staged:
+                if filename not in RESTORABLE_FILES:
+                    raise ValueError(f"不支持的配置文件: {filename}")
+            targets = {filename: os.path.join(self.config_path, filename) for filename in staged}
+            with ExitStack() as stack:
+                # 按固定顺序获取所有相关文件的锁（可重入，调用方可能已持有）
+                for filename in sorted(targets):
+                    stack.enter_context(self._file_locks.lock(targets[filename]))
+                # 持锁后先落盘这些文件尚未写入的合并写入，否则它们会在提交后覆盖新内容
+                self.flush_writes(list(targets.values()))
+                if allowed_revisions is not None:
+                    for filename in targets:
+                        config_name = filename[:-len('.yaml')]
+                        current_revision = self.get_revision(config_name)
+                        if current_revision not in allowed_revisions:
+                            raise RevisionConflictError(config_name, current_revision)
+                snapshot = self._snapshot_configs(snapshot_prefix)
+                self._commit_staged([(staged[filename], targets[filename]) for filename in staged], snapshot['name'])
+                for filename, data in parsed.items():
+                    if data is not None and filename in targets:
+                        self._store_cache(targets[filename], data, owned=True)
+        except BaseException:
+            self.discard_staged_files(staged)
+            raise
+        
+        for filename in staged:
+            self._notify_change(targets[filename], parsed.get(filename))
+        return snapshot['name']
+    
+    def save_configs(self, configs: Dict[str, Any], snapshot_prefix: str) -> Tuple[bool, str]:
+        """
+        把多个配置 {配置名: 数据} 作为整体原子保存，返回(成功状态, 消息)
+
+        保存前的配置保存为 <snapshot_prefix>_<时间> 备份；数据的所有权移交给管理器，调用方之后不能再修改。
+        """
+        staged = {}
+        parsed = {}
+        try:
+            self.flush_writes()
+            for config_name, data in configs.items():
+                filename = os.path.basename(self.get_config_file_path(config_name))
+                f, staged[filename] = self.create_staged_file(filename)
+                with f:
+                    f.write(yaml_backend.dump(data, **self.DUMP_OPTIONS).encode('utf-8'))
+                parsed[filename] = data
+            snapshot = self.commit_staged_files(staged, snapshot_prefix, parsed)
+            return True, f"保存成功，修改前的配置已保存为备份 {snapshot}"
+        except Exception as e:
+            self.discard_staged_files(staged)
+            logger.error(f"Error saving configs {list(configs)}: {e}")
+            return False, f"保存失败: {e}"
+    
+    def _snapshot_configs(self, prefix: str) -> Dict[str, Any]:
+        """把当前全部配置文件保存为 <prefix>_<时间> 备份（调用方已持有相关文件的锁）"""
+        files = {}
+        for filename in RESTORABLE_FILES:
+            try:
+                with open(os.path.join(self.config_path, filename), 'rb') as f:
+                    files[filename] = f.read()
+            except FileNotFoundError:
+                pass
+        return self.backup_store.create(files, name=f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    
+    def _commit_staged(self, staged: list, snapshot_name: str) -> None:
+        """
+        统一 fsync 全部临时文件 [(临时文件, 目标文件)]，记录恢复日志后依次替换目标文件，最后 fsync 一次目录
+
+        替换出错时把已替换的文件恢复为原内容（保留在 .backup 硬链接中）并删除临时文件。
+        """
+        try:
+            for temp_path, target in staged:
+                if os.path.exists(target):
+                    # 沿用原文件的权限和属主
+                    stat = os.stat(target)
+                    os.chmod(temp_path, stat.st_mode & 0o7777)
+                    try:
+                        os.chown(temp_path, stat.st_uid, stat.st_gid)
+                    except (PermissionError, AttributeError):
+                        pass
+                else:
+                    umask = os.umask(0)
+                    os.umask(umask)
+                    os.chmod(temp_path, 0o666 & ~umask)
+                fd = os.open(temp_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            self._write_restore_journal(staged, snapshot_name)
+        except BaseException:
+            for temp_path, _ in staged:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+        
+        replaced = []
+        try:
+            for temp_path, target in staged:
+                existed = os.path.exists(target)
+                if existed:
+                    self._link_backup(target, f"{target}.backup")
+                self._invalidate_cache(target)
+                os.replace(temp_path, target)
+                replaced.append((target, existed))
+        except BaseException:
+            logger.error(f"Commit failed, rolling back {len(replaced)} files")
+            for target, existed in replaced:
+                self._invalidate_cache(target)
+                if existed:
+                    os.replace(f"{target}.backup", target)
+                else:
+                    os.remove(target)
+            for temp_path, _ in staged:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self._fsync_dir(self.config_path)
+            self._remove_restore_journal()
+            raise
+        
+        self._fsync_dir(self.config_path)
+        self._remove_restore_journal()
+    
+    def _write_restore_journal(self, staged: list, snapshot_name: str) -> None:
+        content = json.dumps({'snapshot': snapshot_name, 'files': staged}).encode('utf-8')
+        fd, temp_path = tempfile.mkstemp(dir=self.config_path, prefix='.restore-journal.')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.restore_journal)
+        self._fsync_dir(self.config_path)
+    
+    def _remove_restore_journal(self) -> None:
+        try:
+            os.remove(self.restore_journal)
+        except FileNotFoundError:
+            pass
+    
+    def _recover_restore(self) -> None:
+        """上次恢复在替换过程中中断时，按恢复日志完成剩余的替换（临时文件已完整写入并 fsync）"""
+        if not os.path.exists(self.restore_journal):
+            return
+        try:
+            with open(self.restore_journal, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            self._remove_restore_journal()
+            return
+        
+        targets = sorted(target for _, target in journal.get('files', []))
+        with ExitStack() as stack:
+            for target in targets:
+                stack.enter_context(self._file_locks.lock(target))
+            # 持锁后再次检查：日志可能属于另一个仍在运行并刚刚完成的恢复
+            if not os.path.exists(self.restore_journal):
+                return
+            completed = 0
+            for temp_path, target in journal.get('files', []):
+                if os.path.exists(temp_path):
+                    os.replace(temp_path, target)
+                    completed += 1
+            self._fsync_dir(self.config_path)
+            self._remove_restore_journal()
+        logger.warning(f"Completed interrupted restore: {completed} files replaced "
+                       f"(previous config saved as backup {journal.get('snapshot')})")
+    
+    def list_backups(self, limit: Optional[int] = None) -> list:
+        """获取备份列表，按时间倒序；limit 限制返回的数量"""
+        try:
+            return self.query_backups(limit)[0]
         except Exception as e:
             print(f"Error listing backups: {e}")
             return []
 
+    def query_backups(self, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """
+        从备份索引分页获取备份列表，返回(备份列表, 下一页游标)
+
+        游标无效时抛出 ValueError。
+        """
+        manifests, next_cursor = self.backup_store.query(limit, cursor)
+        return [{
+            'name': manifest['name'],
+            'date': manifest['date'],
+            'timestamp': manifest['timestamp'],
+            'size': self._format_size(manifest.get('size', 0)),
+            'files': sorted(manifest.get('files', {}))
+        } for manifest in manifests], next_cursor
+
+    @staticmethod
+    def _format_size(size: int) -> str:
+        """格式化文件大小"""
+        for unit in ('B', 'KB', 'MB'):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} GB"
+
     def delete_backup(self, backup_name: str) -> bool:
-        """删除备份"""
+        """删除备份，引用归零的文件内容随之回收"""
         try:
-            backup_path = os.path.join(self.backup_dir, backup_name)
-            if os.path.exists(backup_path) and os.path.isdir(backup_path):
-                shutil.rmtree(backup_path)
-                return True
-            return False
+            return self.backup_store.delete(backup_name)
         except Exception as e:
             print(f"Error deleting backup: {e}")
             return False
@@ -362,16 +1104,30 @@ class YamlManager:
     def restore_backup(self, backup_name: str) -> Tuple[bool, str]:
         """按名称恢复备份，返回(成功状态, 错误信息)"""
         try:
-            backup_path = os.path.join(self.backup_dir, backup_name)
-            return self.restore_configs(backup_path)
+            return self.restore_configs(self.get_backup_path(backup_name))
         except Exception as e:
             error_msg = f"恢复备份异常: {e}"
             logger.error(error_msg)
             return False, error_msg
 
     def get_backup_path(self, backup_name: str) -> str:
-        """获取备份路径"""
-        return os.path.join(self.backup_dir, backup_name)
+        """获取备份清单路径，名称不合法时返回空字符串"""
+        if not self.backup_store.is_valid_name(backup_name or ''):
+            return ''
+        return self.backup_store.get_manifest_path(backup_name)
+
+    @staticmethod
+    def _backup_name_from_path(backup_path: str) -> str:
+        """由清单路径得到备份名称"""
+        name = os.path.basename(backup_path or '')
+        return name[:-len('.json')] if name.endswith('.json') else name
+
+    def get_config_name(self, file_path: str) -> str:
+        """根据配置文件路径获取配置名称"""
+        for config_name in self.get_supported_config_types():
+            if self.get_config_file_path(config_name) == file_path:
+                return config_name
+        return ''
 
     def get_config_file_path(self, config_name: str) -> str:
         """获取配置文件路径"""
@@ -384,63 +1140,41 @@ class YamlManager:
         }
         return file_map.get(config_name, '')
 
-    def create_config_zip(self) -> str:
-        """创建配置文件压缩包"""
-        try:
-            import zipfile
-            import tempfile
-            
-            # 创建临时文件
-            temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_zip.close()
-            
-            with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                config_files = [
-                    ('settings.yaml', self.settings_file),
-                    ('bookmarks.yaml', self.bookmarks_file),
-                    ('services.yaml', self.services_file),
-                    ('widgets.yaml', self.widgets_file),
-                    ('docker.yaml', self.docker_file)
-                ]
-                
-                for filename, filepath in config_files:
-                    if os.path.exists(filepath):
-                        zipf.write(filepath, filename)
-            
-            return temp_zip.name
-        except Exception as e:
-            print(f"Error creating config zip: {e}")
-            return None
+    def get_config_archive_entries(self) -> list:
+        """配置文件下载归档的文件列表，文件在生成归档时才逐个打开读取"""
+        self.flush_writes()
+        config_files = [
+            ('settings.yaml', self.settings_file),
+            ('bookmarks.yaml', self.bookmarks_file),
+            ('services.yaml', self.services_file),
+            ('widgets.yaml', self.widgets_file),
+            ('docker.yaml', self.docker_file)
+        ]
+        return [ArchiveEntry(filename, partial(open, filepath, 'rb'))
+                for filename, filepath in config_files if os.path.exists(filepath)]
 
-    def create_backup_zip(self, backup_name: str) -> str:
-        """创建备份压缩包"""
-        try:
-            import zipfile
-            import tempfile
-            
-            backup_path = os.path.join(self.backup_dir, backup_name)
-            if not os.path.exists(backup_path):
+    def get_backup_archive_entries(self, backup_names: list, nested: bool = False) -> Optional[list]:
+        """
+        备份下载归档的文件列表，任一备份不存在时返回 None
+
+        nested=True 时每个备份的文件放在以备份名命名的目录下（多个备份打包下载）。
+        """
+        entries = []
+        for backup_name in backup_names:
+            manifest = self.backup_store.get_manifest(backup_name)
+            if manifest is None:
                 return None
-            
-            # 创建临时文件
-            temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_zip.close()
-            
-            with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(backup_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_name = os.path.relpath(file_path, backup_path)
-                        zipf.write(file_path, arc_name)
-            
-            return temp_zip.name
-        except Exception as e:
-            print(f"Error creating backup zip: {e}")
-            return None 
+            prefix = f'{backup_name}/' if nested else ''
+            for filename, entry in sorted(manifest.get('files', {}).items()):
+                entries.append(ArchiveEntry(f'{prefix}{filename}',
+                                            partial(self.backup_store.open_object, entry['hash']),
+                                            manifest['timestamp']))
+        return entries
 
     def load_raw_yaml_file(self, config_name: str) -> Tuple[str, str]:
         """加载原始 YAML 文件内容，返回(文件内容, 错误信息)"""
         try:
+            self.flush_writes()
             file_path = self.get_config_file_path(config_name)
             if not file_path:
                 return "", f"未知的配置类型: {config_name}"
@@ -477,21 +1211,22 @@ class YamlManager:
             
             # 验证 YAML 语法
             try:
-                yaml.safe_load(content)
+                parsed = yaml_backend.safe_load(content)
             except yaml.YAMLError as e:
                 error_msg = f"YAML 语法错误: {e}"
                 logger.error(f"YAML syntax error: {e}")
                 return False, error_msg
             
-            # 创建备份
-            if os.path.exists(file_path):
-                backup_path = f"{file_path}.backup"
-                shutil.copy2(file_path, backup_path)
-                logger.info(f"Created backup: {backup_path}")
+            # 先落盘队列中的数据，避免稍后被旧的合并写入覆盖
+            self.flush_writes()
             
-            # 保存文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 原子写入（同时以硬链接保留 .backup），已解析过的内容直接放入缓存
+            data = parsed if parsed is not None else {}
+            with self._file_locks.lock(file_path):
+                self._invalidate_cache(file_path)
+                self._atomic_write(file_path, content)
+                self._store_cache(file_path, data, owned=True)
+            self._notify_change(file_path, data)
             
             # 验证保存结果
             if os.path.exists(file_path):
@@ -564,7 +1299,7 @@ target: "_self"
     def validate_yaml_syntax(self, content: str) -> Tuple[bool, str]:
         """验证 YAML 语法，返回(是否有效, 错误信息)"""
         try:
-            yaml.safe_load(content)
+            yaml_backend.safe_load(content)
             return True, ""
         except yaml.YAMLError as e:
             return False, f"YAML 语法错误: {e}"
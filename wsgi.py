@@ -0,0 +1,12 @@
+"""
+生产环境 WSGI 入口
+
+用法:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import app, start_background_tasks
+
+start_background_tasks()
+
+application = app